@@ -0,0 +1,29 @@
+"""
+   Benchmarks locais da Pítia, fora do pacote instalado; rode da raiz do repositório.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+
+   uso: python -m benchmarks similaridade --tamanhos 1000 10000 50000
+        python -m benchmarks extracao --arquivos pagina1.html pagina2.html
+        python -m benchmarks backends --diretorio paginas_salvas/
+        python -m benchmarks limpeza --artigos 200
+        python -m benchmarks inicializacao --maximo-ms 500
+        python -m benchmarks lote --consultas 500 --concorrencia 1 4 16 64
+        python -m benchmarks processos --consultas 200 --processos 0 2 4
+        python -m benchmarks servidor --requisicoes 2000 --clientes 1 8 64
+        python -m benchmarks rastreio --repeticoes 200000
+        python -m benchmarks prazo --prazos 0 0.5 2
+        python -m benchmarks provedores --esperas -1 0.2 0
+        python -m benchmarks hosts --requisicoes 300 --por-segundo 50
+        python -m benchmarks validacao --paginas 50
+        python -m benchmarks resumo --documentos 200 --frases 40
+        python -m benchmarks analise --consultas 2000 --perguntas 500
+        python -m benchmarks conhecimento --perguntas 50 --repeticoes 10
+        python -m benchmarks ranking --candidatas 5 20 50
+        python -m benchmarks ingestao --paginas 100
+        python -m benchmarks memoria --tamanhos 10000 100000
+        python -m benchmarks compartilhado --processos 4 --respostas 300
+        python -m benchmarks suite --tamanhos 1000 10000 100000 --saida resultado.json
+        python -m benchmarks gravar --consultas consultas.txt --fixtures fixtures.json.gz
+        python -m benchmarks comparar base.json resultado.json --tolerancia 0.1
+"""
@@ -0,0 +1,217 @@
+"""
+   Linha de comando dos benchmarks locais da Pítia (veja benchmarks/__init__.py).
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.comum import gerar_pagina, imprimir_tabela
+from benchmarks.memoria import (cenario_compartilhado, cenario_conhecimento, cenario_inicializacao, cenario_memoria,
+                                cenario_similaridade)
+from benchmarks.rede import (cenario_hosts, cenario_ingestao, cenario_lote, cenario_prazo, cenario_processos,
+                             cenario_provedores, cenario_rastreio, cenario_servidor, cenario_validacao)
+from benchmarks.suite import cenario_suite, comparar_resultados, gravar_fixtures
+from benchmarks.texto import (carregar_corpus, cenario_analise, cenario_backends, cenario_extracao, cenario_limpeza,
+                              cenario_ranking, cenario_resumo)
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmarks locais da Pítia")
+    sub = parser.add_subparsers(dest='cenario', required=True)
+
+    similaridade = sub.add_parser('similaridade', help="latência da busca por pergunta similar")
+    similaridade.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 50000])
+    similaridade.add_argument('--consultas', type=int, default=200)
+    similaridade.add_argument('--aquecimento', type=int, default=50, help="buscas não medidas antes de cada tamanho")
+
+    extracao = sub.add_parser('extracao', help="cpu e memória da extração de páginas grandes")
+    extracao.add_argument('--arquivos', nargs='*', default=[], help="páginas html salvas")
+    extracao.add_argument('--paragrafos', type=int, nargs='+', default=[200, 2000, 10000],
+                          help="tamanhos das páginas sintéticas, usadas quando não há arquivos")
+
+    backends = sub.add_parser('backends', help="páginas/s e pico de RSS por backend html")
+    backends.add_argument('--diretorio', help="pasta com páginas salvas; ddg*.html são resultados do duckduckgo")
+    backends.add_argument('--repeticoes', type=int, default=3)
+
+    limpeza = sub.add_parser('limpeza', help="vazão da limpeza de texto em artigos sintéticos")
+    limpeza.add_argument('--artigos', type=int, default=200)
+    limpeza.add_argument('--paragrafos', type=int, default=60)
+
+    inicializacao = sub.add_parser('inicializacao', help="tempo de import e de criação do assistente")
+    inicializacao.add_argument('--repeticoes', type=int, default=5)
+    inicializacao.add_argument('--maximo-ms', type=float,
+                               help="falha (código de saída 1) se o tempo total mediano passar disso")
+
+    lote = sub.add_parser('lote', help="vazão do responder_lote com rede simulada")
+    lote.add_argument('--consultas', type=int, default=500)
+    lote.add_argument('--concorrencia', type=int, nargs='+', default=[1, 4, 16, 64])
+    lote.add_argument('--latencia', type=float, default=0.05, help="segundos por pesquisa ou download simulado")
+
+    processos = sub.add_parser('processos', help="responder_lote com extração e resumo em threads e em processos")
+    processos.add_argument('--consultas', type=int, default=200)
+    processos.add_argument('--processos', type=int, nargs='+', default=[0, 2, 4], help="0 usa só as threads")
+    processos.add_argument('--paragrafos', type=int, default=300, help="tamanho das páginas sintéticas")
+    processos.add_argument('--concorrencia', type=int, default=16)
+
+    servidor = sub.add_parser('servidor', help="teste de carga do modo servidor com busca simulada")
+    servidor.add_argument('--requisicoes', type=int, default=2000)
+    servidor.add_argument('--clientes', type=int, nargs='+', default=[1, 8, 64])
+    servidor.add_argument('--latencia', type=float, default=0.05, help="segundos por pesquisa ou download simulado")
+
+    rastreio = sub.add_parser('rastreio', help="custo do rastreio de etapas, desligado e ligado")
+    rastreio.add_argument('--repeticoes', type=int, default=200000)
+
+    prazo = sub.add_parser('prazo', help="latência com uma página lenta por pesquisa, com e sem prazo por consulta")
+    prazo.add_argument('--prazos', type=float, nargs='+', default=[0, 0.5, 2.0], help="0 desliga o prazo")
+    prazo.add_argument('--consultas', type=int, default=20)
+
+    provedores = sub.add_parser('provedores', help="provedores em sequência, com espera ou em corrida, sem rede")
+    provedores.add_argument('--esperas', type=float, nargs='+', default=[-1, 0.2, 0],
+                            help="segundos até começar o próximo provedor; negativo é sequencial")
+    provedores.add_argument('--consultas', type=int, default=30)
+
+    hosts = sub.add_parser('hosts', help="agendador por domínio contra um servidor local que responde 429")
+    hosts.add_argument('--requisicoes', type=int, default=300)
+    hosts.add_argument('--concorrencia', type=int, default=32)
+    hosts.add_argument('--por-segundo', type=int, default=50, help="taxa aceita pelo servidor antes do 429")
+
+    validacao = sub.add_parser('validacao', help="GET condicional com ETag depois que o cache de páginas vence")
+    validacao.add_argument('--paginas', type=int, default=50)
+
+    resumo = sub.add_parser('resumo', help="velocidade dos resumidores e concordância com o LSA do sumy")
+    resumo.add_argument('--documentos', type=int, default=200)
+    resumo.add_argument('--frases', type=int, default=40, help="frases por documento")
+
+    analise = sub.add_parser('analise', help="radicais memorizados contra o stemmer chamado a cada comparação")
+    analise.add_argument('--consultas', type=int, default=2000)
+    analise.add_argument('--perguntas', type=int, default=500, help="perguntas aprendidas distintas")
+
+    conhecimento = sub.add_parser('conhecimento', help="perguntas repetidas com outra escrita contra a base de conhecimento")
+    conhecimento.add_argument('--perguntas', type=int, default=50, help="perguntas distintas")
+    conhecimento.add_argument('--repeticoes', type=int, default=10, help="vezes que cada uma chega, em média")
+
+    ranking = sub.add_parser('ranking', help="pontuação das páginas baixadas e consulta de domínios confiáveis")
+    ranking.add_argument('--candidatas', type=int, nargs='+', default=[5, 20, 50])
+    ranking.add_argument('--frases', type=int, default=200, help="frases por página")
+
+    ingestao = sub.add_parser('ingestao', help="ingestão de sitemap local com checkpoint e consultas depois dela")
+    ingestao.add_argument('--paginas', type=int, default=100)
+
+    memoria = sub.add_parser('memoria', help="memória aprendida em dicts contra a arena mapeada em memória")
+    memoria.add_argument('--tamanhos', type=int, nargs='+', default=[10000, 100000])
+    memoria.add_argument('--consultas', type=int, default=20000)
+
+    compartilhado = sub.add_parser('compartilhado', help="vários processos aprendendo na mesma memória em disco")
+    compartilhado.add_argument('--processos', type=int, default=4)
+    compartilhado.add_argument('--respostas', type=int, default=300, help="respostas aprendidas por processo")
+
+    suite = sub.add_parser('suite', help="pipeline de ponta a ponta sobre fixtures, com relatório em json")
+    suite.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000],
+                       help="entradas da memória aprendida")
+    suite.add_argument('--consultas', type=int, default=200, help="amostras por etapa")
+    suite.add_argument('--fixtures', metavar='ARQUIVO', help="fixtures gravadas com 'gravar'; sem elas, sintéticas")
+    suite.add_argument('--escala-latencia', type=float, default=0.0,
+                       help="repete o tempo de rede gravado multiplicado por este fator (0: sem espera)")
+    suite.add_argument('--memoria-compacta', action='store_true', help="memória na arena mapeada em memória")
+    suite.add_argument('--saida', metavar='ARQUIVO', help="grava ambiente e resultados em json")
+
+    gravar = sub.add_parser('gravar', help="grava fixtures da rede de verdade para a suíte")
+    gravar.add_argument('--consultas', required=True, metavar='ARQUIVO', help="uma consulta por linha")
+    gravar.add_argument('--fixtures', default='fixtures.json.gz', metavar='ARQUIVO',
+                        help="completado se já existir")
+
+    comparar = sub.add_parser('comparar', help="compara dois relatórios da suíte")
+    comparar.add_argument('base')
+    comparar.add_argument('novo')
+    comparar.add_argument('--tolerancia', type=float, default=0.1,
+                          help="piora relativa aceita antes de falhar (código de saída 1)")
+
+    args = parser.parse_args(argv)
+    if args.cenario == 'similaridade':
+        imprimir_tabela(cenario_similaridade(args.tamanhos, args.consultas, args.aquecimento))
+    elif args.cenario == 'extracao':
+        if args.arquivos:
+            paginas = []
+            for caminho in args.arquivos:
+                with open(caminho, 'rb') as f:
+                    paginas.append((caminho, f.read()))
+        else:
+            paginas = [(f"sintetica_{n}", gerar_pagina(n)) for n in args.paragrafos]
+        imprimir_tabela(cenario_extracao(paginas))
+    elif args.cenario == 'backends':
+        imprimir_tabela(cenario_backends(carregar_corpus(args.diretorio), args.repeticoes))
+    elif args.cenario == 'limpeza':
+        imprimir_tabela(cenario_limpeza(args.artigos, args.paragrafos))
+    elif args.cenario == 'lote':
+        imprimir_tabela(cenario_lote(args.consultas, args.concorrencia, args.latencia))
+    elif args.cenario == 'processos':
+        imprimir_tabela(cenario_processos(args.consultas, args.processos, args.paragrafos, args.concorrencia))
+    elif args.cenario == 'servidor':
+        imprimir_tabela(cenario_servidor(args.requisicoes, args.clientes, args.latencia))
+    elif args.cenario == 'rastreio':
+        imprimir_tabela(cenario_rastreio(args.repeticoes))
+    elif args.cenario == 'prazo':
+        imprimir_tabela(cenario_prazo(args.prazos, args.consultas))
+    elif args.cenario == 'provedores':
+        imprimir_tabela(cenario_provedores(args.esperas, args.consultas))
+    elif args.cenario == 'hosts':
+        imprimir_tabela(cenario_hosts(args.requisicoes, args.concorrencia, args.por_segundo))
+    elif args.cenario == 'validacao':
+        imprimir_tabela(cenario_validacao(args.paginas))
+    elif args.cenario == 'resumo':
+        imprimir_tabela(cenario_resumo(args.documentos, args.frases))
+    elif args.cenario == 'conhecimento':
+        imprimir_tabela(cenario_conhecimento(args.perguntas, args.repeticoes))
+    elif args.cenario == 'ranking':
+        imprimir_tabela(cenario_ranking(args.candidatas, args.frases))
+    elif args.cenario == 'ingestao':
+        imprimir_tabela(cenario_ingestao(args.paginas))
+    elif args.cenario == 'compartilhado':
+        imprimir_tabela(cenario_compartilhado(args.processos, args.respostas))
+    elif args.cenario == 'memoria':
+        imprimir_tabela(cenario_memoria(args.tamanhos, args.consultas))
+    elif args.cenario == 'suite':
+        ambiente, resultados = cenario_suite(args.tamanhos, args.consultas, args.fixtures, args.escala_latencia,
+                                             args.memoria_compacta)
+        imprimir_tabela(resultados)
+        if args.saida:
+            parametros = {'tamanhos': args.tamanhos, 'consultas': args.consultas, 'fixtures': args.fixtures,
+                          'escala_latencia': args.escala_latencia, 'memoria_compacta': args.memoria_compacta}
+            with open(args.saida, 'w', encoding='utf-8') as f:
+                json.dump({'ambiente': ambiente, 'parametros': parametros, 'resultados': resultados}, f,
+                          ensure_ascii=False, indent=1)
+            print(f"Resultados gravados em {args.saida}")
+    elif args.cenario == 'gravar':
+        with open(args.consultas, encoding='utf-8') as f:
+            consultas = [linha.strip() for linha in f if linha.strip()]
+        imprimir_tabela([gravar_fixtures(consultas, args.fixtures)])
+    elif args.cenario == 'comparar':
+        relatorios = []
+        for caminho in (args.base, args.novo):
+            with open(caminho, encoding='utf-8') as f:
+                relatorios.append(json.load(f))
+        if relatorios[0].get('parametros') != relatorios[1].get('parametros'):
+            print("os relatórios foram gerados com parâmetros diferentes; as variações podem não ser comparáveis")
+        if relatorios[0]['ambiente']['cpus'] != relatorios[1]['ambiente']['cpus']:
+            print("os relatórios vêm de máquinas com número de cpus diferente")
+        comparacao = comparar_resultados(*relatorios, args.tolerancia)
+        imprimir_tabela(comparacao)
+        regressoes = [linha for linha in comparacao if linha['regressao']]
+        if regressoes:
+            print(f"{len(regressoes)} métricas pioraram mais de {args.tolerancia:.0%}")
+            return 1
+    elif args.cenario == 'analise':
+        imprimir_tabela(cenario_analise(args.consultas, args.perguntas))
+    elif args.cenario == 'inicializacao':
+        resultados = cenario_inicializacao(args.repeticoes)
+        imprimir_tabela(resultados)
+        if args.maximo_ms is not None and resultados[0]['total_ms'] > args.maximo_ms:
+            print(f"inicialização acima do limite de {args.maximo_ms:.0f} ms")
+            return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
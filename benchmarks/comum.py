@@ -0,0 +1,130 @@
+"""
+   Dados sintéticos e utilitários comuns aos benchmarks da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import random
+import statistics
+
+
+PALAVRAS_BASE = [
+    'quem', 'qual', 'como', 'onde', 'quando', 'porque', 'o', 'a', 'de', 'do', 'da', 'é', 'foi',
+    'deus', 'grego', 'mitologia', 'rio', 'capital', 'brasil', 'planeta', 'história', 'guerra',
+    'rei', 'rainha', 'império', 'ciência', 'energia', 'animal', 'floresta', 'oceano', 'música',
+]
+
+
+def gerar_perguntas(quantidade, semente=42, vocabulario=5000):
+    """gera perguntas sintéticas com distribuição de termos parecida com a real"""
+    aleatorio = random.Random(semente)
+    termos_raros = [f"termo{i}" for i in range(vocabulario)]
+    perguntas = []
+    for _ in range(quantidade):
+        palavras = aleatorio.sample(PALAVRAS_BASE, 4) + aleatorio.sample(termos_raros, 3)
+        aleatorio.shuffle(palavras)
+        perguntas.append(' '.join(palavras))
+    return perguntas
+
+
+def percentis(amostras):
+    """resume amostras de latência em milissegundos"""
+    ordenadas = sorted(amostras)
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+    return {'p50': p(0.50), 'p90': p(0.90), 'p99': p(0.99), 'media': statistics.mean(ordenadas) * 1000}
+
+
+def gerar_pagina(paragrafos, semente=1, navegacao=200, script_kb=256):
+    """gera uma página grande parecida com um artigo: menus, scripts e o texto no final"""
+    aleatorio = random.Random(semente)
+    palavras = PALAVRAS_BASE + [f"palavra{i}" for i in range(500)]
+    def frase(n):
+        return ' '.join(aleatorio.choice(palavras) for _ in range(n)).capitalize() + '.'
+    partes = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Página de teste</title>",
+              "<script>", "var x = 1;" * (script_kb * 100), "</script></head><body>",
+              "<header><nav><ul>"]
+    partes += [f"<li><a href=\"/p{i}\">{frase(4)}</a></li>" for i in range(navegacao)]
+    partes.append("</ul></nav></header><div id=\"content\">")
+    for i in range(paragrafos):
+        if i % 20 == 0:
+            partes.append(f"<h2>{frase(5)}</h2>")
+        partes.append(f"<p>{frase(25)} [{i}] {frase(15)} (nota {i})</p>")
+    partes.append("</div><footer><p>rodapé do site com links</p></footer></body></html>")
+    return ''.join(partes).encode('utf-8')
+
+
+def gerar_pagina_duckduckgo(resultados=30, semente=1, trechos=None):
+    """gera uma página de resultados no formato do html.duckduckgo.com
+
+    trechos(i), se informada, dá o texto do trecho de cada resultado.
+    """
+    aleatorio = random.Random(semente)
+    palavras = PALAVRAS_BASE + [f"palavra{i}" for i in range(500)]
+    def frase(n):
+        return ' '.join(aleatorio.choice(palavras) for _ in range(n))
+    def trecho(i):
+        if trechos is not None:
+            return trechos(i)
+        return f"{frase(30)} <b>{frase(2)}</b> {frase(10)}"
+    partes = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>DuckDuckGo</title>",
+              "<style>", ".result{margin:0}" * 2000, "</style></head><body><div id=\"links\" class=\"results\">"]
+    for i in range(resultados):
+        partes.append(
+            f"<div class=\"result results_links web-result\"><div class=\"links_main links_deep result__body\">"
+            f"<h2 class=\"result__title\"><a class=\"result__a\" href=\"https://exemplo{i}.com.br/\">{frase(6)}</a></h2>"
+            f"<div class=\"result__extras\"><a class=\"result__url\" href=\"https://exemplo{i}.com.br/artigo\">exemplo{i}.com.br</a></div>"
+            f"<a class=\"result__snippet\" href=\"https://exemplo{i}.com.br/artigo\">{trecho(i)}</a>"
+            f"</div></div>"
+        )
+    partes.append("</div></body></html>")
+    return ''.join(partes).encode('utf-8')
+
+
+def gerar_artigo(paragrafos, semente=1):
+    """blocos de texto com o tamanho e as marcas de um artigo da wikipédia: citações, parênteses e regras"""
+    aleatorio = random.Random(semente)
+    palavras = PALAVRAS_BASE + [f"palavra{i}" for i in range(500)]
+    extras = ['posteriormente', 'devido ao fato de', 'constitui', 'denominado', '(c. 1200 a.C.)', '[12]']
+    blocos = []
+    for _ in range(paragrafos):
+        frase = [aleatorio.choice(extras) if aleatorio.random() < 0.08 else aleatorio.choice(palavras)
+                 for _ in range(aleatorio.randint(40, 120))]
+        blocos.append('\n  '.join(' '.join(frase[i:i + 12]) for i in range(0, len(frase), 12)))
+    return blocos
+
+
+def gerar_texto(frases, semente=1):
+    """texto corrido como o conteúdo extraído de uma página: frases pontuadas, com palavras de um tema repetidas"""
+    aleatorio = random.Random(semente)
+    silabas = ['ba', 'ce', 'di', 'lo', 'mu', 'ra', 'te', 'so', 'ni', 'ga', 'pe', 'vi', 'ta', 're', 'co']
+    vocabulario = [''.join(aleatorio.choice(silabas) for _ in range(aleatorio.randint(2, 4))) for _ in range(400)]
+    tema = vocabulario[:15]
+    saida = []
+    for _ in range(frases):
+        palavras = [aleatorio.choice(tema) if aleatorio.random() < 0.2 else aleatorio.choice(vocabulario)
+                    for _ in range(aleatorio.randint(6, 30))]
+        saida.append(' '.join(palavras).capitalize() + '.')
+    return ' '.join(saida)
+
+
+def variacao(pergunta, aleatorio):
+    """a mesma pergunta escrita de outro jeito, como chega de usuários diferentes"""
+    escolha = aleatorio.randrange(5)
+    if escolha == 0:
+        return pergunta.upper()
+    if escolha == 1:
+        return pergunta.capitalize() + '?'
+    if escolha == 2:
+        return '  ' + pergunta.replace(' ', '  ') + '!!'
+    if escolha == 3:
+        return pergunta.replace('é', 'e').replace('ê', 'e').replace('ó', 'o')
+    return 'me diga ' + pergunta
+
+
+def imprimir_tabela(resultados):
+    if not resultados:
+        return
+    colunas = list(resultados[0].keys())
+    print('  '.join(f"{c:>12}" for c in colunas))
+    for linha in resultados:
+        print('  '.join(f"{linha[c]:>12.3f}" if isinstance(linha[c], float) else f"{str(linha[c]):>12}" for c in colunas))
@@ -0,0 +1,152 @@
+"""
+   Fixtures da Pítia: grava pesquisas e páginas uma vez e as reproduz depois, sem rede.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import Counter
+
+from pitia import AssistenteAvancado
+from pitia.armazenamento import gravacao_atomica
+from pitia.rede import ClienteHttp, ErroHttp, RespostaHttp
+
+
+class Fixtures:
+    """respostas http e resultados do google gravados, num json comprimido com gzip
+
+    http guarda, por url, status, cabeçalhos, corpo e o tempo que a rede levou (erros
+    http também, só com o status); google guarda, por consulta, a lista de urls. faltas
+    conta o que foi pedido e não estava gravado, para saber se as fixtures ainda cobrem
+    o caminho que o código faz.
+    """
+
+    VERSAO = 1
+
+    def __init__(self, http=None, google=None):
+        self.http = http if http is not None else {}
+        self.google = google if google is not None else {}
+        self.faltas = Counter()
+
+    @classmethod
+    def carregar(cls, caminho):
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            dados = json.load(f)
+        if dados.get('versao') != cls.VERSAO:
+            raise ValueError(f"{caminho} é de outra versão das fixtures")
+        return cls(dados['http'], dados['google'])
+
+    def salvar(self, caminho):
+        with gravacao_atomica(caminho, sincronizar=False) as bruto, gzip.open(bruto, 'wt', encoding='utf-8') as f:
+            json.dump({'versao': self.VERSAO, 'http': self.http, 'google': self.google}, f, ensure_ascii=False)
+
+    def guardar_http(self, url, status, cabecalhos=(), corpo=b'', codificacao=None, segundos=0.0):
+        registro = {
+            'status': status,
+            'cabecalhos': [[nome, valor] for nome, valor in (cabecalhos.items() if hasattr(cabecalhos, 'items') else cabecalhos)],
+            'corpo': base64.b64encode(corpo).decode('ascii'),
+            'codificacao': codificacao,
+            'segundos': segundos,
+        }
+        self.http[url] = registro
+        return registro
+
+    def estatisticas(self):
+        return {'urls': len(self.http), 'consultas_google': len(self.google), **{f"faltas_{tipo}": n for tipo, n in self.faltas.items()}}
+
+
+class _RespostaGravada:
+    """o pedaço da resposta do aiohttp que as funções ler() do ClienteHttp usam"""
+
+    def __init__(self, registro, corpo):
+        from multidict import CIMultiDict, CIMultiDictProxy  # vem com o aiohttp
+
+        self.status = registro['status']
+        self.headers = CIMultiDictProxy(CIMultiDict(registro['cabecalhos']))
+        self.content = self
+        self._corpo = corpo
+
+    async def read(self):
+        return self._corpo
+
+    async def iter_chunked(self, tamanho):
+        for inicio in range(0, len(self._corpo), tamanho):
+            yield self._corpo[inicio:inicio + tamanho]
+
+
+async def _ler_tudo(resposta):
+    return await resposta.read()
+
+
+class ClienteFixtures(ClienteHttp):
+    """ClienteHttp que responde com as fixtures; com gravar=True, busca na rede o que faltar e grava
+
+    o corpo gravado passa pela mesma função ler() das requisições de verdade, então o
+    limite de bytes e a leitura em partes (extração incremental) se comportam como com a
+    rede. escala_latencia repete o tempo gravado de cada resposta multiplicado por ela
+    (0: responde na hora). o que não está gravado vira um 404.
+    """
+
+    def __init__(self, fixtures, gravar=False, escala_latencia=0.0, **opcoes):
+        super().__init__(**opcoes)
+        self.fixtures = fixtures
+        self.gravar = gravar
+        self.escala_latencia = escala_latencia
+
+    async def _requisitar(self, url, cabecalhos, verificar_ssl, ler):
+        registro = self.fixtures.http.get(url)
+        if registro is None:
+            if not self.gravar:
+                self.fixtures.faltas['http'] += 1
+                raise ErroHttp(404, url)
+            inicio = time.perf_counter()
+            try:
+                resposta = await super()._requisitar(url, cabecalhos, verificar_ssl, _ler_tudo)
+            except ErroHttp as e:
+                self.fixtures.guardar_http(url, e.status, segundos=time.perf_counter() - inicio)
+                raise
+            registro = self.fixtures.guardar_http(url, resposta.status, resposta.cabecalhos, resposta.corpo,
+                                                  resposta.codificacao, time.perf_counter() - inicio)
+        elif self.escala_latencia:
+            await asyncio.sleep(registro['segundos'] * self.escala_latencia)
+        if registro['status'] >= 400:
+            raise ErroHttp(registro['status'], url)
+        gravada = _RespostaGravada(registro, base64.b64decode(registro['corpo']))
+        corpo = await ler(gravada)
+        return RespostaHttp(url, gravada.status, gravada.headers, corpo, registro['codificacao'])
+
+
+class AssistenteFixtures(AssistenteAvancado):
+    """AssistenteAvancado com o duckduckgo, o google e as páginas vindos das fixtures
+
+    só a rede é trocada: cache, agendador, extração, resumo e memória são os de verdade.
+    com gravar=True, o que não estiver nas fixtures é buscado na rede e gravado nelas.
+    """
+
+    def __init__(self, fixtures, gravar=False, escala_latencia=0.0, **opcoes):
+        super().__init__(**opcoes)
+        self.fixtures = fixtures
+        self.gravar = gravar
+        real = self.cliente_http
+        self.cliente_http = ClienteFixtures(
+            fixtures, gravar, escala_latencia,
+            cabecalhos=real.cabecalhos, contexto_ssl=real.contexto_ssl, limite_total=real.limite_total,
+            limite_por_host=real.limite_por_host, tentativas=real.tentativas, fator_espera=real.fator_espera,
+            status_repetir=real.status_repetir, timeout=real.timeout, agendador=real.agendador,
+        )
+
+    async def _buscar_google(self, consulta, num_resultados, chave_cache):
+        resultados = self.fixtures.google.get(consulta)
+        if resultados is None:
+            if not self.gravar:
+                self.fixtures.faltas['google'] += 1
+                return []
+            resultados = await super()._buscar_google(consulta, num_resultados, chave_cache)
+            self.fixtures.google[consulta] = resultados
+            return resultados
+        resultados = resultados[:num_resultados]
+        self.cache.guardar(chave_cache, resultados)
+        return resultados
@@ -0,0 +1,234 @@
+"""
+   Benchmarks da memória aprendida, da base de conhecimento e da inicialização da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pitia.indice import IndiceSimilaridade
+from benchmarks.comum import gerar_perguntas, gerar_texto, percentis, variacao
+
+
+def cenario_similaridade(tamanhos, consultas=200, aquecimento=50):
+    """mede a latência da busca de pergunta similar conforme a memória cresce
+
+    todo tamanho faz as mesmas 'aquecimento' buscas sem medir e depois mede 'consultas'
+    buscas, sorteadas com reposição, para os percentis serem comparáveis entre tamanhos.
+    """
+    perguntas = gerar_perguntas(max(tamanhos))
+    aleatorio = random.Random(7)
+    indice = IndiceSimilaridade()
+    resultados = []
+    inicio_faixa = 0
+    for tamanho in sorted(tamanhos):
+        # insere incrementalmente, como o aprender_resposta faz
+        tempo_insercao = time.perf_counter()
+        for pergunta in perguntas[inicio_faixa:tamanho]:
+            indice.adicionar(pergunta)
+        tempo_insercao = time.perf_counter() - tempo_insercao
+        inicio_faixa = tamanho
+
+        for pergunta in aleatorio.choices(perguntas[:tamanho], k=aquecimento):
+            indice.buscar(pergunta, k=1)
+        amostras = []
+        for pergunta in aleatorio.choices(perguntas[:tamanho], k=consultas):
+            inicio = time.perf_counter()
+            indice.buscar(pergunta, k=1)
+            amostras.append(time.perf_counter() - inicio)
+        resultados.append({'tamanho': tamanho, 'insercao_s': tempo_insercao, **percentis(amostras)})
+    return resultados
+
+
+# módulos que não devem ser importados só para criar o assistente
+MODULOS_PESADOS = ['nltk', 'sumy', 'sklearn', 'scipy', 'numpy', 'bs4', 'googlesearch', 'aiohttp']
+
+
+_SCRIPT_INICIALIZACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+import pitia
+importado = time.perf_counter()
+assistente = pitia.AssistenteAvancado(offline=True)
+criado = time.perf_counter()
+pesados = sorted(m for m in {pesados!r} if m in sys.modules)
+assistente.fechar()
+print(json.dumps([importado - inicio, criado - importado, pesados]))
+"""
+
+
+def cenario_inicializacao(repeticoes=5):
+    """tempo de import e de criação do assistente num processo novo, e quais módulos pesados carregaram"""
+    script = _SCRIPT_INICIALIZACAO.format(pesados=MODULOS_PESADOS)
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.environ.get('PYTHONPATH')])))
+    importacao, criacao, pesados = [], [], set()
+    for _ in range(repeticoes):
+        # pasta vazia para que a memória e o conhecimento comecem do zero
+        with tempfile.TemporaryDirectory() as pasta:
+            saida = subprocess.run([sys.executable, '-c', script], cwd=pasta, env=ambiente,
+                                   capture_output=True, text=True, check=True).stdout
+        tempo_import, tempo_criacao, carregados = json.loads(saida.strip().splitlines()[-1])
+        importacao.append(tempo_import)
+        criacao.append(tempo_criacao)
+        pesados.update(carregados)
+    return [{
+        'import_ms': statistics.median(importacao) * 1000,
+        'criacao_ms': statistics.median(criacao) * 1000,
+        'total_ms': statistics.median(i + c for i, c in zip(importacao, criacao)) * 1000,
+        'pesados': ','.join(sorted(pesados)) or '-',
+    }]
+
+
+def cenario_conhecimento(perguntas=50, repeticoes=10, latencia=0.0):
+    """pesquisas no duckduckgo e tamanho da base de conhecimento com perguntas repetidas e escritas de outro jeito"""
+    from pitia import AssistenteAvancado
+
+    class AssistenteConhecimento(AssistenteAvancado):
+        pesquisas = 0
+
+        async def pesquisar_duckduckgo_async(self, consulta):
+            self.pesquisas += 1
+            await asyncio.sleep(latencia)
+            numero = self.pesquisas
+            return [{'title': f"Resultado {numero}", 'url': f"https://exemplo{numero}.com.br/",
+                     'snippet': gerar_texto(3, semente=numero * 10 + i)} for i in range(3)]
+
+    originais = gerar_perguntas(perguntas, semente=17)
+    aleatorio = random.Random(5)
+    consultas = [variacao(aleatorio.choice(originais), aleatorio) for _ in range(perguntas * repeticoes)]
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            assistente = AssistenteConhecimento()
+            inicio = time.perf_counter()
+            for consulta in consultas:
+                assistente.aprender_e_responder(consulta)
+            duracao = time.perf_counter() - inicio
+            assistente.fechar()
+        finally:
+            os.chdir(diretorio_original)
+    return [{
+        'consultas': len(consultas),
+        'pesquisas': assistente.pesquisas,
+        'chaves': len(assistente.base_conhecimento),
+        'respostas': sum(len(respostas) for respostas in assistente.base_conhecimento.values()),
+        'ms_consulta': duracao / len(consultas) * 1000,
+    }]
+
+
+def cenario_memoria(tamanhos, consultas=20000, respostas_distintas=0.25):
+    """heap ocupado, bytes por entrada e latência de consulta da memória aprendida: dict contra arena
+
+    as respostas se repetem (respostas_distintas é a fração de textos diferentes), como
+    acontece com variações da mesma pergunta. o arquivo da arena não entra no heap: suas
+    páginas ficam no cache do sistema e são compartilhadas entre processos.
+    """
+    from pitia.armazenamento import ArmazenamentoArena, ArmazenamentoLog
+
+    resultados = []
+    for tamanho in tamanhos:
+        perguntas = list(dict.fromkeys(gerar_perguntas(tamanho * 2, semente=tamanho)))[:tamanho]
+        distintas = max(1, int(tamanho * respostas_distintas))
+        textos = [gerar_texto(3, semente=i) for i in range(distintas)]
+        aleatorio = random.Random(tamanho)
+        amostra = [aleatorio.choice(perguntas) for _ in range(consultas)]
+        with tempfile.TemporaryDirectory() as pasta:
+            backends = (('dict', ArmazenamentoLog(os.path.join(pasta, 'dict.jsonl'))),
+                        ('arena', ArmazenamentoArena(os.path.join(pasta, 'arena.jsonl'))))
+            for _, armazenamento in backends:
+                armazenamento.compactar({pergunta: textos[i % distintas] for i, pergunta in enumerate(perguntas)})
+            for nome, armazenamento in backends:
+                inicio = time.perf_counter()
+                armazenamento.carregar()
+                ms_carga = (time.perf_counter() - inicio) * 1000
+                tracemalloc.start()
+                estado = armazenamento.carregar()
+                heap, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                inicio = time.perf_counter()
+                for pergunta in amostra:
+                    estado[pergunta]
+                us_consulta = (time.perf_counter() - inicio) / consultas * 1e6
+                arquivo = armazenamento.arena.tamanho_bytes() if nome == 'arena' else 0
+                resultados.append({
+                    'backend': nome,
+                    'entradas': len(estado),
+                    'ms_carga': ms_carga,
+                    'mb_heap': heap / (1024 * 1024),
+                    'mb_arquivo': arquivo / (1024 * 1024),
+                    'bytes_entrada': (heap + arquivo) / len(estado),
+                    'us_consulta': us_consulta,
+                })
+                del estado
+    return resultados
+
+
+_PERGUNTAS_COMUNS = 20
+
+
+def _aprender_em_processo(pasta, numero, respostas, compartilhado, barreira, fila):
+    os.chdir(pasta)
+    from pitia import AssistenteAvancado
+    from pitia.armazenamento import ArmazenamentoLog
+
+    # log pequeno para que as compactações aconteçam durante o teste
+    memoria = ArmazenamentoLog("assistant_memory.jsonl", fator_compactacao=1.5, minimo_compactacao=100,
+                               compartilhado=compartilhado)
+    assistente = AssistenteAvancado(offline=True, armazenamento_memoria=memoria, compartilhado=compartilhado,
+                                    intervalo_sincronizacao=0)
+    barreira.wait()
+    inicio = time.perf_counter()
+    for i in range(respostas):
+        assistente.aprender_resposta(f"pergunta {i} do processo {numero}", f"resposta {i} do processo {numero}")
+        # perguntas em comum, corrigidas por todos: as regravações é que levam à compactação
+        assistente.aprender_resposta(f"pergunta comum {i % _PERGUNTAS_COMUNS}", f"resposta do processo {numero}")
+    duracao = time.perf_counter() - inicio
+    barreira.wait()
+    assistente.sincronizar(forcar=True)
+    fila.put((duracao, len(assistente.respostas_aprendidas)))
+    assistente.fechar()
+
+
+def cenario_compartilhado(processos=4, respostas=300):
+    """processos aprendendo ao mesmo tempo no mesmo diretório, com e sem o modo compartilhado
+
+    sem ele, a compactação de um processo reescreve o log só com o que ele sabe e apaga o
+    que os outros gravaram; com ele, nada se perde e todos terminam vendo tudo.
+    """
+    from pitia.armazenamento import ArmazenamentoLog
+
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+    for compartilhado in (False, True):
+        with tempfile.TemporaryDirectory() as pasta:
+            barreira = contexto.Barrier(processos)
+            fila = contexto.Queue()
+            trabalhadores = [contexto.Process(target=_aprender_em_processo,
+                                              args=(pasta, numero, respostas, compartilhado, barreira, fila))
+                             for numero in range(processos)]
+            for trabalhador in trabalhadores:
+                trabalhador.start()
+            medidas = [fila.get() for _ in trabalhadores]
+            for trabalhador in trabalhadores:
+                trabalhador.join()
+            gravadas = len(ArmazenamentoLog(os.path.join(pasta, "assistant_memory.jsonl")).carregar())
+        resultados.append({
+            'modo': 'compartilhado' if compartilhado else 'isolado',
+            'processos': processos,
+            'esperadas': processos * respostas + min(respostas, _PERGUNTAS_COMUNS),
+            'gravadas': gravadas,
+            'vistas_min': min(vistas for _, vistas in medidas),
+            'ms_resposta': max(duracao for duracao, _ in medidas) / (2 * respostas) * 1000,
+        })
+    return resultados
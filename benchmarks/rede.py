@@ -0,0 +1,517 @@
+"""
+   Benchmarks do pipeline assíncrono, do servidor e da rede simulada da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.comum import gerar_pagina, gerar_perguntas, gerar_texto, percentis, variacao
+
+
+def _assistente_simulado(latencia, paginas_distintas, trabalhadores, latencia_pagina=None, paragrafos_html=None,
+                         **opcoes):
+    """assistente com pesquisa e download trocados por esperas, sem acessar a rede
+
+    latencia_pagina(numero), se informada, dá a espera do download de cada página. com
+    paragrafos_html, cada download devolve uma página sintética com esse tamanho, que
+    passa pela extração de verdade.
+    """
+    from pitia import AssistenteAvancado
+
+    class AssistenteSimulado(AssistenteAvancado):
+        downloads = 0
+        cancelados = 0
+        pesquisas = 0
+
+        async def _baixar_duckduckgo(self, consulta, chave_cache):
+            await asyncio.sleep(latencia)
+            return []
+
+        async def _buscar_google(self, consulta, num_resultados, chave_cache):
+            self.pesquisas += 1
+            await asyncio.sleep(latencia)
+            # poucas páginas distintas, para que as consultas do lote se sobreponham
+            numero = sum(map(ord, consulta)) % paginas_distintas
+            resultados = [f"https://exemplo{(numero + i) % paginas_distintas}.com.br/" for i in range(3)]
+            self.cache.guardar(chave_cache, resultados)
+            return resultados
+
+        async def _baixar_e_extrair(self, url, verificar_ssl=True):
+            self.downloads += 1
+            numero = int(url.split('exemplo')[1].split('.')[0])
+            try:
+                await asyncio.sleep(latencia if latencia_pagina is None else latencia_pagina(numero))
+            except asyncio.CancelledError:
+                self.cancelados += 1
+                raise
+            if paragrafos_html:
+                return await self._extrair_html(gerar_pagina(paragrafos_html, semente=numero, navegacao=50,
+                                                             script_kb=16), 'utf-8')
+            return f"Página {numero}", ' '.join(gerar_perguntas(8, semente=numero))
+
+    return AssistenteSimulado(trabalhadores=trabalhadores, **opcoes)
+
+
+def cenario_lote(consultas, concorrencias, latencia=0.05, paginas_distintas=50):
+    """consultas por segundo do responder_lote com rede simulada, conforme a concorrência cresce"""
+    perguntas = gerar_perguntas(consultas, semente=11)
+    # um quarto de repetidas, como numa lista de perguntas frequentes
+    perguntas += perguntas[:consultas // 4]
+    diretorio_original = os.getcwd()
+    resultados = []
+    for concorrencia in concorrencias:
+        with tempfile.TemporaryDirectory() as pasta:
+            os.chdir(pasta)
+            try:
+                assistente = _assistente_simulado(latencia, paginas_distintas, trabalhadores=concorrencia)
+                primeira = None
+                inicio = time.perf_counter()
+                respondidas = 0
+                for _ in assistente.responder_lote(perguntas, concorrencia=concorrencia):
+                    respondidas += 1
+                    if primeira is None:
+                        primeira = time.perf_counter() - inicio
+                duracao = time.perf_counter() - inicio
+                assistente.fechar()
+            finally:
+                os.chdir(diretorio_original)
+        resultados.append({
+            'concorrencia': concorrencia,
+            'consultas_s': respondidas / duracao,
+            'primeira_ms': primeira * 1000,
+            'pesquisas': assistente.pesquisas,
+            'downloads': assistente.downloads,
+        })
+    return resultados
+
+
+def cenario_processos(consultas, processos_lista, paragrafos=300, concorrencia=16, latencia=0.01):
+    """consultas por segundo do responder_lote quando extração e resumo pesam, em threads e em processos"""
+    perguntas = gerar_perguntas(consultas, semente=13)
+    diretorio_original = os.getcwd()
+    resultados = []
+    for processos in processos_lista:
+        with tempfile.TemporaryDirectory() as pasta:
+            os.chdir(pasta)
+            try:
+                # páginas todas distintas: nada vem do cache, toda consulta extrai e resume
+                assistente = _assistente_simulado(latencia, 10 ** 6, trabalhadores=concorrencia,
+                                                  paragrafos_html=paragrafos, processos=processos)
+                if assistente.pool_processos is not None:
+                    assistente.pool_processos.aquecer()
+                inicio = time.perf_counter()
+                respondidas = sum(1 for _ in assistente.responder_lote(perguntas, concorrencia=concorrencia))
+                duracao = time.perf_counter() - inicio
+                assistente.fechar()
+            finally:
+                os.chdir(diretorio_original)
+        resultados.append({
+            'processos': processos,
+            'consultas_s': respondidas / duracao,
+            'paginas_s': assistente.downloads / duracao,
+            'nucleos': os.cpu_count(),
+        })
+    return resultados
+
+
+async def _carga_servidor(servidor, requisicoes, clientes, perguntas):
+    """sobe o servidor numa porta livre e dispara as requisições com 'clientes' conexões simultâneas"""
+    import aiohttp
+    from aiohttp import web
+
+    executor = web.AppRunner(servidor.aplicacao())
+    await executor.setup()
+    site = web.TCPSite(executor, '127.0.0.1', 0)
+    await site.start()
+    porta = executor.addresses[0][1]
+    base = f"http://127.0.0.1:{porta}"
+
+    aleatorio = random.Random(5)
+    fila = asyncio.Queue()
+    for i in range(requisicoes):
+        sorteio = aleatorio.random()
+        if sorteio < 0.8:
+            fila.put_nowait(('/responder', {'consulta': aleatorio.choice(perguntas), 'sessao': f"c{i % 100}"}))
+        elif sorteio < 0.9:
+            fila.put_nowait(('/aprender', {'pergunta': aleatorio.choice(perguntas), 'resposta': f"resposta {i}"}))
+        else:
+            fila.put_nowait(('/corrigir', {'correcao': f"correção: resposta {i}", 'sessao': f"c{i % 100}"}))
+
+    latencias = []
+    erros = 0
+
+    async def cliente(sessao_http):
+        nonlocal erros
+        while not fila.empty():
+            caminho, corpo = fila.get_nowait()
+            inicio = time.perf_counter()
+            async with sessao_http.post(base + caminho, json=corpo) as resposta:
+                await resposta.read()
+                if resposta.status != 200:
+                    erros += 1
+            latencias.append(time.perf_counter() - inicio)
+
+    conector = aiohttp.TCPConnector(limit=clientes)
+    try:
+        async with aiohttp.ClientSession(connector=conector) as sessao_http:
+            inicio = time.perf_counter()
+            await asyncio.gather(*(cliente(sessao_http) for _ in range(clientes)))
+            duracao = time.perf_counter() - inicio
+    finally:
+        await executor.cleanup()
+    return requisicoes / duracao, erros, latencias
+
+
+def cenario_servidor(requisicoes, clientes_lista, latencia=0.05):
+    """vazão e latência do modo servidor com busca simulada, conforme o número de clientes cresce"""
+    from pitia.servidor import ServidorPitia, negar_variacoes
+
+    perguntas = gerar_perguntas(max(50, requisicoes // 4), semente=13)
+    diretorio_original = os.getcwd()
+    resultados = []
+    for clientes in clientes_lista:
+        with tempfile.TemporaryDirectory() as pasta:
+            os.chdir(pasta)
+            try:
+                assistente = _assistente_simulado(latencia, 50, trabalhadores=max(5, clientes),
+                                                  confirmar_variacao=negar_variacoes)
+                servidor = ServidorPitia(assistente, max_simultaneas=max(1, clientes))
+                requisicoes_s, erros, latencias = asyncio.run(
+                    _carga_servidor(servidor, requisicoes, clientes, perguntas))
+            finally:
+                os.chdir(diretorio_original)
+        resultados.append({'clientes': clientes, 'requisicoes_s': requisicoes_s, 'erros': erros,
+                           **percentis(latencias)})
+    return resultados
+
+
+def cenario_rastreio(repeticoes=200000):
+    """custo por etapa instrumentada com o rastreio desligado, ligado e ligado com callback"""
+    from pitia.metricas import Rastreador
+
+    def medir(rastreador):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            with rastreador.span('etapa') as span:
+                span.definir(origem='memória')
+            rastreador.contar('cache', tipo='pagina', resultado='acerto')
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        pass
+    vazio = time.perf_counter() - inicio
+
+    registros = []
+    resultados = []
+    for nome, rastreador in (('desligado', Rastreador(ativo=False)),
+                             ('ligado', Rastreador()),
+                             ('callback', Rastreador(ao_finalizar=registros.append))):
+        resultados.append({'modo': nome, 'ns_por_etapa': (medir(rastreador) - vazio) / repeticoes * 1e9})
+    return resultados
+
+
+def cenario_prazo(prazos, consultas=20, latencia=0.05, lenta=3.0):
+    """latência por consulta quando uma das páginas de cada pesquisa demora, com e sem prazo
+
+    prazo 0 significa sem prazo.
+    """
+    perguntas = gerar_perguntas(consultas, semente=17)
+    diretorio_original = os.getcwd()
+    resultados = []
+    for prazo in prazos:
+        with tempfile.TemporaryDirectory() as pasta:
+            os.chdir(pasta)
+            try:
+                # cada pesquisa traz três páginas seguidas, e uma em cada três é lenta; com muitas
+                # páginas distintas nenhuma consulta aproveita o download de outra pelo cache
+                assistente = _assistente_simulado(
+                    latencia, 100000, trabalhadores=8,
+                    latencia_pagina=lambda numero: lenta if numero % 3 == 0 else latencia,
+                    prazo_consulta=prazo or None, confirmar_variacao=lambda pergunta, similar: False)
+                amostras = []
+                for pergunta in perguntas:
+                    inicio = time.perf_counter()
+                    assistente.gerar_resposta(pergunta)
+                    amostras.append(time.perf_counter() - inicio)
+                assistente.fechar()
+            finally:
+                os.chdir(diretorio_original)
+        resultados.append({'prazo_s': prazo or '-', **percentis(amostras),
+                           'downloads': assistente.downloads, 'cancelados': assistente.cancelados})
+    return resultados
+
+
+def cenario_provedores(esperas, consultas=30, latencia=0.05):
+    """latência por consulta e chamadas aos provedores em modo sequencial, com espera e em corrida
+
+    os provedores são locais: a base de conhecimento responde um terço das consultas, o
+    google com filtro de sites metade e o google sem filtro todas. espera negativa é o
+    modo sequencial.
+    """
+    from pitia.provedores import ProvedorFixo
+
+    def parte(consulta, divisor):
+        return sum(map(ord, consulta)) % divisor == 0
+
+    def links(consulta):
+        numero = sum(map(ord, consulta)) * 3
+        return [f"https://exemplo{numero + i}.com.br/" for i in range(3)]
+
+    perguntas = gerar_perguntas(consultas, semente=23)
+    diretorio_original = os.getcwd()
+    resultados = []
+    for espera in esperas:
+        provedores = [
+            ProvedorFixo('base_conhecimento', lambda c: "resposta pronta" if parte(c, 3) else None, 0.4, tipo='texto'),
+            ProvedorFixo('google_sites', lambda c: links(c) if parte(c, 2) else [], 0.3),
+            ProvedorFixo('google', links, 0.3),
+        ]
+        with tempfile.TemporaryDirectory() as pasta:
+            os.chdir(pasta)
+            try:
+                assistente = _assistente_simulado(
+                    latencia, 100000, trabalhadores=8, provedores=provedores,
+                    espera_provedores=None if espera < 0 else espera,
+                    confirmar_variacao=lambda pergunta, similar: False)
+                amostras = []
+                for pergunta in perguntas:
+                    inicio = time.perf_counter()
+                    assistente.gerar_resposta(pergunta)
+                    amostras.append(time.perf_counter() - inicio)
+                assistente.fechar()
+            finally:
+                os.chdir(diretorio_original)
+        resultados.append({'espera_s': 'sequencial' if espera < 0 else espera, **percentis(amostras),
+                           'chamadas': sum(p.chamadas for p in provedores),
+                           'cancelados': sum(p.cancelados for p in provedores)})
+    return resultados
+
+
+async def _carga_hosts(cliente, requisicoes, concorrencia, por_segundo_servidor):
+    """servidor local que responde 429 com Retry-After acima de por_segundo_servidor"""
+    from aiohttp import web
+
+    inicios = []
+    recusas = 0
+
+    async def pagina(requisicao):
+        nonlocal recusas
+        agora = time.monotonic()
+        while inicios and agora - inicios[0] > 1.0:
+            inicios.pop(0)
+        if len(inicios) >= por_segundo_servidor:
+            recusas += 1
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        inicios.append(agora)
+        return web.Response(body=b'<p>' + b'conteudo ' * 200 + b'</p>', content_type='text/html')
+
+    aplicacao = web.Application()
+    aplicacao.add_routes([web.get('/{numero}', pagina)])
+    executor = web.AppRunner(aplicacao, access_log=None)
+    await executor.setup()
+    site = web.TCPSite(executor, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{executor.addresses[0][1]}"
+
+    fila = asyncio.Queue()
+    for numero in range(requisicoes):
+        fila.put_nowait(f"{base}/{numero}")
+    falhas = 0
+
+    async def trabalhador():
+        nonlocal falhas
+        while not fila.empty():
+            url = fila.get_nowait()
+            try:
+                await cliente.obter(url)
+            except Exception:
+                falhas += 1
+
+    try:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+        estatisticas = cliente.estatisticas()
+        await cliente.fechar()
+    finally:
+        await executor.cleanup()
+    return duracao, recusas, falhas, estatisticas
+
+
+def cenario_hosts(requisicoes=300, concorrencia=32, por_segundo=50):
+    """downloads contra um host que limita a taxa, sem e com limites de cortesia no agendador"""
+    from pitia.rede import AgendadorHosts, ClienteHttp
+
+    configuracoes = [
+        ('sem limites', {}),
+        ('limite do host', {'127.0.0.1': {'concorrencia': 8, 'por_segundo': por_segundo}}),
+    ]
+    resultados = []
+    for nome, limites in configuracoes:
+        cliente = ClienteHttp(tentativas=5, fator_espera=0.1, limite_por_host=concorrencia,
+                              agendador=AgendadorHosts(limites, concorrencia_padrao=concorrencia))
+        duracao, recusas, falhas, estatisticas = asyncio.run(
+            _carga_hosts(cliente, requisicoes, concorrencia, por_segundo))
+        resultados.append({'agendador': nome, 'duracao_s': duracao, 'respostas_429': recusas, 'falhas': falhas,
+                           'pausas': estatisticas['pausas'], 'conexoes_novas': estatisticas['conexoes_novas'],
+                           'taxa_reuso': estatisticas['taxa_reuso']})
+    return resultados
+
+
+async def _passadas_validacao(assistente, paginas, passadas):
+    """serve páginas com ETag e as baixa várias vezes, esvaziando o cache comum entre as passadas"""
+    from aiohttp import web
+
+    corpos = [gerar_pagina(500, semente=i) for i in range(paginas)]
+    enviados = 0
+
+    async def pagina(requisicao):
+        nonlocal enviados
+        numero = int(requisicao.match_info['numero'])
+        etag = f'"v{numero}"'
+        if requisicao.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        enviados += len(corpos[numero])
+        return web.Response(body=corpos[numero], content_type='text/html', headers={'ETag': etag})
+
+    aplicacao = web.Application()
+    aplicacao.add_routes([web.get('/{numero}', pagina)])
+    executor = web.AppRunner(aplicacao, access_log=None)
+    await executor.setup()
+    site = web.TCPSite(executor, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{executor.addresses[0][1]}"
+
+    resultados = []
+    try:
+        for passada in range(passadas):
+            # vence o cache comum das páginas; validadores e extrações validadas continuam
+            for numero in range(paginas):
+                assistente.cache.remover(f"pagina_{base}/{numero}")
+            enviados = 0
+            inicio = time.perf_counter()
+            for numero in range(paginas):
+                await assistente.obter_conteudo_pagina_async(f"{base}/{numero}")
+            duracao = time.perf_counter() - inicio
+            estatisticas = assistente.cache.estatisticas()
+            resultados.append({'passada': 'fria' if passada == 0 else 'revalidada', 'duracao_s': duracao,
+                               'kb_recebidos': enviados / 1024,
+                               'kb_economizados': estatisticas['bytes_economizados'] / 1024,
+                               'extracao_evitada_ms': estatisticas['extracao_evitada_s'] * 1000})
+        await assistente.fechar_async()
+    finally:
+        await executor.cleanup()
+    return resultados
+
+
+def cenario_validacao(paginas=50):
+    """páginas baixadas de novo depois que o cache vence: download completo contra GET condicional com 304"""
+    from pitia import AssistenteAvancado
+
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            assistente = AssistenteAvancado(arquivo_cache='cache.sqlite', confirmar_variacao=lambda p, s: False)
+            resultados = asyncio.run(_passadas_validacao(assistente, paginas, 2))
+            assistente.fechar()
+            assistente.cache.fechar()
+        finally:
+            os.chdir(diretorio_original)
+    return resultados
+
+
+async def _ingestao_local(assistente, paginas):
+    """serve um índice de sitemaps e páginas html locais, ingere em duas vezes (com retomada) e depois consulta"""
+    from aiohttp import web
+    from pitia.ingestao import Ingestao
+
+    perguntas = gerar_perguntas(paginas, semente=23)
+    servidas = 0
+
+    async def indice(requisicao):
+        corpo = ''.join(f"<sitemap><loc>{base}/sitemap-{parte}.xml</loc></sitemap>" for parte in range(2))
+        return web.Response(text=f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                                 f'{corpo}</sitemapindex>', content_type='application/xml')
+
+    async def sitemap(requisicao):
+        parte = int(requisicao.match_info['parte'])
+        locais = [f"{base}/pagina/{numero}" for numero in range(parte, paginas, 2)]
+        # um link de fora dos domínios confiáveis, que a ingestão deve ignorar
+        locais.append(f"http://localhost:{porta}/pagina/0")
+        corpo = ''.join(f"<url><loc>{local}</loc></url>" for local in locais)
+        return web.Response(text=f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                                 f'{corpo}</urlset>', content_type='application/xml')
+
+    async def pagina(requisicao):
+        nonlocal servidas
+        servidas += 1
+        numero = int(requisicao.match_info['numero'])
+        corpo = (f"<html><head><title>{perguntas[numero]} - Enciclopédia local</title></head><body>"
+                 f"<div id=\"content\"><p>{gerar_texto(40, semente=numero)}</p></div></body></html>")
+        return web.Response(text=corpo, content_type='text/html')
+
+    aplicacao = web.Application()
+    aplicacao.add_routes([web.get('/sitemap.xml', indice), web.get('/sitemap-{parte}.xml', sitemap),
+                          web.get('/pagina/{numero}', pagina)])
+    executor = web.AppRunner(aplicacao, access_log=None)
+    await executor.setup()
+    site = web.TCPSite(executor, '127.0.0.1', 0)
+    await site.start()
+    porta = executor.addresses[0][1]
+    base = f"http://127.0.0.1:{porta}"
+    assistente.dominios_confiaveis['127.0.0.1'] = 3
+
+    resultados = []
+    try:
+        # a primeira passada "cai" na metade; a segunda retoma pelo checkpoint
+        for passada, limite in (('interrompida', paginas // 2), ('retomada', None)):
+            servidas = 0
+            ingestao = Ingestao(assistente, 'ingestao.jsonl')
+            inicio = time.perf_counter()
+            await ingestao.ingerir_sitemap_async(f"{base}/sitemap.xml", limite)
+            duracao = time.perf_counter() - inicio
+            resultados.append({'etapa': passada, 'duracao_s': duracao, 'baixadas': servidas,
+                               'puladas': ingestao.contagem['pulados'], 'ignoradas': ingestao.contagem['ignorados'],
+                               'memoria': len(assistente.respostas_aprendidas)})
+
+        servidas = 0
+        aleatorio = random.Random(29)
+        amostras = []
+        da_memoria = 0
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            resposta = await assistente.gerar_resposta_async(variacao(pergunta, aleatorio))
+            amostras.append(time.perf_counter() - inicio)
+            da_memoria += resposta['source'] == 'memória'
+        resultados.append({'etapa': 'consultas', 'duracao_s': sum(amostras), 'baixadas': servidas,
+                           'puladas': '-', 'ignoradas': '-', 'memoria': f"{da_memoria}/{len(perguntas)}"})
+        await assistente.fechar_async()
+    finally:
+        await executor.cleanup()
+    return resultados
+
+
+def cenario_ingestao(paginas=100):
+    """ingestão de um sitemap local com retomada pelo checkpoint, e as consultas respondidas da memória depois"""
+    from pitia import AssistenteAvancado
+    from pitia.provedores import ProvedorFixo
+
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            # sem provedores de verdade: o que não estiver na memória fica sem resposta, sem ir à rede
+            assistente = AssistenteAvancado(arquivo_cache='cache.sqlite', confirmar_variacao=lambda p, s: False,
+                                            provedores=[ProvedorFixo('vazio', None)])
+            resultados = asyncio.run(_ingestao_local(assistente, paginas))
+            assistente.fechar()
+            assistente.cache.fechar()
+        finally:
+            os.chdir(diretorio_original)
+    return resultados
@@ -0,0 +1,266 @@
+"""
+   Suíte de ponta a ponta da Pítia sobre fixtures gravadas, com relatório comparável entre execuções.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import base64
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.comum import gerar_pagina, gerar_pagina_duckduckgo, gerar_perguntas, gerar_texto, percentis, variacao
+
+
+# hosts das páginas sintéticas: os três primeiros são de domínios confiáveis do assistente
+_HOSTS_SUITE = ('pt.wikipedia.org', 'www.gov.br', 'www.bbc.com', 'exemplo.com.br', 'blog.exemplo.net')
+
+
+def gerar_fixtures(consultas, dominios_confiaveis, paginas=40, paragrafos=120, sem_duckduckgo=0.5, semente=1):
+    """fixtures sintéticas: resultados do duckduckgo, listas do google e as páginas de cada lista
+
+    uma fração sem_duckduckgo das consultas recebe uma página do duckduckgo sem resultados,
+    e a resposta sai das páginas do google: download, extração, ranking e resumo. as listas
+    do google sorteiam de um mesmo conjunto de páginas, como consultas parecidas fazem.
+    """
+    from benchmarks.fixtures import Fixtures
+
+    fixtures = Fixtures()
+    aleatorio = random.Random(semente)
+    cabecalhos = [('Content-Type', 'text/html; charset=utf-8')]
+    urls = [f"https://{_HOSTS_SUITE[i % len(_HOSTS_SUITE)]}/artigo{i}" for i in range(paginas)]
+    confiaveis = [url for i, url in enumerate(urls) if i % len(_HOSTS_SUITE) < 3]
+    for i, url in enumerate(urls):
+        fixtures.guardar_http(url, 200, cabecalhos, gerar_pagina(paragrafos, semente=i, navegacao=50, script_kb=16),
+                              'utf-8', aleatorio.uniform(0.05, 0.3))
+    # a mesma consulta que o ProvedorGoogle(filtrar_sites=True) manda
+    filtros_site = " OR ".join(f"site:{dominio}" for dominio in dominios_confiaveis)
+    for numero, consulta in enumerate(consultas):
+        resultados = 0 if aleatorio.random() < sem_duckduckgo else 3
+        fixtures.guardar_http(f"https://html.duckduckgo.com/html/?q={consulta.replace(' ', '+')}", 200, cabecalhos,
+                              gerar_pagina_duckduckgo(resultados, numero, lambda i: gerar_texto(2, numero * 10 + i)),
+                              'utf-8', aleatorio.uniform(0.1, 0.5))
+        fixtures.google[f"{consulta} ({filtros_site})"] = aleatorio.sample(confiaveis, 3)
+        fixtures.google[consulta] = aleatorio.sample(urls, 5)
+    return fixtures
+
+
+def _usar_recursos_locais(assistente, avisar=True):
+    """stemmer e stopwords do que houver no nltk local; devolve os recursos ausentes
+
+    o benchmark roda sempre offline, e preparar_nltk falharia se faltasse qualquer recurso.
+    """
+    from pitia.recursos import recursos_ausentes
+
+    ausentes = recursos_ausentes()
+    if ausentes:
+        if avisar:
+            print(f"recursos do nltk ausentes ({', '.join(ausentes)}): usando só os que existem")
+        if 'rslp' in ausentes:
+            class Stemmer:
+                def stem(self, palavra):
+                    return palavra[:6]
+            assistente.stemmer = Stemmer()
+        else:
+            from nltk.stem import RSLPStemmer
+            assistente.stemmer = RSLPStemmer()
+        if 'stopwords' in ausentes:
+            assistente.palavras_parada = set()
+        else:
+            from nltk.corpus import stopwords
+            assistente.palavras_parada = set(stopwords.words('portuguese') + stopwords.words('english'))
+        if 'punkt' in ausentes and assistente.backend_resumo == 'lsa':
+            from pitia.resumo import obter_resumidor
+            assistente.resumidor = obter_resumidor('lsa_rapido')  # o tokenizador do sumy precisa do punkt
+    return ausentes
+
+
+def _medir_etapa(etapa, tamanho, funcao, entradas, reserva):
+    """latência e vazão de funcao(entrada) em entradas; pico de memória numa passada à parte, em reserva
+
+    a passada com tracemalloc é separada porque ele deixa tudo mais lento, e usa entradas
+    ainda não vistas para não medir só o que já está em cache.
+    """
+    amostras = []
+    inicio_total = time.perf_counter()
+    for entrada in entradas:
+        inicio = time.perf_counter()
+        funcao(entrada)
+        amostras.append(time.perf_counter() - inicio)
+    duracao = time.perf_counter() - inicio_total
+    tracemalloc.start()
+    for entrada in reserva:
+        funcao(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'etapa': etapa, 'tamanho': tamanho, 'amostras': len(amostras), **percentis(amostras),
+            'por_segundo': len(amostras) / duracao if duracao else 0.0, 'mb_pico': pico / (1024 * 1024)}
+
+
+def _ambiente(ausentes, fixtures):
+    """o que é preciso para saber se dois resultados são comparáveis"""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=pasta, capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+        alterado = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=pasta,
+                                       capture_output=True, text=True, timeout=10).stdout.strip())
+    except (OSError, subprocess.SubprocessError):
+        commit, alterado = None, None
+    return {
+        'commit': commit,
+        'alterado': alterado,
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'recursos_ausentes': ausentes,
+        'fixtures': fixtures.estatisticas(),
+    }
+
+
+def cenario_suite(tamanhos, consultas=200, arquivo_fixtures=None, escala_latencia=0.0, memoria_compacta=False,
+                  reserva=20):
+    """suíte de ponta a ponta, sem rede: a memória com cada tamanho e o pipeline inteiro sobre fixtures
+
+    para cada tamanho, a memória é gravada em disco antes e carregada pelo assistente, e
+    são medidos: carga, busca de pergunta similar (variações das aprendidas e perguntas
+    novas, metade cada), aprendizado, gerar_resposta respondida da memória e gerar_resposta
+    que vai às fixtures. extração e resumo não dependem da memória e são medidos uma vez.
+    sem arquivo_fixtures, as fixtures são sintéticas (gerar_fixtures). devolve (ambiente, resultados).
+    """
+    from pitia import AssistenteAvancado
+    from pitia.armazenamento import ArmazenamentoArena, ArmazenamentoLog
+    from benchmarks.fixtures import AssistenteFixtures, Fixtures
+
+    if arquivo_fixtures:
+        fixtures = Fixtures.carregar(arquivo_fixtures)
+        perguntas_web = [consulta for consulta in fixtures.google if '(site:' not in consulta]
+    else:
+        perguntas_web = gerar_perguntas(consultas + reserva, semente=99)
+        fixtures = gerar_fixtures(perguntas_web, AssistenteAvancado(offline=True).dominios_confiaveis)
+    web, web_reserva = perguntas_web[:-reserva], perguntas_web[-reserva:]
+    aleatorio = random.Random(11)
+    resultados = []
+    ausentes = []
+
+    def novo_assistente():
+        nonlocal ausentes
+        assistente = AssistenteFixtures(fixtures, escala_latencia=escala_latencia, offline=True,
+                                        confirmar_variacao=lambda p, s: False, memoria_compacta=memoria_compacta)
+        ausentes = _usar_recursos_locais(assistente, avisar=not resultados)
+        return assistente
+
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            assistente = novo_assistente()
+            corpos = [(base64.b64decode(registro['corpo']), registro['codificacao'])
+                      for url, registro in fixtures.http.items()
+                      if 'duckduckgo' not in url and registro['status'] < 400]
+            resultados.append(_medir_etapa('extracao', '-', lambda item: assistente._extrair_em_thread(*item),
+                                           corpos[:consultas], corpos[-reserva:]))
+            textos = [gerar_texto(40, semente=i) for i in range(consultas + reserva)]
+            resultados.append(_medir_etapa('resumo', '-', assistente.resumir_texto,
+                                           textos[:consultas], textos[consultas:]))
+            assistente.fechar()
+
+            for tamanho in tamanhos:
+                perguntas = list(dict.fromkeys(gerar_perguntas(tamanho * 2, semente=tamanho)))[:tamanho]
+                respostas = [gerar_texto(3, semente=i) for i in range(min(tamanho, 1000))]
+                classe = ArmazenamentoArena if memoria_compacta else ArmazenamentoLog
+                for nome in ("assistant_memory", "knowledge"):
+                    for arquivo in os.listdir(pasta):
+                        if arquivo.startswith(nome):
+                            os.remove(arquivo)
+                classe("assistant_memory.jsonl").compactar(
+                    {pergunta: respostas[i % len(respostas)] for i, pergunta in enumerate(perguntas)})
+
+                inicio = time.perf_counter()
+                assistente = novo_assistente()
+                carga = time.perf_counter() - inicio
+                resultados.append({'etapa': 'carga', 'tamanho': tamanho, 'amostras': 1, **percentis([carga]),
+                                   'por_segundo': 1 / carga, 'mb_pico': 0.0})
+
+                variacoes = [variacao(aleatorio.choice(perguntas), aleatorio) for _ in range(consultas + reserva)]
+                novas = gerar_perguntas(consultas + reserva, semente=tamanho + 1)
+                mistas = [pergunta for par in zip(variacoes, novas) for pergunta in par]
+                resultados.append(_medir_etapa('similaridade', tamanho, assistente._encontrar_pergunta_similar,
+                                               mistas[:consultas], mistas[-reserva:]))
+                pares = [(f"{pergunta} de novo", respostas[i % len(respostas)]) for i, pergunta in enumerate(novas)]
+                resultados.append(_medir_etapa('aprendizado', tamanho, lambda par: assistente.aprender_resposta(*par),
+                                               pares[:consultas], pares[consultas:]))
+                resultados.append(_medir_etapa('resposta_memoria', tamanho, assistente.gerar_resposta,
+                                               variacoes[:consultas], variacoes[consultas:]))
+                resultados.append(_medir_etapa('resposta_web', tamanho, assistente.gerar_resposta, web, web_reserva))
+                assistente.fechar()
+                assistente.cache.fechar()
+        finally:
+            os.chdir(diretorio_original)
+    return _ambiente(ausentes, fixtures), resultados
+
+
+def gravar_fixtures(consultas, caminho):
+    """faz as consultas na rede de verdade e grava duckduckgo, google e páginas em caminho
+
+    as três etapas são feitas para toda consulta, mesmo quando o duckduckgo já bastaria,
+    para que a suíte tenha as páginas se o caminho das respostas mudar.
+    """
+    from benchmarks.fixtures import AssistenteFixtures, Fixtures
+    from pitia.provedores import ProvedorGoogle
+
+    fixtures = Fixtures.carregar(caminho) if os.path.exists(caminho) else Fixtures()
+    diretorio_original = os.getcwd()
+    caminho = os.path.abspath(caminho)
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        try:
+            assistente = AssistenteFixtures(fixtures, gravar=True, confirmar_variacao=lambda p, s: False)
+            google = (ProvedorGoogle(assistente, filtrar_sites=True), ProvedorGoogle(assistente))
+
+            async def gravar(consulta):
+                await assistente.pesquisar_duckduckgo_async(consulta)
+                for provedor in google:
+                    links = await provedor.buscar(consulta)
+                    if links:
+                        await assistente._processar_resultados_paralelo_async(consulta, links)
+
+            for consulta in consultas:
+                assistente._laco.executar(gravar(consulta))
+                print(f"Gravada: {consulta}")
+            assistente.fechar()
+        finally:
+            os.chdir(diretorio_original)
+    fixtures.salvar(caminho)
+    return fixtures.estatisticas()
+
+
+# métricas comparadas e o sentido em que pioram; variações abaixo do mínimo absoluto são ruído
+_METRICAS_COMPARADAS = {'p50': (1, 0.05), 'p90': (1, 0.05), 'por_segundo': (-1, 0.0), 'mb_pico': (1, 0.5)}
+
+
+def comparar_resultados(base, novo, tolerancia=0.1):
+    """variação de cada métrica entre dois relatórios da suíte; regressao marca o que piorou além da tolerância"""
+    anteriores = {(linha['etapa'], linha['tamanho']): linha for linha in base['resultados']}
+    comparacao = []
+    for linha in novo['resultados']:
+        anterior = anteriores.get((linha['etapa'], linha['tamanho']))
+        if anterior is None:
+            continue
+        for metrica, (sentido, minimo) in _METRICAS_COMPARADAS.items():
+            antes, depois = anterior[metrica], linha[metrica]
+            variacao = (depois - antes) / antes if antes else 0.0
+            comparacao.append({
+                'etapa': linha['etapa'],
+                'tamanho': linha['tamanho'],
+                'metrica': metrica,
+                'base': antes,
+                'novo': depois,
+                'variacao': variacao,
+                'regressao': sentido * variacao > tolerancia and abs(depois - antes) > minimo,
+            })
+    return comparacao
@@ -0,0 +1,309 @@
+"""
+   Benchmarks de extração de páginas, limpeza, resumo e ranking da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.comum import gerar_artigo, gerar_pagina, gerar_pagina_duckduckgo, gerar_perguntas, gerar_texto
+
+
+def carregar_corpus(diretorio=None):
+    """lê páginas salvas (arquivos ddg*.html são resultados do duckduckgo) ou gera um corpus sintético"""
+    if diretorio:
+        corpus = []
+        for nome in sorted(os.listdir(diretorio)):
+            if nome.endswith(('.html', '.htm')):
+                with open(os.path.join(diretorio, nome), 'rb') as f:
+                    tipo = 'duckduckgo' if nome.startswith('ddg') else 'artigo'
+                    corpus.append((nome, tipo, f.read()))
+        return corpus
+    corpus = [(f"ddg_{i}", 'duckduckgo', gerar_pagina_duckduckgo(semente=i)) for i in range(5)]
+    corpus += [(f"artigo_{n}_{i}", 'artigo', gerar_pagina(n, semente=i)) for n in (100, 500, 2000) for i in range(3)]
+    return corpus
+
+
+def _rodar_backend(nome, corpus, repeticoes, fila):
+    """roda num processo separado para que o pico de RSS seja só deste backend"""
+    from pitia.extracao import BACKENDS_HTML
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    def pico_rss():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float('nan')
+
+    backend = BACKENDS_HTML[nome]()
+    rss_base = pico_rss()
+    saidas = {}
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for nome_pagina, tipo, corpo in corpus:
+            if tipo == 'duckduckgo':
+                saidas[nome_pagina] = backend.interpretar_duckduckgo(corpo)
+            else:
+                saidas[nome_pagina] = backend.extrair(corpo)
+    duracao = time.perf_counter() - inicio
+    fila.put((len(corpus) * repeticoes / duracao, rss_base, pico_rss(), saidas))
+
+
+def cenario_backends(corpus, repeticoes=3):
+    """páginas por segundo e pico de RSS de cada backend html, conferindo se a saída é a mesma"""
+    from pitia.extracao import BACKENDS_HTML
+
+    contexto = multiprocessing.get_context('spawn')
+    referencia = None
+    resultados = []
+    for nome in ['html.parser'] + [n for n in BACKENDS_HTML if n != 'html.parser']:
+        try:
+            BACKENDS_HTML[nome]()
+        except ImportError:
+            print(f"backend {nome} não instalado, pulando")
+            continue
+        fila = contexto.Queue()
+        processo = contexto.Process(target=_rodar_backend, args=(nome, corpus, repeticoes, fila))
+        processo.start()
+        paginas_s, rss_base, rss, saidas = fila.get()
+        processo.join()
+        if referencia is None:
+            referencia = saidas
+        iguais = sum(saidas[p] == referencia[p] for p in saidas)
+        resultados.append({
+            'backend': nome,
+            'paginas_s': paginas_s,
+            'rss_base_mb': rss_base,
+            'pico_rss_mb': rss,
+            'iguais': f"{iguais}/{len(saidas)}",
+        })
+    return resultados
+
+
+def _medir(funcao, *args, repeticoes=3):
+    """mede tempo de cpu médio e pico de memória alocada por uma chamada"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.process_time()
+        resultado = funcao(*args)
+        tempos.append(time.process_time() - inicio)
+    tracemalloc.start()
+    funcao(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, statistics.mean(tempos) * 1000, pico / (1024 * 1024)
+
+
+def cenario_extracao(paginas):
+    """compara a extração com árvore completa e a incremental em páginas grandes"""
+    from pitia.extracao import extrair_conteudo, extrair_conteudo_incremental
+
+    resultados = []
+    for nome, corpo in paginas:
+        completo, ms_completo, mb_completo = _medir(extrair_conteudo, corpo)
+        incremental, ms_incremental, mb_incremental = _medir(extrair_conteudo_incremental, corpo)
+        resultados.append({
+            'pagina': nome,
+            'kb': len(corpo) // 1024,
+            'ms_completo': ms_completo,
+            'ms_incremental': ms_incremental,
+            'mb_completo': mb_completo,
+            'mb_incremental': mb_incremental,
+            'mesmo_texto': completo == incremental,
+        })
+    return resultados
+
+
+def _limpeza_antiga(texto, regras):
+    """limpeza como era antes do normalizador: uma passada de regex por regra"""
+    texto = re.sub(r'\[\d+\]|\([^)]*\)', '', texto)
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    for padrao, substituicao in regras.items():
+        texto = re.sub(padrao, substituicao, texto, flags=re.IGNORECASE)
+    return texto
+
+
+def cenario_limpeza(artigos, paragrafos=60):
+    """compara a limpeza antiga (várias passadas por bloco) com o normalizador de passada única"""
+    from pitia.texto import NormalizadorTexto
+
+    normalizador = NormalizadorTexto()
+    documentos = [gerar_artigo(paragrafos, semente=i) for i in range(artigos)]
+    caracteres = sum(len(b) for blocos in documentos for b in blocos)
+
+    def antiga():
+        return [[_limpeza_antiga(b, normalizador.regras) for b in blocos] for blocos in documentos]
+
+    def por_bloco():
+        return [[normalizador.normalizar(b) for b in blocos] for blocos in documentos]
+
+    def por_documento():
+        return [normalizador.normalizar_blocos(blocos) for blocos in documentos]
+
+    referencia = None
+    resultados = []
+    for nome, funcao in (('antiga', antiga), ('por_bloco', por_bloco), ('por_documento', por_documento)):
+        saida, ms, mb = _medir(funcao)
+        if referencia is None:
+            referencia = saida
+        resultados.append({
+            'metodo': nome,
+            'ms': ms,
+            'mb_s': caracteres / (1024 * 1024) / (ms / 1000),
+            'pico_mb': mb,
+            'mesma_saida': saida == referencia,
+        })
+    return resultados
+
+
+def cenario_resumo(documentos=200, frases=40, num_frases=2):
+    """ms por documento de cada resumidor e quantas frases do resumo coincidem com as do LSA do sumy"""
+    import warnings
+    from pitia.recursos import recursos_ausentes
+    from pitia.resumo import RESUMIDORES, ResumidorLsa
+    from pitia.texto import TokenizadorRegex, dividir_frases
+
+    textos = [gerar_texto(frases, semente=i) for i in range(documentos)]
+    if recursos_ausentes(['punkt_tab']):
+        print("punkt do nltk ausente: o LSA de referência usa o tokenizador por regex")
+        referencia = ResumidorLsa(tokenizador=TokenizadorRegex(), memoria=0)
+    else:
+        referencia = ResumidorLsa(memoria=0)
+
+    with warnings.catch_warnings():
+        # o sumy avisa quando há menos palavras que frases
+        warnings.simplefilter('ignore')
+        esperados = [set(dividir_frases(referencia.resumir(texto, num_frases))) for texto in textos]
+        resultados = []
+        for nome, classe in RESUMIDORES.items():
+            resumidor = referencia if nome == 'lsa' else classe(memoria=0)
+            inicio = time.perf_counter()
+            resumos = [resumidor.resumir(texto, num_frases) for texto in textos]
+            duracao = time.perf_counter() - inicio
+            sobreposicao = statistics.mean(len(set(dividir_frases(resumo)) & esperado) / num_frases
+                                           for resumo, esperado in zip(resumos, esperados))
+
+            memorizado = classe(tokenizador=referencia.tokenizador) if nome == 'lsa' else classe()
+            for texto in textos:
+                memorizado.resumir(texto, num_frases)
+            inicio = time.perf_counter()
+            for texto in textos:
+                memorizado.resumir(texto, num_frases)
+            repetido = time.perf_counter() - inicio
+            resultados.append({'resumidor': nome, 'ms_documento': duracao / documentos * 1000,
+                               'sobreposicao_lsa': sobreposicao,
+                               'ms_repetido': repetido / documentos * 1000})
+    return resultados
+
+
+def cenario_analise(consultas=2000, perguntas=500):
+    """conferência de radicais do _encontrar_perguntas_similares: stem a cada chamada contra o LRU com conjuntos pré-calculados"""
+    from pitia.recursos import recursos_ausentes
+    from pitia.texto import AnalisadorTexto
+
+    if recursos_ausentes(['rslp']):
+        print("rslp do nltk ausente: usando um stemmer que só corta o fim das palavras")
+
+        class Stemmer:
+            def stem(self, palavra):
+                return palavra[:6]
+        stemmer = Stemmer()
+    else:
+        from nltk.stem import RSLPStemmer
+        stemmer = RSLPStemmer()
+
+    armazenadas = gerar_perguntas(perguntas)
+    aleatorio = random.Random(3)
+    pares = [(aleatorio.choice(armazenadas), aleatorio.choice(armazenadas)) for _ in range(consultas)]
+
+    def antiga():
+        for consulta, pergunta in pares:
+            palavras_consulta = {stemmer.stem(w) for w in consulta.lower().split() if len(w) > 3}
+            palavras_armazenadas = {stemmer.stem(w) for w in pergunta.lower().split() if len(w) > 3}
+            palavras_consulta & palavras_armazenadas
+
+    def memorizada():
+        analisador = AnalisadorTexto(lambda: stemmer)
+        radicais_perguntas = {}
+        for consulta, pergunta in pares:
+            palavras_consulta = analisador.radicais(consulta)
+            palavras_armazenadas = radicais_perguntas.get(pergunta)
+            if palavras_armazenadas is None:
+                palavras_armazenadas = radicais_perguntas[pergunta] = analisador.radicais(pergunta)
+            palavras_consulta & palavras_armazenadas
+        return analisador.estatisticas()
+
+    resultados = []
+    for nome, funcao in (('stem_por_chamada', antiga), ('memorizada', memorizada)):
+        inicio = time.perf_counter()
+        estatisticas = funcao() or {}
+        duracao = time.perf_counter() - inicio
+        resultados.append({'versao': nome, 'us_consulta': duracao / consultas * 1e6,
+                           'radicais_falhas': estatisticas.get('radicais_falhas', '-')})
+    return resultados
+
+
+def cenario_ranking(candidatas_lista, frases=200, repeticoes=20):
+    """ms para pontuar e ordenar as páginas baixadas de uma consulta, e µs por consulta de domínio confiável"""
+    from urllib.parse import urlparse
+
+    from pitia.indice import RanqueadorBm25
+    from pitia.rede import TabelaDominios
+
+    dominios = {'wikipedia.org': 2, 'gov.br': 3, 'bbc.com': 2, 'nationalgeographic.com': 2,
+                'uol.com.br': 1, 'terra.com.br': 1, 'edu.br': 3}
+    hosts = ['pt.wikipedia.org', 'www.planalto.gov.br', 'www.bbc.com', 'noticias.uol.com.br',
+             'www.exemplo.com', 'blog.qualquer.net', 'www.ufrj.edu.br', 'www.terra.com.br']
+    urls = [f"https://{hosts[i % len(hosts)]}/pagina/{i}" for i in range(1000)]
+
+    def confianca_antiga(url):
+        dominio = urlparse(url).netloc.lower()
+        for dominio_confiavel, prioridade in dominios.items():
+            if dominio_confiavel in dominio:
+                return prioridade
+        return 0
+
+    tabela = TabelaDominios(dominios)
+    resultados = []
+    for candidatas in candidatas_lista:
+        paginas = [gerar_texto(frases, semente=i) for i in range(candidatas)]
+        consulta = ' '.join(paginas[0].split()[:4])
+
+        def antiga():
+            relevancias = []
+            for url, conteudo in zip(urls, paginas):
+                conteudo_minusculo = conteudo.lower()
+                termos_consulta = consulta.lower().split()
+                relevancia = sum(termo in conteudo_minusculo for termo in termos_consulta) / len(termos_consulta)
+                relevancias.append(relevancia * confianca_antiga(url))
+            return sorted(range(candidatas), key=lambda i: -relevancias[i])
+
+        def bm25():
+            ranqueador = RanqueadorBm25(consulta)
+            for conteudo in paginas:
+                ranqueador.adicionar(conteudo)
+            notas = ranqueador.notas()
+            relevancias = notas / (notas.max() or 1.0) * [tabela.de_url(url) for url in urls[:candidatas]]
+            return sorted(range(candidatas), key=lambda i: -relevancias[i])
+
+        tempos = {}
+        for nome, funcao in (('substring', antiga), ('bm25', bm25)):
+            funcao()  # importa o numpy fora da medição
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                funcao()
+            tempos[nome] = (time.perf_counter() - inicio) / repeticoes * 1000
+        resultados.append({'candidatas': candidatas, 'substring_ms': tempos['substring'], 'bm25_ms': tempos['bm25']})
+
+    for nome, funcao in (('linear', confianca_antiga), ('tabela', tabela.de_url)):
+        inicio = time.perf_counter()
+        for url in urls * 20:
+            funcao(url)
+        resultados.append({'candidatas': f"dominio_{nome}",
+                           'substring_ms': (time.perf_counter() - inicio) / (len(urls) * 20) * 1e6, 'bm25_ms': '-'})
+    return resultados
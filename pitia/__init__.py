@@ -4,44 +4,103 @@
    Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
    Autora: Stayely
 """
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+import asyncio
+import inspect
+import queue
 import re
 import random
-import pickle
-import os
-import nltk
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
 from urllib.parse import urlparse
 import time
-import json
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import certifi
-from collections import defaultdict
-from nltk.tokenize import sent_tokenize
-from nltk.corpus import stopwords
-import subprocess
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pitia.indice import IndiceSimilaridade, RanqueadorBm25
+from pitia.armazenamento import ArmazenamentoArena, ArmazenamentoLog, migrar_json, migrar_pickle
+from pitia.arena import MapaCompacto
+from pitia.rede import AgendadorHosts, ClienteHttp, ErroCertificado, LacoEmSegundoPlano, TabelaDominios
+from pitia.cache import CacheDuasCamadas, CacheMemoria, CacheDisco, CacheValidacao
+from pitia.extracao import ExtratorIncremental, obter_backend
+from pitia.texto import AnalisadorTexto, NormalizadorTexto, normalizar_chave
+from pitia.recursos import ErroRecursos, preparar_nltk, recursos_ausentes
+from pitia.metricas import Rastreador
+from pitia import processos
+from pitia.processos import PoolProcessos
+from pitia.provedores import ProvedorBaseConhecimento, ProvedorGoogle, consultar_provedores
+from pitia.resumo import RESUMIDORES, obter_resumidor
 
-# baixa recursos necessários do nltk para tratamento de texto
-nltk.download(['punkt', 'stopwords', 'punkt_tab', 'rslp'], quiet=True)
-os.system("sudo dmesg -n 1")
 
-class AssistenteAvancado:
+def confirmar_pelo_terminal(pergunta, similar):
+    """política padrão do aprendizado ativo: pergunta ao usuário no terminal"""
+    print(f"Notei que você perguntou '{pergunta}'. Devo lembrar isso como uma variação de '{similar}'?")
+    return input("(S/N): ").lower() == 's'
+
+
+def _origem(resposta):
+    """rótulo curto da origem de uma resposta, para o rastreio"""
+    fonte = resposta["source"]
+    if isinstance(fonte, str):
+        return fonte
+    return 'web' if fonte else 'nenhuma'
+
+
+class Sessao:
+    """estado de conversa de um cliente; o próprio assistente é a sessão do modo interativo"""
     def __init__(self):
-        # configuração de processamento de texto
-        self.palavras_parada = set(stopwords.words('portuguese') + stopwords.words('english'))
+        self.ultima_pergunta = None
+        self.ultima_resposta = None
+        self.ultimo_acesso = time.time()
+
+
+class AssistenteAvancado:
+    def __init__(self, gravacao_max_pendentes=1, gravacao_intervalo=0.0,
+                 armazenamento_memoria=None, armazenamento_conhecimento=None,
+                 limite_conexoes=100, limite_conexoes_por_host=8, limites_dominios=None,
+                 cache=None, arquivo_cache=None,
+                 extracao_incremental=False, limite_bytes_pagina=2 * 1024 * 1024,
+                 backend_html='auto', backend_resumo='lsa', offline=False, trabalhadores=5, confirmar_variacao=None,
+                 rastreador=None, prazo_consulta=15.0, provedores=None, espera_provedores=None, processos=0,
+                 max_respostas_conhecimento=5, paginas_candidatas=5, memoria_compacta=False, compartilhado=False,
+                 intervalo_sincronizacao=1.0):
+        # nltk, sumy e googlesearch só são importados no primeiro uso (ver palavras_parada,
+        # stemmer e resumidor); offline=True nunca baixa recursos do nltk, só os valida
+        self.offline = offline
+        
+        # armazenamento append-only; os arquivos antigos são migrados na primeira execução
+        self.arquivo_memoria = "assistant_memory.json"
+        self.arquivo_conhecimento = "knowledge.pkl"
+        # memoria_compacta guarda o instantâneo numa arena mapeada em memória (pitia.arena) em
+        # vez de dicts no heap; o log continua valendo e é convertido na primeira compactação
+        # compartilhado=True deixa vários processos usarem os mesmos arquivos: as gravações
+        # passam por travas de arquivo e o que os outros aprenderam é lido a cada
+        # intervalo_sincronizacao segundos (veja sincronizar)
+        self.compartilhado = compartilhado
+        self.intervalo_sincronizacao = intervalo_sincronizacao
+        self._ultima_sincronizacao = time.monotonic()
+        self._a_indexar = deque()  # (índice, chave) lidas de outros processos, ainda fora do índice
+        # descargas, compactações e a trava entre processos pedidas de dentro de um laço de
+        # eventos rodam nesta thread, uma de cada vez, para o laço não esperar o disco
+        self._gravador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pitia-gravacao')
+        if memoria_compacta:
+            self.memoria_disco = armazenamento_memoria or ArmazenamentoArena("assistant_memory.jsonl",
+                                                                             compartilhado=compartilhado)
+            self.conhecimento_disco = armazenamento_conhecimento or ArmazenamentoArena(
+                "knowledge.jsonl", listas=True, compartilhado=compartilhado)
+        else:
+            self.memoria_disco = armazenamento_memoria or ArmazenamentoLog("assistant_memory.jsonl",
+                                                                           compartilhado=compartilhado)
+            self.conhecimento_disco = armazenamento_conhecimento or ArmazenamentoLog("knowledge.jsonl",
+                                                                                     compartilhado=compartilhado)
         
-        # inicialização de sistemas de conhecimentos
+        # inicialização de sistemas de conhecimentos; a base de conhecimento usa chaves
+        # normalizadas (normalizar_chave), guarda até max_respostas_conhecimento respostas
+        # distintas por chave e tem seu próprio índice para perguntas parecidas
         self.base_conhecimento = defaultdict(list)
+        self.max_respostas_conhecimento = max_respostas_conhecimento
+        self.indice_conhecimento = IndiceSimilaridade()
         self.respostas_aprendidas = {}
         self.carregar_conhecimento()
         
@@ -55,47 +114,118 @@ class AssistenteAvancado:
             'terra.com.br': 1,
             'edu.br': 3
         }
-        
-        # configuração robusta da sessão de HTTP paraevitar instabilidade
-        self.sessao = requests.Session()
-        self.tentativas = Retry(
-            total=3,
-            backoff_factor=0.5,
-            status_forcelist=[500, 502, 503, 504]
-        )
-        self.adaptador = HTTPAdapter(max_retries=self.tentativas)
-        self.sessao.mount('http://', self.adaptador)
-        self.sessao.mount('https://', self.adaptador)
+        # o domínio vale para os subdomínios; a prioridade fica memorizada por host
+        self.tabela_dominios = TabelaDominios(self.dominios_confiaveis)
+        # resultados da pesquisa baixados e ranqueados (BM25 × confiança do domínio) por consulta
+        self.paginas_candidatas = paginas_candidatas
         
         # configura SSL com certificados confiáveis
-        self.sessao.verify = True
-        self.sessao.cert = None
         self.contexto_ssl = ssl.create_default_context(cafile=certifi.where())
         self.contexto_ssl.minimum_version = ssl.TLSVersion.TLSv1_2
         
-        # configuração de cabeçalhos para evitar bloqueios
-        self.sessao.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Language': 'pt-BR,pt;q=0.9'
-        })
-        
-        # processamento de texto(resume e onde paraleliza as tarefas)
-        self.resumidor = LsaSummarizer()
-        self.executor = ThreadPoolExecutor(max_workers=5)
-        self.cache = {}
-        self.mapa_simplificacao = {
-            r"\bposteriormente\b": "depois",
-            r"\bdevido ao fato de\b": "porque",
-            r"\bconstitui\b": "é",
-            r"\bdenominado\b": "chamado"
-        }
-        self.arquivo_memoria = "assistant_memory.json"
+        # cliente HTTP assíncrono compartilhado, com pool de conexões e limite por host;
+        # a api síncrona roda as corotinas num laço de fundo. limites_dominios ajusta a
+        # concorrência e as requisições por segundo de cada domínio (padrão: LIMITES_DOMINIOS_PADRAO)
+        self.cliente_http = ClienteHttp(
+            cabecalhos={
+                # configuração de cabeçalhos para evitar bloqueios
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                'Accept-Language': 'pt-BR,pt;q=0.9'
+            },
+            contexto_ssl=self.contexto_ssl,
+            limite_total=limite_conexoes,
+            limite_por_host=limite_conexoes_por_host,
+            tentativas=3,
+            fator_espera=0.5,
+            status_repetir=[500, 502, 503, 504],
+            timeout=10,
+            agendador=AgendadorHosts(limites_dominios, concorrencia_padrao=limite_conexoes_por_host)
+        )
+        self._laco = LacoEmSegundoPlano()
+        
+        # páginas são lidas até limite_bytes_pagina; no modo incremental o html é
+        # interpretado enquanto chega e o download para quando já há texto suficiente
+        self.extracao_incremental = extracao_incremental
+        self.limite_bytes_pagina = limite_bytes_pagina
+        
+        # interpretador de html: 'auto' usa o mais rápido instalado (selectolax, lxml ou html.parser)
+        self.backend_html = obter_backend(backend_html)
+        
+        # resumidor das respostas da web (veja pitia.resumo): 'lsa' (padrão) é o LsaSummarizer do
+        # sumy; 'lsa_rapido' dá a mesma nota sem a svd, mas empates e arredondamentos podem
+        # escolher outra frase; 'svd' só as primeiras dimensões, 'textrank' tf-idf
+        if backend_resumo not in RESUMIDORES:
+            raise ValueError(f"resumidor desconhecido '{backend_resumo}'; opções: {', '.join(RESUMIDORES)}")
+        self.backend_resumo = backend_resumo
+        
+        # processamento de texto(onde paraleliza as tarefas)
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores)
+        # orçamento de tempo, em segundos, para pesquisas e downloads de uma consulta;
+        # ao estourar, os downloads em curso são cancelados e fica o que já chegou (None: sem prazo)
+        self.prazo_consulta = prazo_consulta
+        # fontes consultadas quando a memória não sabe, em ordem de preferência; com
+        # espera_provedores=None cada uma só começa quando a anterior falha, com 0 todas
+        # disputam juntas e com n segundos a próxima começa se a atual demorar mais que isso
+        self.provedores = provedores or [
+            ProvedorBaseConhecimento(self),
+            ProvedorGoogle(self, filtrar_sites=True),
+            ProvedorGoogle(self),
+        ]
+        self.espera_provedores = espera_provedores
+        # spans por etapa, contadores de cache e tempos por domínio; desligado por padrão
+        self.rastreador = rastreador or Rastreador(ativo=False)
+        self._em_andamento = {}  # downloads em curso por chave, compartilhados entre consultas
+        # cache de pesquisas e páginas: LRU com validade em memória e, se
+        # arquivo_cache for informado, extrações de páginas persistidas em disco; os
+        # validadores http ficam no mesmo arquivo (ou só na memória, limitados) para o GET
+        # condicional, e a extração das páginas validadas fica nas camadas do cache
+        self.cache = cache or CacheDuasCamadas(
+            memoria=CacheMemoria(max_entradas=1000, max_bytes=64 * 1024 * 1024, ttl=3600),
+            disco=CacheDisco(arquivo_cache) if arquivo_cache else None,
+            validacao=CacheValidacao(arquivo_cache or ':memory:')
+        )
+        # regras de simplificação compiladas num único padrão; mapa_simplificacao é o
+        # próprio dict do normalizador, então alterá-lo continua valendo
+        self.normalizador = NormalizadorTexto()
+        self.rastreador.registrar_coletor(lambda: {f"cache_{nome}": valor for nome, valor in self.cache.estatisticas().items()})
+        self.rastreador.registrar_coletor(lambda: {f"resumo_{nome}": valor for nome, valor in self.resumidor.estatisticas().items()}
+                                          if 'resumidor' in self.__dict__ else {})
+        self.rastreador.registrar_coletor(lambda: {f"http_{nome}": valor for nome, valor in self.cliente_http.estatisticas().items()
+                                                   if nome != 'por_host'})
+        self.mapa_simplificacao = self.normalizador.regras
+        # frases, palavras e radicais calculados uma vez por texto; o stemmer do nltk tem um
+        # LRU na frente e só é carregado no primeiro radical pedido
+        self.analisador = AnalisadorTexto(lambda: self.stemmer)
+        self.rastreador.registrar_coletor(lambda: {f"texto_{nome}": valor for nome, valor in self.analisador.estatisticas().items()})
+        # html -> texto e resumo em processos separados (veja pitia.processos), para não
+        # disputarem o GIL: 0 deixa tudo nas threads, None usa um processo por núcleo
+        self.pool_processos = None
+        if processos != 0:
+            self.pool_processos = PoolProcessos(processos, self.backend_html.nome, self.normalizador.regras,
+                                                backend_resumo, offline)
+        self.rastreador.registrar_coletor(lambda: {f"processos_{nome}": valor for nome, valor in self.pool_processos.estatisticas().items()}
+                                          if self.pool_processos is not None else {})
+        self.arquivo_indice = "assistant_index.pkl"
         self.respostas_aprendidas = self._carregar_memoria()
-        self.vectorizador = TfidfVectorizer() # converte texto em vetores para comparação
-        self._inicializar_vectorizador()
+        self.rastreador.registrar_coletor(lambda: {
+            f"{prefixo}_{nome}": valor
+            for prefixo, mapa in (('memoria', self.respostas_aprendidas), ('conhecimento', self.base_conhecimento))
+            if isinstance(mapa, MapaCompacto) for nome, valor in mapa.estatisticas().items()})
+        self.indice = self._inicializar_indice() # índice incremental das perguntas aprendidas
+        self.radicais_perguntas = {}  # pergunta aprendida -> radicais, calculados na primeira comparação
+        
+        # gravação adiada: acumula respostas aprendidas e grava em disco por lote
+        self.gravacao_max_pendentes = gravacao_max_pendentes
+        self.gravacao_intervalo = gravacao_intervalo
+        self._pendentes_gravacao = 0
+        self._ultima_gravacao = time.time()
+        self._profundidade_lote = 0
+        self._gravacao_agendada = None  # tarefa de descarregar_aprendizado_async em curso
         self.ultima_pergunta = None
         self.ultima_resposta = None
-        self.stemmer = nltk.stem.RSLPStemmer()
+        # decide se uma pergunta nova vira variação de outra já aprendida: função
+        # (pergunta, similar) que retorna bool, ou corotina; o padrão pergunta no terminal
+        self.confirmar_variacao = confirmar_variacao or confirmar_pelo_terminal
         self.ultima_consulta_curta = None  
         
         # variação de sinônimos para melhorar as respostas
@@ -106,90 +236,417 @@ class AssistenteAvancado:
             'importante': ['relevante', 'significativo', 'crucial'],
             'pessoa': ['indivíduo', 'ser humano', 'cidadão']
         }
+
+    @cached_property
+    def palavras_parada(self):
+        preparar_nltk(self.offline)
+        from nltk.corpus import stopwords
+        return set(stopwords.words('portuguese') + stopwords.words('english'))
+
+    @cached_property
+    def stemmer(self):
+        preparar_nltk(self.offline)
+        from nltk.stem import RSLPStemmer
+        return RSLPStemmer()
+
+    @cached_property
+    def resumidor(self):
+        if self.backend_resumo == 'lsa':
+            preparar_nltk(self.offline)  # o tokenizador do sumy usa o punkt
+        if self.backend_resumo == 'textrank':
+            return obter_resumidor('textrank', palavras_parada=self.palavras_parada)
+        return obter_resumidor(self.backend_resumo)
+
+    def verificar_recursos(self):
+        """confere os recursos do nltk sem baixar nada; no modo offline levanta ErroRecursos se faltar algum"""
+        ausentes = recursos_ausentes()
+        if ausentes and self.offline:
+            raise ErroRecursos(ausentes)
+        return ausentes
         
     def salvar_conhecimento(self):
-        """salva a base de conhecimento em arquivo pickle(transforma em binário)"""
+        """grava no log as respostas novas da base de conhecimento, compactando quando necessário"""
         try:
-            with open('knowledge.pkl', 'wb') as f:
-                pickle.dump(dict(self.base_conhecimento), f)
+            with self.conhecimento_disco.trava():
+                if self.compartilhado:
+                    self._sincronizar_conhecimento()
+                self.conhecimento_disco.descarregar()
+                if self.conhecimento_disco.precisa_compactar(len(self.base_conhecimento)):
+                    self.conhecimento_disco.compactar(self.base_conhecimento)
             return True
         except Exception as e:
             print(f"Erro ao salvar conhecimento: {e}")
             return False
+
+    async def salvar_conhecimento_async(self):
+        """versão assíncrona de salvar_conhecimento: o disco e a trava entre processos ficam no gravador"""
+        return await self._em_gravador(self.salvar_conhecimento)
     
     def carregar_conhecimento(self):
-        """carrega a base de conhecimento do arquivo de antes"""
+        """carrega a base de conhecimento do log, migrando o knowledge.pkl de antes
+
+        chaves gravadas sem normalizar (versões antigas) são juntadas sob a chave normalizada,
+        sem respostas repetidas, e o log é reescrito uma vez já no formato novo. com a
+        memória compacta, a base é o próprio MapaCompacto carregado, sem cópia.
+        """
         try:
-            if os.path.exists('knowledge.pkl'):
-                with open('knowledge.pkl', 'rb') as f:
-                    self.base_conhecimento.update(pickle.load(f))
+            migrar_pickle(self.conhecimento_disco, self.arquivo_conhecimento)
+            estado = self.conhecimento_disco.carregar()
+            compacto = isinstance(estado, MapaCompacto)
+            if compacto and all(normalizar_chave(chave) == chave for chave in estado):
+                self.base_conhecimento = estado
+            else:
+                for consulta, respostas in estado.items():
+                    for resposta in respostas:
+                        self._guardar_conhecimento(normalizar_chave(consulta), resposta, gravar=False)
+                if self.base_conhecimento != estado:
+                    self.conhecimento_disco.compactar(self.base_conhecimento)
+                if compacto:
+                    self.base_conhecimento = self.conhecimento_disco.carregar()
+            self.indice_conhecimento.adicionar_varios(self.base_conhecimento.keys())
             return True
         except Exception as e:
             print(f"Erro ao carregar conhecimento: {e}")
             return False
     
+    def _guardar_conhecimento(self, chave, resposta, gravar=True):
+        """acrescenta a resposta à chave, sem repetir e descartando a mais antiga acima do limite
+
+        retorna False se a resposta já estava guardada.
+        """
+        with self.conhecimento_disco.alterando():
+            respostas = self.base_conhecimento[chave]
+            if resposta in respostas:
+                return False
+            respostas.append(resposta)
+            excedentes = len(respostas) - self.max_respostas_conhecimento
+            if excedentes > 0:
+                del respostas[:excedentes]
+            if gravar:
+                if excedentes > 0:
+                    self.conhecimento_disco.definir(chave, list(respostas))
+                else:
+                    self.conhecimento_disco.anexar(chave, resposta)
+        return True
+
+    def _buscar_conhecimento(self, consulta):
+        """(chave, como achou) na base de conhecimento: pela chave normalizada ou por uma pergunta parecida"""
+        chave = normalizar_chave(consulta)
+        if self.base_conhecimento.get(chave):
+            return chave, 'exato'
+        similar = self._encontrar_perguntas_similares([chave], self.indice_conhecimento)[0]
+        if similar is not None and self.base_conhecimento.get(similar):
+            return similar, 'similar'
+        return chave, None
+
     def _carregar_memoria(self):
-        """carrega respostas aprendidas do arquivo com tratamento de erro"""
-        if os.path.exists(self.arquivo_memoria):
-            try:
-                with open(self.arquivo_memoria, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Erro ao carregar memória: {e}")
-                return {}
-        return {}
+        """carrega respostas aprendidas do log, migrando o arquivo json de antes"""
+        try:
+            migrar_json(self.memoria_disco, self.arquivo_memoria)
+            return self.memoria_disco.carregar()
+        except Exception as e:
+            print(f"Erro ao carregar memória: {e}")
+            return {}
     
     def _salvar_memoria(self):
-        """salva respostas aprendidas no arquivo de forma segura"""
+        """grava no log as respostas pendentes; o custo não depende do tamanho da memória"""
         try:
-            with open(self.arquivo_memoria, 'w', encoding='utf-8') as f:
-                json.dump(self.respostas_aprendidas, f, ensure_ascii=False, indent=2)
+            with self.memoria_disco.trava():
+                if self.compartilhado:
+                    self._sincronizar_memoria()
+                self.memoria_disco.descarregar()
+                if self.memoria_disco.precisa_compactar(len(self.respostas_aprendidas)):
+                    self.memoria_disco.compactar(self.respostas_aprendidas)
+                    self._salvar_indice()
             return True
         except Exception as e:
             print(f"Erro ao salvar memória: {e}")
             return False
+
+    def sincronizar(self, forcar=False):
+        """traz para este processo as respostas e o conhecimento que outros processos gravaram
+
+        só faz algo com compartilhado=True e, sem forcar, no máximo uma vez a cada
+        intervalo_sincronizacao segundos; as consultas chamam antes de procurar na memória.
+        """
+        if self._sincronizacao_devida(forcar):
+            self._ler_outros_processos()
+        self._indexar_sincronizadas()
+
+    async def sincronizar_async(self, forcar=False):
+        """versão assíncrona de sincronizar: a leitura dos arquivos e a trava ficam no gravador"""
+        if self._sincronizacao_devida(forcar):
+            await self._em_gravador(self._ler_outros_processos)
+        self._indexar_sincronizadas()
+
+    def _sincronizacao_devida(self, forcar):
+        if not self.compartilhado:
+            return False
+        agora = time.monotonic()
+        if not forcar and agora - self._ultima_sincronizacao < self.intervalo_sincronizacao:
+            return False
+        self._ultima_sincronizacao = agora
+        return True
+
+    def _ler_outros_processos(self):
+        try:
+            self._sincronizar_memoria()
+            self._sincronizar_conhecimento()
+        except Exception as e:
+            print(f"Erro ao sincronizar com outros processos: {e}")
+
+    # as chaves lidas só entram nos índices em _indexar_sincronizadas, chamada por quem usa os
+    # índices: a leitura pode rodar no gravador enquanto o laço de eventos faz buscas
+    def _sincronizar_memoria(self):
+        self._a_indexar.extend((self.indice, pergunta)
+                               for pergunta in self.memoria_disco.acompanhar(self.respostas_aprendidas))
+
+    def _sincronizar_conhecimento(self):
+        self._a_indexar.extend((self.indice_conhecimento, chave)
+                               for chave in self.conhecimento_disco.acompanhar(self.base_conhecimento))
+
+    def _indexar_sincronizadas(self):
+        if not self._a_indexar:
+            return
+        with self.memoria_disco.alterando():
+            while self._a_indexar:
+                indice, chave = self._a_indexar.popleft()
+                indice.adicionar(chave)
     
-    def _inicializar_vectorizador(self):
-        """inicializa o vetorizador com perguntas existentes além de treinar com as respostas aprendidas"""
-        if self.respostas_aprendidas:
-            perguntas = list(self.respostas_aprendidas.keys())
-            if perguntas:
-                self.vectorizador.fit(perguntas)
+    def _inicializar_indice(self):
+        """carrega o índice salvo e completa com as perguntas gravadas depois dele"""
+        try:
+            indice = IndiceSimilaridade.carregar(self.arquivo_indice)
+            if indice is not None and all(pergunta in self.respostas_aprendidas for pergunta in indice.documentos):
+                indice.adicionar_varios(p for p in self.respostas_aprendidas if p not in indice)
+                return indice
+        except Exception as e:
+            print(f"Erro ao carregar índice: {e}")
+
+        indice = IndiceSimilaridade()
+        indice.adicionar_varios(self.respostas_aprendidas.keys())
+        return indice
+
+    def _salvar_indice(self):
+        # o laço de eventos pode estar acrescentando perguntas ao índice enquanto ele é gravado
+        with self.memoria_disco.trava(), self.memoria_disco.alterando():
+            self.indice.salvar(self.arquivo_indice)
+
+    def fechar(self):
+        """grava tudo o que está pendente e salva o índice para a próxima inicialização"""
+        self.descarregar_aprendizado()
+        self.salvar_conhecimento()
+        try:
+            self._salvar_indice()
+        except Exception as e:
+            print(f"Erro ao salvar índice: {e}")
+        self._laco.fechar(self.cliente_http)
+        self._gravador.shutdown(wait=True)
+        if self.pool_processos is not None:
+            self.pool_processos.fechar()
+
+    async def fechar_async(self):
+        """fecha a sessão http do laço atual, para quem usa a api assíncrona no próprio laço"""
+        await self.cliente_http.fechar()
+
+    async def _em_executor(self, funcao, *args):
+        """roda trabalho bloqueante ou pesado de cpu fora do laço de eventos"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, funcao, *args)
+
+    async def _em_gravador(self, funcao, *args):
+        """roda gravações em disco, uma de cada vez, na thread do gravador"""
+        return await asyncio.get_running_loop().run_in_executor(self._gravador, funcao, *args)
+
+    async def _em_processo(self, tarefa, alternativa, *args):
+        """roda tarefa (uma função de pitia.processos) no pool de processos
+
+        sem pool, ou se ele quebrar, roda alternativa com os mesmos argumentos no executor de threads.
+        """
+        pool = self.pool_processos
+        if pool is not None:
+            try:
+                return await pool.executar(tarefa, *args)
+            except BrokenProcessPool as e:
+                print(f"Erro no pool de processos, voltando às threads: {e}")
+                self.pool_processos = None
+        return await self._em_executor(alternativa, *args)
+
+    def _consultar_cache(self, tipo, chave):
+        """lê do cache contando acerto ou falha por tipo de entrada"""
+        valor = self.cache.obter(chave)
+        self.rastreador.contar('cache', tipo=tipo, resultado='falha' if valor is None else 'acerto')
+        return valor
+
+    def _novo_prazo(self):
+        """horário do laço em que o orçamento de uma consulta que começa agora acaba"""
+        if self.prazo_consulta is None:
+            return None
+        return asyncio.get_running_loop().time() + self.prazo_consulta
+
+    async def _ate_o_prazo(self, corotina, prazo, etapa, padrao=None):
+        """aguarda a corotina até o prazo; se ele acabar antes, cancela e devolve padrao"""
+        if prazo is None:
+            return await corotina
+        try:
+            return await asyncio.wait_for(corotina, max(0, prazo - asyncio.get_running_loop().time()))
+        except asyncio.TimeoutError:
+            self.rastreador.contar('prazo_esgotado', etapa=etapa)
+            return padrao
+
+    async def _compartilhado(self, chave, fabrica):
+        """junta chamadas simultâneas com a mesma chave numa única corotina
+
+        quem chega depois espera o resultado de quem começou; a corotina só é
+        cancelada quando todos que a esperam desistem.
+        """
+        chave = (asyncio.get_running_loop(), chave)
+        entrada = self._em_andamento.get(chave)
+        if entrada is None:
+            entrada = [asyncio.ensure_future(fabrica()), 0]
+            self._em_andamento[chave] = entrada
+            entrada[0].add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        entrada[1] += 1
+        try:
+            return await asyncio.shield(entrada[0])
+        finally:
+            entrada[1] -= 1
+            if not entrada[1] and not entrada[0].done():
+                entrada[0].cancel()
+
+    def descarregar_aprendizado(self):
+        """grava em disco as respostas aprendidas que ainda estão pendentes"""
+        contadas = self._pendentes_gravacao
+        if not contadas:
+            return True
+        if self._salvar_memoria():
+            self._descarregadas(contadas)
+            return True
+        return False
+
+    async def descarregar_aprendizado_async(self):
+        """versão assíncrona de descarregar_aprendizado: o disco e a trava entre processos ficam no gravador
+
+        repete enquanto chegarem respostas novas durante a gravação.
+        """
+        while self._pendentes_gravacao:
+            contadas = self._pendentes_gravacao
+            if not await self._em_gravador(self._salvar_memoria):
+                return False
+            self._descarregadas(contadas)
+        return True
+
+    def _descarregadas(self, contadas):
+        # o que foi aprendido durante a gravação continua pendente
+        self._pendentes_gravacao = max(0, self._pendentes_gravacao - contadas)
+        self._ultima_gravacao = time.time()
+
+    def _descarregar(self):
+        """descarrega agora ou, dentro de um laço de eventos, numa tarefa que usa o gravador"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.descarregar_aprendizado()
+            return
+        if self._gravacao_agendada is None or self._gravacao_agendada.done():
+            self._gravacao_agendada = asyncio.ensure_future(self.descarregar_aprendizado_async())
+
+    def _agendar_gravacao(self):
+        """conta uma alteração pendente e grava se o intervalo configurado foi atingido"""
+        self._pendentes_gravacao += 1
+        if self._profundidade_lote:
+            return
+        if self._pendentes_gravacao >= self.gravacao_max_pendentes or \
+                time.time() - self._ultima_gravacao >= self.gravacao_intervalo > 0:
+            self._descarregar()
+
+    @contextmanager
+    def lote_aprendizado(self):
+        """adia a gravação de tudo que for aprendido dentro do bloco para o final dele"""
+        self._profundidade_lote += 1
+        try:
+            yield self
+        finally:
+            self._profundidade_lote -= 1
+            if not self._profundidade_lote:
+                self._descarregar()
+
+    def aprender_lote(self, pares, sobrescrever=True):
+        """aprende vários pares (pergunta, resposta) com uma única atualização de índice e disco"""
+        aprendidas = 0
+        novas = []
+        with self.lote_aprendizado(), self.memoria_disco.alterando():
+            for pergunta, resposta in pares:
+                pergunta = pergunta.lower().strip()
+                if not pergunta or not resposta:
+                    continue
+                if not sobrescrever and pergunta in self.respostas_aprendidas:
+                    continue
+                if pergunta not in self.respostas_aprendidas:
+                    novas.append(pergunta)
+                self.respostas_aprendidas[pergunta] = resposta
+                self.memoria_disco.definir(pergunta, resposta)
+                self._pendentes_gravacao += 1
+                aprendidas += 1
+            self.indice.adicionar_varios(novas)
+        return aprendidas
 
     def pesquisar_duckduckgo(self, consulta):
         """faz scraping do duckduckgo para obter resultados"""
+        return self._laco.executar(self.pesquisar_duckduckgo_async(consulta))
+
+    async def pesquisar_duckduckgo_async(self, consulta):
+        """versão assíncrona da pesquisa no duckduckgo, usando o cliente http compartilhado"""
+        chave_cache = f"ddg_{consulta}"
+        resultados = self._consultar_cache('duckduckgo', chave_cache)
+        if resultados is not None:
+            return resultados
+
+        with self.rastreador.span('duckduckgo'):
+            return await self._compartilhado(chave_cache, lambda: self._baixar_duckduckgo(consulta, chave_cache))
+
+    async def _baixar_duckduckgo(self, consulta, chave_cache):
         try:
             url = f"https://html.duckduckgo.com/html/?q={consulta.replace(' ', '+')}"
             headers = {'User-Agent': 'Mozilla/5.0'}
-            resposta = self.sessao.get(url, headers=headers)
-            sopa = BeautifulSoup(resposta.text, 'html.parser')
-            
-            resultados = []
-            for resultado in sopa.select('.result__body'):
-                link = resultado.select_one('.result__url')['href']
-                titulo = resultado.select_one('.result__title').text
-                snippet = resultado.select_one('.result__snippet').text
-                resultados.append({'title': titulo, 'url': link, 'snippet': snippet})
-            
-            return resultados[:3]  # retorna os 3 primeiros resultados
+            resposta = await self.cliente_http.obter(url, cabecalhos=headers)
+            resultados = await self._em_processo(processos.interpretar_duckduckgo, self._interpretar_duckduckgo,
+                                                 resposta.corpo, resposta.codificacao)
+            self.cache.guardar(chave_cache, resultados)
+            return resultados
         except Exception as e:
             print(f"Erro na pesquisa DuckDuckGo: {e}")
             return []
 
-    def pesquisar_google(self, consulta, num_resultados=5):
+    def _interpretar_duckduckgo(self, corpo, codificacao=None):
+        """extrai título, link e trecho de cada resultado da página do duckduckgo"""
+        resultados = self.backend_html.interpretar_duckduckgo(corpo, codificacao)
+        return resultados[:3]  # retorna os 3 primeiros resultados
+
+    def pesquisar_google(self, consulta, num_resultados=None):
         """busca otimizada com tratamento de erro melhorado"""
+        return self._laco.executar(self.pesquisar_google_async(consulta, num_resultados))
+
+    async def pesquisar_google_async(self, consulta, num_resultados=None):
+        """versão assíncrona da busca no google; a googlesearch é síncrona e roda no executor"""
+        num_resultados = num_resultados or self.paginas_candidatas
         chave_cache = f"search_{consulta}"
-        if chave_cache in self.cache:
-            return self.cache[chave_cache]
+        resultados = self._consultar_cache('google', chave_cache)
+        if resultados is not None:
+            return resultados
 
+        with self.rastreador.span('google'):
+            return await self._compartilhado(chave_cache, lambda: self._buscar_google(consulta, num_resultados, chave_cache))
+
+    async def _buscar_google(self, consulta, num_resultados, chave_cache):
         try:
-            resultados = list(search(
+            from googlesearch import search
+            resultados = await self._em_executor(lambda: list(search(
                 consulta,
                 num_results=num_resultados,
                 lang='pt',
                 #pause=2.0
-            ))
-            self.cache[chave_cache] = resultados
+            )))
+            self.cache.guardar(chave_cache, resultados)
             return resultados
         except Exception as e:
             print(f"Erro na busca por '{consulta}': {e}")
@@ -197,7 +654,7 @@ class AssistenteAvancado:
 
     def extrair_informacoes_chave(self, texto):
         """extrai informações principais do texto"""
-        frases = sent_tokenize(texto)
+        frases = self.analisador.analisar(texto).frases
         frases_importantes = []
         
         for frase in frases:
@@ -211,8 +668,7 @@ class AssistenteAvancado:
 
     def parafrasear_texto(self, texto):
         """reescreve o texto com palavras próprias do dicionario de antes"""
-        palavras = texto.lower().split()
-        palavras_limpas = [w for w in palavras if w not in self.palavras_parada and len(w) > 3]
+        palavras = self.analisador.analisar(texto).palavras
         
         parafraseado = []
         for palavra in palavras:
@@ -224,18 +680,18 @@ class AssistenteAvancado:
         return ' '.join(parafraseado).capitalize()
 
     def resumir_texto(self, texto, num_frases=2):
-        """resumo do texto com fallback para nltk se sumy falhar"""
-        if not texto or len(texto.split()) < 10:
-            return texto[:500]
+        """resumo do texto pelo resumidor escolhido, com as primeiras frases como fallback"""
+        documento = self.analisador.analisar(texto)
+        if len(documento.palavras) < 10:
+            return documento.texto[:500]
             
         try:
-            parser = PlaintextParser.from_string(texto, Tokenizer("portuguese"))
-            resumo = self.resumidor(parser.document, num_frases)
-            return ' '.join(str(frase) for frase in resumo)
+            return self.resumidor.resumir(documento, num_frases)
+        except ErroRecursos:
+            raise
         except Exception as e:
             print(f"Erro ao resumir texto: {e}")
-            frases = nltk.sent_tokenize(texto, language='portuguese')
-            return ' '.join(frases[:num_frases])
+            return ' '.join(documento.frases[:num_frases])
     
     def _limpar_texto(self, texto):
         """limpeza avançada de texto"""
@@ -243,54 +699,76 @@ class AssistenteAvancado:
             return ""
             
         try:
-            texto = re.sub(r'\[\d+\]|\([^)]*\)', '', texto)
-            texto = re.sub(r'\s+', ' ', texto).strip()
-            
-            for padrao, substituicao in self.mapa_simplificacao.items():
-                texto = re.sub(padrao, substituicao, texto, flags=re.IGNORECASE)
-                
-            return texto
+            return self.normalizador.normalizar(texto)
         except:
             return texto[:1000]
 
     def _encontrar_pergunta_similar(self, consulta):
         """encontra perguntas similares na memória com limiares ajustados"""
-        if not self.respostas_aprendidas:
-            return None
+        return self._encontrar_perguntas_similares([consulta])[0]
+
+    def _encontrar_perguntas_similares(self, consultas, indice=None):
+        """versão em lote de _encontrar_pergunta_similar, com uma única busca no índice
+
+        indice é o das respostas aprendidas, se não for passado outro (como o da base de conhecimento).
+        """
+        self._indexar_sincronizadas()
+        if indice is None:
+            indice = self.indice
+        similares = [None] * len(consultas)
+        if not len(indice) or not consultas:
+            return similares
+
+        # a própria pergunta guardada vence sem busca: a busca ignora termos de um caractere e
+        # tem teto de postings, então perguntas quase iguais podem empatar com ela ou passar à frente
+        buscar = []
+        for posicao, consulta in enumerate(consultas):
+            normalizada = consulta.lower().strip()
+            if normalizada in indice:
+                similares[posicao] = normalizada
+            else:
+                buscar.append(posicao)
+        if not buscar:
+            return similares
 
-        perguntas = list(self.respostas_aprendidas.keys())
-        if not perguntas:
-            return None
-        
         try:
-            todas_perguntas = perguntas + [consulta]
-            vetores = self.vectorizador.fit_transform(todas_perguntas)
-            
-            vetor_consulta = vetores[-1]
-            vetores_perguntas = vetores[:-1]
-            
-            similaridades = cosine_similarity(vetor_consulta, vetores_perguntas)
-            indice_max = np.argmax(similaridades)
-            similaridade_max = similaridades[0, indice_max]
-
-            if similaridade_max > 0.65:
-                palavras_consulta = {self.stemmer.stem(w) for w in consulta.lower().split() if len(w) > 3}
-                palavras_armazenadas = {self.stemmer.stem(w) for w in perguntas[indice_max].lower().split() if len(w) > 3}
-                # verifica se a similaridade é alta o suficiente e se as palavras-chave coincidem
-                if palavras_consulta and len(palavras_consulta & palavras_armazenadas)/len(palavras_consulta) > 0.4:
-                    return perguntas[indice_max]
+            consultas_busca = [consultas[posicao] for posicao in buscar]
+            for posicao, consulta, melhores in zip(buscar, consultas_busca, indice.buscar_varios(consultas_busca, k=1)):
+                if not melhores:
+                    continue
+                pergunta_max, similaridade_max = melhores[0]
+
+                if similaridade_max > 0.65:
+                    palavras_consulta = self.analisador.radicais(consulta)
+                    palavras_armazenadas = self._radicais_pergunta(pergunta_max)
+                    # verifica se a similaridade é alta o suficiente e se as palavras-chave coincidem
+                    if palavras_consulta and len(palavras_consulta & palavras_armazenadas)/len(palavras_consulta) > 0.4:
+                        similares[posicao] = pergunta_max
         except Exception as e:
             print(f"Erro ao encontrar pergunta similar: {e}")
         
-        return None
+        return similares
+    
+    def _radicais_pergunta(self, pergunta):
+        radicais = self.radicais_perguntas.get(pergunta)
+        if radicais is None:
+            radicais = self.radicais_perguntas[pergunta] = self.analisador.radicais(pergunta)
+        return radicais
     
     def aprendizado_ativo(self, pergunta):
         """mecanismo de aprendizado quando encontra perguntas similares mas n identicas"""
+        return self._laco.executar(self.aprendizado_ativo_async(pergunta))
+
+    async def aprendizado_ativo_async(self, pergunta):
+        """versão assíncrona do aprendizado_ativo; a confirmação vem de self.confirmar_variacao"""
         similar = self._encontrar_pergunta_similar(pergunta)
         if similar and similar != pergunta.lower().strip():
-            print(f"Notei que você perguntou '{pergunta}'. Devo lembrar isso como uma variação de '{similar}'?")
-            entrada_usuario = input("(S/N): ").lower()
-            if entrada_usuario == 's':
+            if inspect.iscoroutinefunction(self.confirmar_variacao):
+                confirmado = await self.confirmar_variacao(pergunta, similar)
+            else:
+                # a política padrão bloqueia no input(); roda fora do laço
+                confirmado = await self._em_executor(self.confirmar_variacao, pergunta, similar)
+            if confirmado:
                 self.aprender_resposta(pergunta, self.respostas_aprendidas[similar])
                 return True
         return False
@@ -305,23 +783,24 @@ class AssistenteAvancado:
             if not sobrescrever and pergunta in self.respostas_aprendidas:
                 return False
                 
-            self.respostas_aprendidas[pergunta] = resposta
-            
-            # atualiza o vetorizador sem perder as informações anteriores
-            if hasattr(self.vectorizador, 'vocabulary_'):
-                self.vectorizador.fit(list(self.respostas_aprendidas.keys()))
-            else:
-                self.vectorizador.fit(list(self.respostas_aprendidas.keys()))
+            with self.memoria_disco.alterando():
+                self.respostas_aprendidas[pergunta] = resposta
+                self.memoria_disco.definir(pergunta, resposta)
+
+                # atualiza o índice só com a pergunta nova, sem reajustar o corpus
+                self.indice.adicionar(pergunta)
                 
-            self._salvar_memoria()
+            # dentro de um laço de eventos a gravação, quando vencer, roda no gravador
+            self._agendar_gravacao()
             return True
         except Exception as e:
             print(f"Erro ao aprender resposta: {e}")
             return False
 
-    def lidar_com_correcao(self, texto_correcao):
-        """processa uma correção do usuario"""
-        if not self.ultima_pergunta:
+    def lidar_com_correcao(self, texto_correcao, sessao=None):
+        """processa uma correção do usuario sobre a última pergunta da sessão"""
+        sessao = sessao or self
+        if not sessao.ultima_pergunta:
             return False
             
         try:
@@ -333,7 +812,7 @@ class AssistenteAvancado:
             if not correcao:
                 return False
                 
-            return self.aprender_resposta(self.ultima_pergunta, correcao)
+            return self.aprender_resposta(sessao.ultima_pergunta, correcao)
         except Exception as e:
             print(f"Erro ao processar correção: {e}")
             return False
@@ -341,11 +820,7 @@ class AssistenteAvancado:
     def _eh_dominio_confiavel(self, url):
         """verifica se o domínio é confiável com prioridade"""
         try:
-            dominio = urlparse(url).netloc.lower()
-            for dominio_confiavel, prioridade in self.dominios_confiaveis.items():
-                if dominio_confiavel in dominio:
-                    return prioridade
-            return 0
+            return self.tabela_dominios.de_url(url)
         except:
             return 0
 
@@ -371,59 +846,52 @@ class AssistenteAvancado:
 
     def obter_conteudo_pagina(self, url):
         """versão com tratamento de SSL seguro e extração objetiva de conteudo"""
-        if url in self.cache:
-            return self.cache[url]
+        return self._laco.executar(self.obter_conteudo_pagina_async(url))
+
+    async def obter_conteudo_pagina_async(self, url):
+        """baixa a página pelo cliente compartilhado e extrai o conteúdo no executor"""
+        chave_cache = f"pagina_{url}"
+        resultado = self._consultar_cache('pagina', chave_cache)
+        if resultado is not None:
+            return resultado
             
+        return await self._compartilhado(chave_cache, lambda: self._carregar_pagina(url, chave_cache))
+
+    async def _carregar_pagina(self, url, chave_cache):
+        """baixa a página medindo o tempo e o resultado por domínio"""
+        dominio = urlparse(url).netloc.lower()
+        with self.rastreador.span('pagina', dominio=dominio) as span:
+            resultado = await self._baixar_pagina(url, chave_cache)
+            situacao = 'ok' if resultado['content'] else 'falha'
+            span.definir(situacao=situacao)
+        self.rastreador.observar('pagina_segundos', resultado['load_time'], dominio=dominio)
+        self.rastreador.contar('paginas', dominio=dominio, situacao=situacao)
+        return resultado
+
+    async def _baixar_pagina(self, url, chave_cache):
+        """baixa e extrai a página, guardando no cache; devolve o conteúdo de fallback em caso de erro"""
         tempo_inicio = time.time()
         resultado = self._conteudo_fallback(url)
         resultado['load_time'] = time.time() - tempo_inicio
         
         try:
-            resposta = self.sessao.get(
-                url,
-                timeout=10,
-                stream=True
-            )
-            resposta.raise_for_status()
+            try:
+                extraido = await self._baixar_e_extrair(url)
+            except ErroCertificado:
+                if self._eh_dominio_confiavel(url) <= 0:
+                    print(f"Erro de certificado SSL em {url} - domínio não confiável")
+                    return resultado
+                try:
+                    extraido = await self._baixar_e_extrair(url, verificar_ssl=False)
+                    print(f"Aviso: Acesso inseguro a {url} - certificado não verificado")
+                except Exception as e:
+                    print(f"Erro ao processar {url} (modo inseguro): {str(e)[:200]}...")
+                    return resultado
             
-            if 'text/html' not in resposta.headers.get('Content-Type', ''):
+            if extraido is None:
                 return resultado
             
-            sopa = BeautifulSoup(resposta.content, 'html.parser', from_encoding=resposta.encoding)
-            
-            for elemento in sopa(["script", "style", "nav", "footer", "iframe", 
-                               "aside", "header", "form", "button", "img",
-                               "comment", "noscript", "svg", "figure", "video",
-                               "audio", "meta", "link", "select", "textarea"]):
-                elemento.decompose()
-            
-            titulo = sopa.title.get_text().strip() if sopa.title else "Sem título"
-            
-            conteudo_principal = None
-            seletores_conteudo = [
-                {'name': 'article'},
-                {'name': 'main'},
-                {'class': 'content'},
-                {'class': 'post-content'},
-                {'class': 'article-body'},
-                {'itemprop': 'articleBody'},
-                {'id': 'content'}
-            ]
-            
-            for seletor in seletores_conteudo:
-                if conteudo_principal is None:
-                    conteudo_principal = sopa.find(attrs=seletor)
-            
-            conteudo_principal = conteudo_principal or sopa.body
-            
-            elementos_texto = []
-            for elemento in conteudo_principal.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'li']):
-                texto = self._limpar_texto(elemento.get_text())
-                if len(texto.split()) > 3:
-                    elementos_texto.append(texto)
-            
-            conteudo = ' '.join(elementos_texto)[:5000] # limitação de caracteres
-            
+            titulo, conteudo = extraido
             resultado = {
                 'content': conteudo,
                 'title': titulo,
@@ -432,110 +900,187 @@ class AssistenteAvancado:
                 'load_time': time.time() - tempo_inicio
             }
             
-            self.cache[url] = resultado
+            self.cache.guardar(chave_cache, resultado, persistir=True)
             return resultado
             
-        except requests.exceptions.SSLError:
-            if self._eh_dominio_confiavel(url) > 0:
-                try:
-                    resposta = self.sessao.get(url, timeout=10, verify=False)
-                    resposta.raise_for_status()
-                    print(f"Aviso: Acesso inseguro a {url} - certificado não verificado")
-                except Exception as e:
-                    print(f"Erro ao processar {url} (modo inseguro): {str(e)[:200]}...")
-                    return resultado
-            else:
-                print(f"Erro de certificado SSL em {url} - domínio não confiável")
-                return resultado
         except Exception as e:
             print(f"Erro ao processar {url}: {str(e)[:200]}...")
             return resultado
 
+    async def _baixar_e_extrair(self, url, verificar_ssl=True):
+        """baixa a página e retorna (título, conteúdo), ou None se não for html
+
+        se a página já foi extraída antes com ETag ou Last-Modified, o pedido é condicional
+        e um 304 devolve a extração guardada sem interpretar nada.
+        """
+        validacao = getattr(self.cache, 'validacao', None)
+        anterior = self.cache.obter_validado(url) if validacao is not None else None
+        cabecalhos = validacao.cabecalhos_condicionais(anterior) if anterior else None
+        
+        if self.extracao_incremental:
+            extrator = None
+            lidos = 0
+            segundos = 0.0
+            
+            def aceitar(cabecalhos):
+                nonlocal extrator
+                tipo = cabecalhos.get('Content-Type', '')
+                if 'text/html' not in tipo:
+                    return False
+                charset = re.search(r'charset=([\w-]+)', tipo)
+                extrator = ExtratorIncremental(charset.group(1) if charset else None, self.normalizador)
+                return True
+            
+            def alimentar(parte):
+                nonlocal lidos, segundos
+                inicio = time.perf_counter()
+                continuar = extrator.alimentar(parte)
+                segundos += time.perf_counter() - inicio
+                lidos += len(parte)
+                return continuar
+            
+            resposta = await self.cliente_http.obter_em_partes(
+                url,
+                alimentar,
+                aceitar=aceitar,
+                cabecalhos=cabecalhos,
+                verificar_ssl=verificar_ssl,
+                limite_bytes=self.limite_bytes_pagina
+            )
+            if resposta.status == 304 and anterior:
+                self.cache.nao_modificado(url, anterior)
+                return anterior['titulo'], anterior['conteudo']
+            if extrator is None:
+                return None
+            inicio = time.perf_counter()
+            extraido = extrator.finalizar()
+            segundos += time.perf_counter() - inicio
+        else:
+            resposta = await self.cliente_http.obter(url, cabecalhos=cabecalhos, verificar_ssl=verificar_ssl,
+                                                     limite_bytes=self.limite_bytes_pagina)
+            if resposta.status == 304 and anterior:
+                self.cache.nao_modificado(url, anterior)
+                return anterior['titulo'], anterior['conteudo']
+            if 'text/html' not in resposta.cabecalhos.get('Content-Type', ''):
+                return None
+            lidos = len(resposta.corpo)
+            inicio = time.perf_counter()
+            with self.rastreador.span('extracao', backend=self.backend_html.nome, bytes=lidos):
+                extraido = await self._extrair_html(resposta.corpo, resposta.codificacao)
+            segundos = time.perf_counter() - inicio
+        
+        if validacao is not None and extraido is not None and extraido[1]:
+            self.cache.guardar_validado(url, resposta.cabecalhos, *extraido, lidos, segundos)
+        return extraido
+
+    async def _extrair_html(self, corpo, codificacao=None):
+        """(título, conteúdo) do html, no pool de processos se houver"""
+        return await self._em_processo(processos.extrair, self._extrair_em_thread, corpo, codificacao)
+
+    def _extrair_em_thread(self, corpo, codificacao=None):
+        return self.backend_html.extrair(corpo, codificacao, self.normalizador)
+
     def _processar_resultados_paralelo(self, consulta, resultados):
         """processa resultados em paralelo com priorização de dominios confiaveis vistos antes"""
-        futures = {}
+        return self._laco.executar(self._processar_resultados_paralelo_async(consulta, resultados))
+
+    async def _processar_resultados_paralelo_async(self, consulta, resultados, prazo=None):
+        """baixa as páginas concorrentemente e devolve as já processadas, das mais relevantes para as menos
+
+        as que sobrarem são canceladas ao achar uma página boa o bastante ou quando chega o
+        prazo (horário do laço de eventos, como em loop.time()). a relevância é a nota BM25
+        da página entre as baixadas, de 0 a 1, vezes a confiança do domínio.
+        """
         processados = []
+        ranqueador = RanqueadorBm25(consulta)
         
-        resultados_ordenados = sorted(resultados, key=lambda url: -self._eh_dominio_confiavel(url))
-        
-        for url in resultados_ordenados[:5]:
-            futures[self.executor.submit(self.obter_conteudo_pagina, url)] = url
+        resultados_ordenados = sorted(resultados, key=self._eh_dominio_confiavel, reverse=True)
         
-        for future in as_completed(futures):
-            url = futures[future]
-            try:
-                dados = future.result()
-                if dados and dados['content']:
-                    conteudo_minusculo = dados['content'].lower()
-                    termos_consulta = consulta.lower().split()
-                    relevancia = sum(termo in conteudo_minusculo for termo in termos_consulta) / len(termos_consulta)
-                    dados['relevance'] = relevancia * dados['trust_score']
-                    
-                    processados.append(dados)
-                    
-                    if dados['trust_score'] >= 3 and dados['relevance'] >= 0.5:
-                        return [dados]
-            except Exception as e:
-                print(f"Erro ao processar {url}: {e}")
+        tarefas = {asyncio.ensure_future(self.obter_conteudo_pagina_async(url)): url
+                   for url in resultados_ordenados[:self.paginas_candidatas]}
+        pendentes = set(tarefas)
+        laco = asyncio.get_running_loop()
+        try:
+            while pendentes:
+                restante = None if prazo is None else max(0, prazo - laco.time())
+                prontas, pendentes = await asyncio.wait(pendentes, timeout=restante,
+                                                        return_when=asyncio.FIRST_COMPLETED)
+                if not prontas:
+                    self.rastreador.contar('prazo_esgotado', etapa='paginas')
+                    break
+                suficiente = False
+                for tarefa in prontas:
+                    url = tarefas[tarefa]
+                    try:
+                        dados = tarefa.result()
+                        if dados and dados['content']:
+                            # a página vem do cache e é compartilhada entre consultas; a relevância é desta
+                            dados = dict(dados)
+                            cobertura = ranqueador.adicionar(dados['content'])
+                            processados.append(dados)
+                            
+                            # metade dos termos da consulta num domínio de confiança máxima basta
+                            if dados['trust_score'] >= 3 and cobertura >= 0.5:
+                                suficiente = True
+                    except Exception as e:
+                        print(f"Erro ao processar {url}: {e}")
+                if suficiente:
+                    break
+        finally:
+            for tarefa in pendentes:
+                tarefa.cancel()
         
-        processados.sort(key=lambda x: (-x['relevance'], -x['trust_score']))
+        if processados:
+            notas = ranqueador.notas()
+            maior = notas.max() or 1.0
+            for dados, nota in zip(processados, notas.tolist()):
+                dados['bm25'] = nota
+                dados['relevance'] = nota / maior * dados['trust_score']
+        processados.sort(key=lambda x: (-x['relevance'], -x['trust_score'], -x['bm25']))
         return processados
 
-    def _lidar_com_pesquisa(self, consulta_pesquisa, consulta_original):
+    def _lidar_com_pesquisa(self, consulta_pesquisa, consulta_original, sessao=None):
         """método auxiliar para lidar com pesquisas genéricas"""
-        resultados = self.pesquisar_google(consulta_pesquisa)
+        return self._laco.executar(self._lidar_com_pesquisa_async(consulta_pesquisa, consulta_original, sessao))
+
+    async def _lidar_com_pesquisa_async(self, consulta_pesquisa, consulta_original, sessao=None):
+        """versão assíncrona de _lidar_com_pesquisa; a resposta fica em sessao.ultima_resposta, como em gerar_resposta"""
+        resultados = await self.pesquisar_google_async(consulta_pesquisa)
         
         if not resultados:
-            resultados = self.pesquisar_google(consulta_original)
+            resultados = await self.pesquisar_google_async(consulta_original)
         
         if not resultados:
             resposta = {
                 "response": f"Não consegui encontrar informações sobre '{consulta_original}'. Poderia reformular a pergunta?",
                 "source": None
             }
-            self.ultima_resposta = resposta
-            return resposta
-        
-        dados_paginas = self._processar_resultados_paralelo(consulta_original, resultados)
-        if not dados_paginas or not any(d['content'] for d in dados_paginas):
-            resposta = {
-                "response": f"Encontrei referências sobre '{consulta_original}', mas não consegui extrair uma explicação clara.",
-                "source": None
-            }
-            self.ultima_resposta = resposta
-            return resposta
-        
-        melhor_resultado = dados_paginas[0]
-        conteudo = melhor_resultado['content']
-        
-        resumo = self.resumir_texto(conteudo)
-        simplificado = self._limpar_texto(conteudo[:500])
-        
-        texto_resposta = f"Sobre {melhor_resultado['title']}:\n"
-        texto_resposta += f"{simplificado}\n\n"
-        if resumo and resumo not in simplificado:
-            texto_resposta += f"Resumo: {resumo}"
-        
-        resposta = {
-            "response": texto_resposta,
-            "source": {
-                "title": melhor_resultado['title'],
-                "url": melhor_resultado['url']
-            }
-        }
+        else:
+            dados_paginas = await self._processar_resultados_paralelo_async(consulta_original, resultados)
+            if not dados_paginas or not any(d['content'] for d in dados_paginas):
+                resposta = {
+                    "response": f"Encontrei referências sobre '{consulta_original}', mas não consegui extrair uma explicação clara.",
+                    "source": None
+                }
+            else:
+                resposta = await self._resposta_das_paginas_async(consulta_original, dados_paginas)
         
-        if len(conteudo.split()) > 30:
-            self.aprender_resposta(consulta_original, simplificado, sobrescrever=False)
-            
-        self.ultima_resposta = resposta
+        (sessao or self).ultima_resposta = resposta
         return resposta
 
     def aprender_e_responder(self, consulta):
         """processa a consulta e retorna uma resposta única"""
-        if consulta in self.base_conhecimento:
-            return random.choice(self.base_conhecimento[consulta])
+        return self._laco.executar(self.aprender_e_responder_async(consulta))
+
+    async def aprender_e_responder_async(self, consulta):
+        """versão assíncrona de aprender_e_responder"""
+        await self.sincronizar_async()
+        chave, encontrada = self._buscar_conhecimento(consulta)
+        self.rastreador.contar('conhecimento', resultado=encontrada or 'falha')
+        if encontrada:
+            return random.choice(self.base_conhecimento.get(chave))
         
-        resultados_pesquisa = self.pesquisar_duckduckgo(consulta)
+        resultados_pesquisa = await self.pesquisar_duckduckgo_async(consulta)
         if not resultados_pesquisa:
             return "Não consegui encontrar informações sobre isso."
         
@@ -547,20 +1092,46 @@ class AssistenteAvancado:
         
         resposta = self.parafrasear_texto(informacoes_chave)
         
-        self.base_conhecimento[consulta].append(resposta)
-        self.salvar_conhecimento()
+        if self._guardar_conhecimento(chave, resposta):
+            self.indice_conhecimento.adicionar(chave)
+            await self.salvar_conhecimento_async()
         
         return resposta
 
-    def gerar_resposta(self, consulta):
+    def gerar_resposta(self, consulta, sessao=None):
         """gera resposta com verificação de consultas curtas e fallback para erros de busca, evita 2 palavras"""
+        return self._laco.executar(self.gerar_resposta_async(consulta, sessao))
+
+    async def gerar_resposta_async(self, consulta, sessao=None):
+        """pipeline assíncrono de pesquisa, download e extração; várias consultas podem rodar no mesmo laço
+
+        a resposta fica em sessao.ultima_resposta (no próprio assistente, se não houver sessão)
+        """
+        prazo = self._novo_prazo()
+        await self.sincronizar_async()
+        with self.rastreador.span('gerar_resposta') as span:
+            resposta = self._resposta_direta(consulta)
+            if resposta is None:
+                with self.rastreador.span('memoria'):
+                    pergunta_similar = self._encontrar_pergunta_similar(consulta)
+                if pergunta_similar:
+                    resposta = self._resposta_da_memoria(pergunta_similar)
+                else:
+                    with self.rastreador.span('aprendizado_ativo'):
+                        await self.aprendizado_ativo_async(consulta)
+                    resposta = await self._resposta_da_web_async(consulta, prazo)
+            span.definir(origem=_origem(resposta))
+        (sessao or self).ultima_resposta = resposta
+        return resposta
+
+    def _resposta_direta(self, consulta):
+        """respostas que não dependem da memória nem da rede; None se a consulta precisar delas"""
         contagem_palavras = len(consulta.split())
         if contagem_palavras <= 2:
             resposta = {
                 "response": "Sua pergunta parece muito breve. Poderia elaborar ou fornecer mais detalhes? Por exemplo: em vez de 'deus grego', pergunte 'quem é o deus grego mais importante?'",
                 "source": None
             }
-            self.ultima_resposta = resposta
             return resposta
         
         respostas_simples = {
@@ -581,7 +1152,6 @@ class AssistenteAvancado:
                 "response": respostas_simples[consulta_normalizada],
                 "source": None
             }
-            self.ultima_resposta = resposta
             return resposta
         
         if consulta.lower().startswith(('aprenda que ', 'lembre que ')):
@@ -593,58 +1163,57 @@ class AssistenteAvancado:
                         "response": f"Entendido! Agora sei responder sobre '{pergunta}'.",
                         "source": None
                     }
-                    self.ultima_resposta = resposta
                     return resposta
         
-        pergunta_similar = self._encontrar_pergunta_similar(consulta)
-        if pergunta_similar:
-            resposta = {
-                "response": self.respostas_aprendidas[pergunta_similar],
-                "source": "memória"
-            }
-            self.ultima_resposta = resposta
-            return resposta
-        
-        if not pergunta_similar:
-            self.aprendizado_ativo(consulta)
-        
-        resposta_conhecimento = self.aprender_e_responder(consulta)
-        if resposta_conhecimento and "não consegui" not in resposta_conhecimento.lower():
+        return None
+
+    def _resposta_da_memoria(self, pergunta_similar):
+        return {
+            "response": self.respostas_aprendidas[pergunta_similar],
+            "source": "memória"
+        }
+
+    async def _resposta_da_web_async(self, consulta, prazo=None):
+        """provedores (base de conhecimento, google) e, se vierem links, extração das páginas, tudo até o prazo"""
+        with self.rastreador.span('provedores', espera=self.espera_provedores) as span:
+            provedor, resultado = await self._ate_o_prazo(
+                consultar_provedores(self.provedores, consulta, self.espera_provedores, self.rastreador),
+                prazo, 'provedores', (None, None))
+            span.definir(vencedor=provedor.nome if provedor else None)
+        if provedor is not None and provedor.tipo == 'texto':
             resposta = {
-                "response": resposta_conhecimento,
+                "response": resultado,
                 "source": "base de conhecimento"
             }
-            self.ultima_resposta = resposta
             return resposta
         
-        filtros_site = " OR ".join(f"site:{dominio}" for dominio in self.dominios_confiaveis)
-        consulta_pesquisa = f"{consulta} ({filtros_site})"
-        resultados = self.pesquisar_google(consulta_pesquisa)
-        
-        if not resultados:
-            resultados = self.pesquisar_google(consulta)
-        
+        resultados = resultado
         if not resultados:
             resposta = {
                 "response": "Não consegui encontrar informações relevantes. Poderia reformular a pergunta?",
                 "source": None
             }
-            self.ultima_resposta = resposta
             return resposta
         
-        dados_paginas = self._processar_resultados_paralelo(consulta, resultados)
+        with self.rastreador.span('paginas', resultados=len(resultados)):
+            dados_paginas = await self._processar_resultados_paralelo_async(consulta, resultados, prazo)
         if not dados_paginas or not any(d['content'] for d in dados_paginas):
             resposta = {
                 "response": "Encontrei referências, mas não consegui extrair uma explicação clara.",
                 "source": None
             }
-            self.ultima_resposta = resposta
             return resposta
         
+        return await self._resposta_das_paginas_async(consulta, dados_paginas)
+
+    async def _resposta_das_paginas_async(self, consulta, dados_paginas):
+        """resposta com o início e o resumo da melhor página, aprendida se a página tiver texto suficiente"""
         melhor_resultado = dados_paginas[0]
         conteudo = melhor_resultado['content']
+        documento = self.analisador.analisar(conteudo)
         
-        resumo = self.resumir_texto(conteudo)
+        with self.rastreador.span('resumo', palavras=len(documento.palavras)):
+            resumo = await self._em_processo(processos.resumir, self.resumir_texto, conteudo)
         simplificado = self._limpar_texto(conteudo[:500])
         
         texto_resposta = f"Sobre {melhor_resultado['title']}:\n"
@@ -660,12 +1229,91 @@ class AssistenteAvancado:
             }
         }
         
-        if len(conteudo.split()) > 30:
+        if len(documento.palavras) > 30:
             self.aprender_resposta(consulta, simplificado, sobrescrever=False)
             
-        self.ultima_resposta = resposta
         return resposta
 
+    def responder_lote(self, consultas, concorrencia=8):
+        """gerador de (posição, resposta) para várias consultas, na ordem em que ficam prontas"""
+        consultas = list(consultas)
+        fila = queue.Queue()
+        fim = object()
+
+        async def produzir():
+            try:
+                async for item in self.responder_lote_async(consultas, concorrencia):
+                    fila.put(item)
+            finally:
+                fila.put(fim)
+
+        futuro = self._laco.submeter(produzir())
+        try:
+            while True:
+                item = fila.get()
+                if item is fim:
+                    break
+                yield item
+            futuro.result()
+        finally:
+            futuro.cancel()
+
+    async def responder_lote_async(self, consultas, concorrencia=8):
+        """responde várias consultas, entregando (posição, resposta) conforme cada uma termina
+
+        a busca na memória é feita uma vez para o lote todo, consultas repetidas são
+        respondidas uma vez só e pesquisas e páginas em comum entre consultas são baixadas
+        uma vez. até 'concorrencia' consultas usam a rede ao mesmo tempo, dividindo o pool
+        de conexões e o executor. não há a pergunta interativa do aprendizado_ativo.
+        """
+        posicoes = defaultdict(list)
+        for posicao, consulta in enumerate(consultas):
+            posicoes[consulta].append(posicao)
+        await self.sincronizar_async()
+
+        with self.lote_aprendizado():
+            pendentes = []
+            for consulta in posicoes:
+                resposta = self._resposta_direta(consulta)
+                if resposta is None:
+                    pendentes.append(consulta)
+                    continue
+                for posicao in posicoes[consulta]:
+                    yield posicao, resposta
+
+            pela_web = []
+            for consulta, pergunta_similar in zip(pendentes, self._encontrar_perguntas_similares(pendentes)):
+                if not pergunta_similar:
+                    pela_web.append(consulta)
+                    continue
+                resposta = self._resposta_da_memoria(pergunta_similar)
+                for posicao in posicoes[consulta]:
+                    yield posicao, resposta
+
+            semaforo = asyncio.Semaphore(concorrencia)
+
+            async def responder(consulta):
+                async with semaforo:
+                    try:
+                        with self.rastreador.span('gerar_resposta', lote=True):
+                            return consulta, await self._resposta_da_web_async(consulta, self._novo_prazo())
+                    except Exception as e:
+                        print(f"Erro ao responder '{consulta}': {e}")
+                        return consulta, {
+                            "response": "Não consegui encontrar informações relevantes. Poderia reformular a pergunta?",
+                            "source": None
+                        }
+
+            tarefas = [asyncio.ensure_future(responder(consulta)) for consulta in pela_web]
+            try:
+                for proxima in asyncio.as_completed(tarefas):
+                    consulta, resposta = await proxima
+                    for posicao in posicoes[consulta]:
+                        yield posicao, resposta
+            finally:
+                for tarefa in tarefas:
+                    tarefa.cancel()
+
     def executar(self):
         """loop principal com aprendizado e tratamento robusto de erros"""
         print("Assistente: Olá, Sou a Pítia, sua assistente virtual. Como posso ajudar? (Digite 'sair' para encerrar)")
@@ -677,6 +1325,7 @@ class AssistenteAvancado:
                     continue
                     
                 if consulta.lower() in {'sair', 'parar', 'adeus', 'exit', 'quit'}:
+                    self.fechar()
                     print("Assistente: Até logo! Estarei aqui se precisar.")
                     break
                     
@@ -702,6 +1351,7 @@ class AssistenteAvancado:
                     print(f"URL: {resultado['source']['url']}\n")
                 
             except KeyboardInterrupt:
+                self.fechar()
                 print("Encerrando a assistente...")
                 break
             except Exception as e:
@@ -0,0 +1,274 @@
+"""
+   Arena de textos da Pítia: memória e base de conhecimento num arquivo mapeado, só leitura.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from collections.abc import MutableMapping
+
+# assinatura, geração, entradas, textos, posições da tabela, ids de valores, bytes dos textos
+_CABECALHO = struct.Struct('<8sQQQQQQ')
+_ASSINATURA = b'PITIARN1'
+_AUSENTE = object()
+
+
+def _alinhar(tamanho):
+    return (tamanho + 7) & ~7
+
+
+def escrever_arena(caminho, itens, geracao=1):
+    """grava [(chave, [valores...]), ...] como arena, de forma atômica
+
+    cada texto distinto (chave ou valor) é guardado uma vez só, em utf-8, num único bloco;
+    as entradas apontam para ele por ids em arrays, e uma tabela hash de endereçamento
+    aberto (crc32 da chave) leva da chave à entrada. os arrays ficam na ordem de bytes
+    da máquina que gravou.
+    """
+    ids = {}
+    deslocamentos = array('Q', [0])
+    blocos = []
+    chaves = array('I')
+    inicio_valores = array('I', [0])
+    valores = array('I')
+    hashes = []
+
+    def internar(texto):
+        id_texto = ids.get(texto)
+        if id_texto is None:
+            codificado = texto.encode('utf-8', 'surrogatepass')
+            id_texto = ids[texto] = len(blocos)
+            blocos.append(codificado)
+            deslocamentos.append(deslocamentos[-1] + len(codificado))
+        return id_texto
+
+    for chave, lista in itens:
+        chaves.append(internar(chave))
+        hashes.append(zlib.crc32(blocos[chaves[-1]]))
+        valores.extend(internar(valor) for valor in lista)
+        inicio_valores.append(len(valores))
+
+    tamanho_tabela = 8
+    while tamanho_tabela < 2 * len(chaves):
+        tamanho_tabela *= 2
+    tabela = array('I', bytes(4 * tamanho_tabela))
+    mascara = tamanho_tabela - 1
+    for entrada, valor_hash in enumerate(hashes):
+        posicao = valor_hash & mascara
+        while tabela[posicao]:
+            posicao = (posicao + 1) & mascara
+        tabela[posicao] = entrada + 1
+
+    # nome único: processos compactando ao mesmo tempo não gravam no mesmo temporário
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=f"{nome}.", suffix='.tmp', dir=pasta)
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            f.write(_CABECALHO.pack(_ASSINATURA, geracao, len(chaves), len(blocos), tamanho_tabela,
+                                    len(valores), deslocamentos[-1]))
+            for parte in (deslocamentos, chaves, inicio_valores, valores, tabela):
+                dados = parte.tobytes()
+                f.write(dados + bytes(_alinhar(len(dados)) - len(dados)))
+            f.write(b''.join(blocos))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+class ArenaTextos:
+    """leitura de uma arena gravada por escrever_arena, por mmap
+
+    nada é copiado para o heap ao abrir: as páginas do arquivo são compartilhadas entre
+    os processos que abrem a mesma arena, e cada consulta só decodifica a chave e os
+    valores da entrada pedida.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assinatura, self.geracao, entradas, textos, tamanho_tabela, total_valores, self.tamanho_blob = \
+            _CABECALHO.unpack_from(self._mapa, 0)
+        if assinatura != _ASSINATURA:
+            self._mapa.close()
+            raise ValueError(f"{caminho} não é uma arena da Pítia")
+        visao = memoryview(self._mapa)
+        posicao = _CABECALHO.size
+
+        def fatia(formato, quantidade):
+            nonlocal posicao
+            tamanho = quantidade * (8 if formato == 'Q' else 4)
+            parte = visao[posicao:posicao + tamanho].cast(formato)
+            posicao += _alinhar(tamanho)
+            return parte
+
+        self._deslocamentos = fatia('Q', textos + 1)
+        self._chaves = fatia('I', entradas)
+        self._inicio_valores = fatia('I', entradas + 1)
+        self._valores = fatia('I', total_valores)
+        self._tabela = fatia('I', tamanho_tabela)
+        self._inicio_blob = posicao
+        self._mascara = tamanho_tabela - 1
+        self.textos = textos
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def _bytes(self, id_texto):
+        inicio = self._inicio_blob + self._deslocamentos[id_texto]
+        return self._mapa[inicio:self._inicio_blob + self._deslocamentos[id_texto + 1]]
+
+    def _texto(self, id_texto):
+        return self._bytes(id_texto).decode('utf-8', 'surrogatepass')
+
+    def _entrada(self, chave):
+        codificada = chave.encode('utf-8', 'surrogatepass')
+        tabela, chaves, deslocamentos, mapa, base = (self._tabela, self._chaves, self._deslocamentos,
+                                                     self._mapa, self._inicio_blob)
+        posicao = zlib.crc32(codificada) & self._mascara
+        while True:
+            entrada = tabela[posicao]
+            if not entrada:
+                return -1
+            id_texto = chaves[entrada - 1]
+            if mapa[base + deslocamentos[id_texto]:base + deslocamentos[id_texto + 1]] == codificada:
+                return entrada - 1
+            posicao = (posicao + 1) & self._mascara
+
+    def __contains__(self, chave):
+        return self._entrada(chave) >= 0
+
+    def obter(self, chave, padrao=None):
+        """lista de valores da chave, ou padrao"""
+        entrada = self._entrada(chave)
+        if entrada < 0:
+            return padrao
+        return self._lista(entrada)
+
+    def _lista(self, entrada):
+        return [self._texto(self._valores[i])
+                for i in range(self._inicio_valores[entrada], self._inicio_valores[entrada + 1])]
+
+    def primeiro(self, chave, padrao=None):
+        """só o primeiro valor da chave, sem montar a lista"""
+        entrada = self._entrada(chave)
+        if entrada < 0 or self._inicio_valores[entrada] == self._inicio_valores[entrada + 1]:
+            return padrao
+        return self._texto(self._valores[self._inicio_valores[entrada]])
+
+    def chaves(self):
+        for id_texto in self._chaves:
+            yield self._texto(id_texto)
+
+    def itens(self):
+        for entrada, id_texto in enumerate(self._chaves):
+            yield self._texto(id_texto), self._lista(entrada)
+
+    def tamanho_bytes(self):
+        return len(self._mapa)
+
+    def fechar(self):
+        for visao in (self._deslocamentos, self._chaves, self._inicio_valores, self._valores, self._tabela):
+            visao.release()
+        self._mapa.close()
+
+
+class MapaCompacto(MutableMapping):
+    """dict de textos sobre uma arena só leitura, com as alterações num dict por cima
+
+    com listas=False cada chave tem um texto (como respostas_aprendidas); com listas=True,
+    uma lista de textos (como base_conhecimento), e fabrica faz o papel do defaultdict.
+    uma lista lida da arena é copiada para a camada de cima, então alterá-la no lugar
+    vale como no dict. a camada de cima só guarda o que mudou desde a última arena.
+    """
+
+    def __init__(self, arena=None, listas=False, fabrica=None):
+        self.arena = arena
+        self.listas = listas
+        self.fabrica = fabrica
+        self.sobreposicao = {}
+        self._novas = 0  # chaves da sobreposição que não existem na arena
+
+    def _da_arena(self, chave):
+        if self.arena is None:
+            return _AUSENTE
+        if self.listas:
+            return self.arena.obter(chave, _AUSENTE)
+        return self.arena.primeiro(chave, _AUSENTE)
+
+    def __getitem__(self, chave):
+        valor = self.sobreposicao.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        valor = self._da_arena(chave)
+        if valor is _AUSENTE:
+            if self.fabrica is None:
+                raise KeyError(chave)
+            valor = self.fabrica()
+            self._novas += 1
+        elif not self.listas:
+            return valor
+        self.sobreposicao[chave] = valor
+        return valor
+
+    def get(self, chave, padrao=None):
+        valor = self.sobreposicao.get(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = self._da_arena(chave)
+        return padrao if valor is _AUSENTE else valor
+
+    def __setitem__(self, chave, valor):
+        if chave not in self.sobreposicao and (self.arena is None or chave not in self.arena):
+            self._novas += 1
+        self.sobreposicao[chave] = valor
+
+    def __delitem__(self, chave):
+        raise TypeError("MapaCompacto não remove chaves; regrave o estado sem elas")
+
+    def __contains__(self, chave):
+        return chave in self.sobreposicao or (self.arena is not None and chave in self.arena)
+
+    def __len__(self):
+        return (len(self.arena) if self.arena is not None else 0) + self._novas
+
+    def __iter__(self):
+        if self.arena is not None:
+            yield from self.arena.chaves()
+            yield from (chave for chave in list(self.sobreposicao) if chave not in self.arena)
+        else:
+            yield from list(self.sobreposicao)
+
+    def itens_listas(self):
+        """(chave, lista de valores) de todas as entradas, no formato de escrever_arena"""
+        for chave in self:
+            valor = self.get(chave)
+            yield chave, valor if self.listas else [valor]
+
+    def instantaneo(self):
+        """cópia que não muda mais: a mesma arena, só leitura, e uma cópia da camada de cima"""
+        copia = MapaCompacto(self.arena, self.listas)
+        copia.sobreposicao = {chave: list(valor) if self.listas else valor
+                              for chave, valor in self.sobreposicao.items()}
+        copia._novas = self._novas
+        return copia
+
+    def assumir(self, outro):
+        """passa a mostrar o conteúdo de outro MapaCompacto, sem copiar nada"""
+        self.arena, self.sobreposicao, self._novas = outro.arena, outro.sobreposicao, outro._novas
+
+    def estatisticas(self):
+        bytes_arena = self.arena.tamanho_bytes() if self.arena is not None else 0
+        return {
+            'entradas': len(self),
+            'bytes_arena': bytes_arena,
+            'bytes_por_entrada': bytes_arena / len(self.arena) if self.arena is not None and len(self.arena) else 0.0,
+            'textos_distintos': self.arena.textos if self.arena is not None else 0,
+            'entradas_em_memoria': len(self.sobreposicao),
+        }
@@ -0,0 +1,510 @@
+"""
+   Armazenamento persistente da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import json
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+    import msvcrt
+
+from pitia.arena import ArenaTextos, MapaCompacto, escrever_arena
+
+
+@contextmanager
+def gravacao_atomica(caminho, sincronizar=True):
+    """arquivo binário que só substitui caminho (os.replace) se tudo for gravado sem erro
+
+    o temporário tem nome único na mesma pasta, então processos que gravam o mesmo
+    arquivo ao mesmo tempo não usam o mesmo temporário; com erro, ele é apagado.
+    """
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=f"{nome}.", suffix='.tmp', dir=pasta)
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            yield f
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+class TravaArquivo:
+    """trava exclusiva entre processos num arquivo próprio, reentrante dentro do processo
+
+    fica num arquivo separado porque os dados são trocados por os.replace na compactação,
+    e uma trava no arquivo antigo não valeria para o novo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.RLock()
+        self._arquivo = None
+        self._profundidade = 0
+
+    def __enter__(self):
+        self._local.acquire()
+        if not self._profundidade:
+            self._arquivo = open(self.caminho, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+            else:
+                self._arquivo.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass  # LK_LOCK desiste depois de 10 s
+        self._profundidade += 1
+        return self
+
+    def __exit__(self, tipo, erro, rastro):
+        self._profundidade -= 1
+        if not self._profundidade:
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            else:
+                self._arquivo.seek(0)
+                msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+            self._arquivo.close()
+            self._arquivo = None
+        self._local.release()
+
+
+class Armazenamento:
+    """interface dos backends de armazenamento chave-valor usados pela assistente"""
+
+    def existe(self):
+        """indica se já há dados gravados neste armazenamento"""
+        raise NotImplementedError
+
+    def carregar(self):
+        """retorna o estado completo como dict"""
+        raise NotImplementedError
+
+    def definir(self, chave, valor):
+        """registra chave = valor"""
+        raise NotImplementedError
+
+    def anexar(self, chave, valor):
+        """acrescenta valor à lista guardada em chave"""
+        raise NotImplementedError
+
+    def descarregar(self):
+        """garante que os registros pendentes foram gravados"""
+        raise NotImplementedError
+
+    def precisa_compactar(self, tamanho_estado):
+        return False
+
+    def compactar(self, estado):
+        """reescreve o armazenamento contendo apenas o estado atual"""
+        raise NotImplementedError
+
+    def acompanhar(self, estado):
+        """aplica ao estado o que outros processos gravaram; retorna as chaves alteradas"""
+        return []
+
+    @contextmanager
+    def trava(self):
+        """exclusão para ler, alterar e gravar o estado sem perder o que outros gravaram"""
+        yield
+
+    @contextmanager
+    def alterando(self):
+        """exclusão curta para alterar o estado em memória junto com definir/anexar"""
+        yield
+
+    def fechar(self):
+        self.descarregar()
+
+
+class ArmazenamentoLog(Armazenamento):
+    """log append-only em json lines, com compactação periódica e tolerante a falhas na escrita
+
+    cada alteração vira uma linha {"op": ..., "k": ..., "v": ...}; gravar custa O(1)
+    independente do tamanho do histórico. uma linha final incompleta (queda no meio
+    da escrita, sem o '\n') é cortada do arquivo na leitura; uma linha completa que não
+    é json válido é só pulada e contada, e os registros depois dela continuam valendo.
+
+    com compartilhado=True vários processos usam o mesmo log: gravar, compactar e carregar
+    passam por uma trava de arquivo (caminho + '.trava'), e acompanhar lê só o que os
+    outros acrescentaram desde a última leitura, pulando os trechos gravados por este
+    processo. a primeira linha de um log compactado diz sua geração, que sobe a cada
+    compactação; se ela mudou, outro processo compactou e acompanhar recarrega tudo.
+
+    trava() protege o arquivo e pode esperar o disco e outros processos; alterando() só
+    protege o estado e os registros pendentes, e é a única que definir e anexar pegam.
+    descarregar, compactar e acompanhar seguram alterando() só para trocar os pendentes,
+    tirar um instantâneo ou aplicar o que leram, então podem rodar em outra thread sem
+    travar quem altera o estado (como um laço de eventos).
+    """
+
+    def __init__(self, caminho, fator_compactacao=2.0, minimo_compactacao=1000, sincronizar=False,
+                 compartilhado=False):
+        self.caminho = caminho
+        self.fator_compactacao = fator_compactacao    # compacta quando registros > fator * chaves
+        self.minimo_compactacao = minimo_compactacao  # não compacta logs pequenos
+        self.sincronizar = sincronizar                # faz fsync a cada descarga
+        self.compartilhado = compartilhado
+        self._pendentes = []
+        self._registros = 0
+        self._trava = threading.RLock()
+        self._trava_estado = threading.RLock()
+        self._trava_arquivo = TravaArquivo(f"{caminho}.trava") if compartilhado else None
+        self._geracao = None  # geração do log lido por último; None se ele não existia
+        self._posicao = 0     # até onde o log foi lido
+        self._proprios = {}   # início -> fim dos trechos gravados por este processo depois de _posicao
+
+    @contextmanager
+    def trava(self):
+        with self._trava:
+            if self._trava_arquivo is None:
+                yield
+            else:
+                with self._trava_arquivo:
+                    yield
+
+    def alterando(self):
+        return self._trava_estado
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+    def carregar(self, estado=None):
+        """reproduz o log e retorna o estado atual; com estado, reaproveita esse objeto em vez de criar outro"""
+        novo = self._ler_tudo()
+        if estado is None:
+            return novo
+        with self._trava_estado:
+            self._substituir(estado, novo)
+        return estado
+
+    def _ler_tudo(self):
+        with self.trava():
+            estado = self._novo_estado()
+            self._registros = 0
+            self._geracao, self._posicao, self._proprios = None, 0, {}
+            if not os.path.exists(self.caminho):
+                return estado
+
+            posicao_valida = 0
+            corrompidos = 0
+            with open(self.caminho, 'rb') as f:
+                self._geracao = self._ler_geracao(f)
+                f.seek(0)
+                for linha in f:
+                    if not linha.endswith(b'\n'):
+                        break  # só a última linha pode não ter o '\n'
+                    posicao_valida += len(linha)
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        corrompidos += 1
+                        continue
+                    self._aplicar(estado, registro)
+                    self._registros += 1
+            if corrompidos:
+                print(f"Aviso: {corrompidos} registros ilegíveis ignorados em {self.caminho}")
+
+            # descarta a linha final incompleta para que os próximos registros fiquem legíveis
+            if posicao_valida < os.path.getsize(self.caminho):
+                print(f"Aviso: registro incompleto descartado em {self.caminho}")
+                with open(self.caminho, 'r+b') as f:
+                    f.truncate(posicao_valida)
+            self._posicao = posicao_valida
+        return estado
+
+    def _novo_estado(self):
+        return {}
+
+    @staticmethod
+    def _substituir(estado, novo):
+        """deixa estado igual a novo sem esvaziá-lo antes, para quem lê ao mesmo tempo"""
+        if isinstance(estado, MapaCompacto):
+            estado.assumir(novo)
+            return
+        estado.update(novo)
+        for chave in [chave for chave in estado if chave not in novo]:
+            del estado[chave]
+
+    @staticmethod
+    def _instantaneo(estado):
+        """cópia do estado para gravar sem segurar alterando(); as listas são alteradas no lugar"""
+        if isinstance(estado, MapaCompacto):
+            return estado.instantaneo()
+        return {chave: list(valor) if isinstance(valor, list) else valor for chave, valor in estado.items()}
+
+    @staticmethod
+    def _ler_geracao(f):
+        """geração do log aberto em f, dita na primeira linha desde a primeira compactação; 0 se não houver"""
+        f.seek(0)
+        try:
+            registro = json.loads(f.readline())
+            if registro.get('op') == 'geracao':
+                return registro['v']
+        except (ValueError, AttributeError):
+            pass
+        return 0
+
+    def acompanhar(self, estado):
+        """aplica ao estado os registros que outros processos acrescentaram desde a última leitura
+
+        retorna as chaves alteradas. se o log foi compactado por outro processo, recarrega
+        tudo no mesmo objeto, reaplica o que este ainda não gravou e retorna todas as chaves.
+        """
+        with self._trava:
+            try:
+                f = open(self.caminho, 'rb')
+            except FileNotFoundError:
+                return []
+            with f:
+                if self._ler_geracao(f) == self._geracao:
+                    return self._ler_novos(estado, f)
+            novo = self._ler_tudo()
+            with self._trava_estado:
+                for registro in self._pendentes:
+                    self._aplicar(novo, registro)
+                self._substituir(estado, novo)
+            return list(estado)
+
+    def _ler_novos(self, estado, f):
+        registros = []
+        posicao = self._posicao
+        fim_proprio = 0
+        f.seek(posicao)
+        for linha in f:
+            if not linha.endswith(b'\n'):
+                break  # ainda sendo escrita
+            inicio, posicao = posicao, posicao + len(linha)
+            fim_proprio = max(fim_proprio, self._proprios.pop(inicio, 0))
+            if inicio < fim_proprio:
+                continue
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                continue  # linha completa e ilegível: pulada, como em carregar
+            registros.append(registro)
+        self._posicao = posicao
+        with self._trava_estado:
+            for registro in registros:
+                self._aplicar(estado, registro)
+        self._registros += len(registros)
+        return [registro['k'] for registro in registros if 'k' in registro]
+
+    @staticmethod
+    def _aplicar(estado, registro):
+        operacao = registro.get('op')
+        if operacao == 'set':
+            valor = registro['v']
+            estado[registro['k']] = list(valor) if isinstance(valor, list) else valor
+        elif operacao == 'add':
+            estado.setdefault(registro['k'], []).append(registro['v'])
+
+    def definir(self, chave, valor):
+        with self._trava_estado:
+            self._pendentes.append({'op': 'set', 'k': chave, 'v': valor})
+
+    def anexar(self, chave, valor):
+        with self._trava_estado:
+            self._pendentes.append({'op': 'add', 'k': chave, 'v': valor})
+
+    def _tomar_pendentes(self):
+        with self._trava_estado:
+            pendentes, self._pendentes = self._pendentes, []
+        return pendentes
+
+    def _devolver_pendentes(self, pendentes):
+        """recoloca, antes dos mais novos, registros que não chegaram ao disco"""
+        with self._trava_estado:
+            self._pendentes[:0] = pendentes
+
+    def descarregar(self):
+        """grava os registros pendentes com uma única escrita no fim do arquivo"""
+        with self.trava():
+            pendentes = self._tomar_pendentes()
+            if not pendentes:
+                return
+            try:
+                dados = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in pendentes)
+                with open(self.caminho, 'a+b') as f:
+                    geracao = self._ler_geracao(f)
+                    inicio = f.seek(0, os.SEEK_END)
+                    f.write(dados.encode('utf-8'))
+                    f.flush()
+                    if self.sincronizar:
+                        os.fsync(f.fileno())
+                    fim = f.tell()
+            except BaseException:
+                self._devolver_pendentes(pendentes)
+                raise
+            # o que este processo gravou não precisa ser lido de volta por acompanhar
+            if geracao == self._geracao or (self._geracao is None and inicio == 0):
+                self._geracao = geracao
+                if inicio == self._posicao:
+                    self._posicao = fim
+                else:
+                    self._proprios[inicio] = fim
+            self._registros += len(pendentes)
+
+    def precisa_compactar(self, tamanho_estado):
+        """o instantâneo tem uma linha por chave; compacta quando o log passa muito disso"""
+        return self._registros > max(self.minimo_compactacao, self.fator_compactacao * tamanho_estado)
+
+    def compactar(self, estado):
+        """troca o log por um instantâneo do estado, de forma atômica
+
+        compartilhado, antes traz para o estado o que outros processos gravaram, para não perder nada.
+        grava um instantâneo tirado sob alterando(); o que mudar durante a escrita fica pendente.
+        """
+        with self.trava():
+            if self.compartilhado:
+                self.acompanhar(estado)
+            with self._trava_estado:
+                instantaneo = self._instantaneo(estado)
+                pendentes = self._tomar_pendentes()
+            geracao = (self._geracao or 0) + 1
+            try:
+                with gravacao_atomica(self.caminho) as f:
+                    f.write((json.dumps({'op': 'geracao', 'v': geracao}) + '\n').encode('utf-8'))
+                    for chave, valor in instantaneo.items():
+                        registro = {'op': 'set', 'k': chave, 'v': valor}
+                        f.write((json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8'))
+            except BaseException:
+                self._devolver_pendentes(pendentes)
+                raise
+            self._registros = len(instantaneo)
+            self._lido_ate_o_fim(geracao)
+
+    def _lido_ate_o_fim(self, geracao):
+        self._geracao, self._posicao, self._proprios = geracao, os.path.getsize(self.caminho), {}
+
+
+class ArmazenamentoArena(ArmazenamentoLog):
+    """instantâneo numa arena mapeada em memória (pitia.arena) mais um log só com o que mudou depois
+
+    carregar retorna um MapaCompacto: as entradas do instantâneo ficam no arquivo, fora do
+    heap, e só as alterações posteriores ocupam memória. listas=True guarda listas de textos
+    (base de conhecimento) em vez de um texto por chave. a primeira linha do log diz a que
+    geração da arena ele se refere; um log de geração anterior (queda entre gravar a arena e
+    trocar o log) já está todo na arena e é descartado. um log sem essa linha, das versões
+    antigas, vale como geração 0 e vira arena na primeira compactação. como o log só guarda
+    o que ainda está no heap, o fator de compactação padrão é bem menor que o do log puro.
+
+    compactar e carregar trocam self.arena sem fechar a anterior: um leitor em outra thread
+    pode estar no meio de uma consulta a ela, e um instantâneo ainda pode usá-la. a arena
+    antiga (e seu mmap) é liberada quando o último MapaCompacto que a usa a solta, o que no
+    CPython acontece na hora, já que ela não entra em ciclos de referência.
+    """
+
+    def __init__(self, caminho, caminho_arena=None, listas=False, fator_compactacao=0.5, minimo_compactacao=1000,
+                 sincronizar=False, compartilhado=False):
+        super().__init__(caminho, fator_compactacao, minimo_compactacao, sincronizar, compartilhado)
+        self.caminho_arena = caminho_arena or os.path.splitext(caminho)[0] + '.arena'
+        self.listas = listas
+        self.arena = None
+
+    def existe(self):
+        return super().existe() or os.path.exists(self.caminho_arena)
+
+    def _novo_estado(self):
+        return MapaCompacto(self.arena, self.listas, list if self.listas else None)
+
+    def _geracao_log(self):
+        try:
+            with open(self.caminho, 'rb') as f:
+                return self._ler_geracao(f)
+        except OSError:
+            return 0
+
+    def _reiniciar_log(self, geracao):
+        with gravacao_atomica(self.caminho) as f:
+            f.write((json.dumps({'op': 'geracao', 'v': geracao}) + '\n').encode('utf-8'))
+        self._registros = 1
+        self._lido_ate_o_fim(geracao)
+
+    def _ler_tudo(self):
+        """abre a arena e reproduz por cima dela o log da mesma geração"""
+        with self.trava():
+            self.arena = ArenaTextos(self.caminho_arena) if os.path.exists(self.caminho_arena) else None
+            geracao = self.arena.geracao if self.arena is not None else 0
+            if os.path.exists(self.caminho) and self._geracao_log() < geracao:
+                print(f"Aviso: {self.caminho} é anterior a {self.caminho_arena} e foi descartado")
+                self._reiniciar_log(geracao)
+            return super()._ler_tudo()
+
+    def compactar(self, estado):
+        """grava o estado numa arena nova e recomeça o log, vazio, apontando para ela
+
+        se estado for o MapaCompacto carregado daqui, ele passa a ler da arena nova e o que
+        estava no heap é liberado, menos o que foi alterado durante a escrita.
+        """
+        with self.trava():
+            if self.compartilhado:
+                self.acompanhar(estado)
+            with self._trava_estado:
+                instantaneo = self._instantaneo(estado)
+                pendentes = self._tomar_pendentes()
+            geracao = max(self.arena.geracao if self.arena is not None else 0, self._geracao or 0) + 1
+            if isinstance(instantaneo, MapaCompacto):
+                itens = instantaneo.itens_listas()
+            else:
+                itens = ((chave, valor if self.listas else [valor]) for chave, valor in instantaneo.items())
+            try:
+                escrever_arena(self.caminho_arena, itens, geracao)
+                self._reiniciar_log(geracao)
+            except BaseException:
+                self._devolver_pendentes(pendentes)
+                raise
+            self.arena = ArenaTextos(self.caminho_arena)
+            if isinstance(estado, MapaCompacto):
+                novo = self._novo_estado()
+                with self._trava_estado:
+                    for registro in self._pendentes:
+                        self._aplicar(novo, registro)
+                    estado.assumir(novo)
+
+
+def migrar_json(armazenamento, caminho_json):
+    """importa uma única vez o assistant_memory.json antigo para o armazenamento novo"""
+    if armazenamento.existe() or not os.path.exists(caminho_json):
+        return False
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+        armazenamento.compactar(estado)
+        print(f"Memória migrada de {caminho_json} para {armazenamento.caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao migrar memória: {e}")
+        return False
+
+
+def migrar_pickle(armazenamento, caminho_pickle):
+    """importa uma única vez o knowledge.pkl antigo para o armazenamento novo"""
+    if armazenamento.existe() or not os.path.exists(caminho_pickle):
+        return False
+    try:
+        with open(caminho_pickle, 'rb') as f:
+            estado = {chave: list(valores) for chave, valores in pickle.load(f).items()}
+        armazenamento.compactar(estado)
+        print(f"Conhecimento migrado de {caminho_pickle} para {armazenamento.caminho}")
+        return True
+    except Exception as e:
+        print(f"Erro ao migrar conhecimento: {e}")
+        return False
@@ -0,0 +1,362 @@
+"""
+   Cache em duas camadas da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def tamanho_aproximado(valor):
+    """estimativa barata do tamanho em bytes de valores json (str, números, listas e dicts)"""
+    if isinstance(valor, str):
+        return len(valor)
+    if isinstance(valor, dict):
+        return sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamanho_aproximado(v) for v in valor)
+    return 8
+
+
+class CacheMemoria:
+    """cache LRU em memória com limite de entradas, de bytes e validade por entrada"""
+
+    def __init__(self, max_entradas=1000, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl                   # validade padrão em segundos; None nunca expira
+        self._itens = OrderedDict()      # chave -> (valor, expira_em, tamanho)
+        self._bytes = 0
+        self._trava = threading.RLock()
+        self.remocoes = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave):
+        """retorna (encontrado, valor); entradas vencidas contam como ausentes"""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return False, None
+            valor, expira_em, _ = item
+            if expira_em is not None and expira_em <= time.time():
+                self._remover(chave)
+                return False, None
+            self._itens.move_to_end(chave)
+            return True, valor
+
+    def guardar(self, chave, valor, ttl=None, expira_em=None):
+        ttl = self.ttl if ttl is None else ttl
+        if expira_em is None and ttl is not None:
+            expira_em = time.time() + ttl
+        tamanho = tamanho_aproximado(valor)
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, expira_em, tamanho)
+            self._bytes += tamanho
+            while self._itens and (len(self._itens) > self.max_entradas or self._bytes > self.max_bytes):
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+
+    def _remover(self, chave):
+        _, _, tamanho = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def remover(self, chave):
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+
+class CacheDisco:
+    """camada persistente em sqlite, sobrevive a reinícios do processo"""
+
+    def __init__(self, caminho, ttl=7 * 24 * 3600):
+        self.caminho = caminho
+        self.ttl = ttl
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_em REAL)"
+        )
+
+    def obter(self, chave):
+        """retorna (encontrado, valor, expira_em)"""
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT valor, expira_em FROM cache WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                return False, None, None
+            valor, expira_em = linha
+            if expira_em is not None and expira_em <= time.time():
+                self._conexao.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+                return False, None, None
+        return True, json.loads(valor), expira_em
+
+    def guardar(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira_em = time.time() + ttl if ttl is not None else None
+        dados = json.dumps(valor, ensure_ascii=False)
+        with self._trava:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, expira_em) VALUES (?, ?, ?)",
+                (chave, dados, expira_em)
+            )
+
+    def remover(self, chave):
+        with self._trava:
+            self._conexao.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+
+    def limpar_vencidos(self):
+        with self._trava:
+            return self._conexao.execute(
+                "DELETE FROM cache WHERE expira_em IS NOT NULL AND expira_em <= ?", (time.time(),)
+            ).rowcount
+
+    def limpar(self):
+        with self._trava:
+            self._conexao.execute("DELETE FROM cache")
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
+
+
+class CacheValidacao:
+    """validadores http (ETag, Last-Modified) de cada url, em sqlite, limitados a max_entradas
+
+    a extração da página não fica aqui: cada entrada guarda só a chave dela no
+    CacheDuasCamadas (veja obter_validado), que tem seus próprios limites. depois que o
+    cache comum da página vence, ela é pedida com If-None-Match/If-Modified-Since e um 304
+    reaproveita a extração sem baixar nem interpretar o html de novo. passando de
+    max_entradas, as entradas renovadas há mais tempo são apagadas. com caminho ':memory:'
+    vale só enquanto o processo roda.
+    """
+
+    def __init__(self, caminho=':memory:', ttl=30 * 24 * 3600, max_entradas=10000):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        if caminho != ':memory:':
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+        # a tabela antiga guardava também o conteúdo das páginas
+        self._conexao.execute("DROP TABLE IF EXISTS validacao")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS validadores (url TEXT PRIMARY KEY, etag TEXT, ultima_modificacao TEXT, "
+            "chave TEXT NOT NULL, bytes INTEGER, segundos_extracao REAL, gravado_em REAL NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS validadores_gravado_em ON validadores (gravado_em)")
+        self._entradas = self._conexao.execute("SELECT COUNT(*) FROM validadores").fetchone()[0]
+        self.revalidacoes = 0
+        self.nao_modificados = 0
+        self.bytes_economizados = 0
+        self.extracao_evitada_s = 0.0
+        self.remocoes = 0
+
+    def __len__(self):
+        return self._entradas
+
+    def obter(self, url):
+        """entrada gravada para a url (dict), ou None"""
+        with self._trava:
+            linha = self._conexao.execute(
+                "SELECT etag, ultima_modificacao, chave, bytes, segundos_extracao, gravado_em "
+                "FROM validadores WHERE url = ?", (url,)
+            ).fetchone()
+            if linha is None:
+                return None
+            if self.ttl is not None and linha[5] + self.ttl <= time.time():
+                self._remover(url)
+                return None
+        etag, ultima_modificacao, chave, tamanho, segundos, _ = linha
+        return {'etag': etag, 'ultima_modificacao': ultima_modificacao, 'chave': chave,
+                'bytes': tamanho, 'segundos_extracao': segundos}
+
+    def cabecalhos_condicionais(self, entrada):
+        """cabeçalhos para revalidar a entrada; conta uma revalidação"""
+        cabecalhos = {}
+        if entrada['etag']:
+            cabecalhos['If-None-Match'] = entrada['etag']
+        if entrada['ultima_modificacao']:
+            cabecalhos['If-Modified-Since'] = entrada['ultima_modificacao']
+        if cabecalhos:
+            self.revalidacoes += 1
+        return cabecalhos
+
+    def nao_modificado(self, url, entrada):
+        """registra um 304: o que deixou de ser baixado e interpretado, e renova a entrada"""
+        self.nao_modificados += 1
+        self.bytes_economizados += entrada['bytes'] or 0
+        self.extracao_evitada_s += entrada['segundos_extracao'] or 0.0
+        with self._trava:
+            self._conexao.execute("UPDATE validadores SET gravado_em = ? WHERE url = ?", (time.time(), url))
+
+    def guardar(self, url, cabecalhos, chave, tamanho, segundos_extracao):
+        """grava os validadores da resposta e a chave da extração; sem ETag nem Last-Modified não há o que guardar"""
+        etag = cabecalhos.get('ETag')
+        ultima_modificacao = cabecalhos.get('Last-Modified')
+        if not etag and not ultima_modificacao:
+            return False
+        with self._trava:
+            existia = self._conexao.execute("SELECT 1 FROM validadores WHERE url = ?", (url,)).fetchone()
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO validadores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, ultima_modificacao, chave, tamanho, segundos_extracao, time.time())
+            )
+            if not existia:
+                self._entradas += 1
+            excedentes = self._entradas - self.max_entradas
+            if excedentes > 0:
+                apagadas = self._conexao.execute(
+                    "DELETE FROM validadores WHERE url IN "
+                    "(SELECT url FROM validadores ORDER BY gravado_em LIMIT ?)", (excedentes,)
+                ).rowcount
+                self._entradas -= apagadas
+                self.remocoes += apagadas
+        return True
+
+    def _remover(self, url):
+        self._entradas -= self._conexao.execute("DELETE FROM validadores WHERE url = ?", (url,)).rowcount
+
+    def remover(self, url):
+        with self._trava:
+            self._remover(url)
+
+    def limpar(self):
+        with self._trava:
+            self._conexao.execute("DELETE FROM validadores")
+            self._entradas = 0
+
+    def estatisticas(self):
+        return {
+            'revalidacoes': self.revalidacoes,
+            'nao_modificados': self.nao_modificados,
+            'bytes_economizados': self.bytes_economizados,
+            'extracao_evitada_s': self.extracao_evitada_s,
+            'validadores': self._entradas,
+            'validadores_removidos': self.remocoes,
+        }
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
+
+
+class CacheDuasCamadas:
+    """memória na frente, disco opcional atrás, com contadores de acerto e falha
+
+    validacao, se houver, guarda os validadores http das páginas para o GET condicional;
+    a extração de cada página validada fica nas camadas deste cache (guardar_validado).
+    """
+
+    def __init__(self, memoria=None, disco=None, validacao=None):
+        # um CacheMemoria vazio é falso (__len__), então não dá para usar 'or' aqui
+        self.memoria = memoria if memoria is not None else CacheMemoria()
+        self.disco = disco
+        self.validacao = validacao
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+
+    def obter(self, chave, padrao=None):
+        encontrado, valor = self.memoria.obter(chave)
+        if encontrado:
+            self.acertos_memoria += 1
+            return valor
+        if self.disco is not None:
+            try:
+                encontrado, valor, expira_em = self.disco.obter(chave)
+            except Exception as e:
+                print(f"Erro ao ler cache em disco: {e}")
+                encontrado = False
+            if encontrado:
+                self.acertos_disco += 1
+                self.memoria.guardar(chave, valor, expira_em=expira_em)
+                return valor
+        self.falhas += 1
+        return padrao
+
+    def guardar(self, chave, valor, ttl=None, persistir=False):
+        """guarda na memória e, se persistir=True e houver camada de disco, também no disco"""
+        self.memoria.guardar(chave, valor, ttl=ttl)
+        if persistir and self.disco is not None:
+            try:
+                self.disco.guardar(chave, valor, ttl=ttl)
+            except Exception as e:
+                print(f"Erro ao gravar cache em disco: {e}")
+
+    def obter_validado(self, url):
+        """validadores da url com o título e o conteúdo extraídos, ou None se faltar um dos dois"""
+        if self.validacao is None:
+            return None
+        entrada = self.validacao.obter(url)
+        if entrada is None:
+            return None
+        extracao = self.obter(entrada['chave'])
+        if extracao is None:
+            # a extração saiu do cache: um 304 não teria o que devolver
+            self.validacao.remover(url)
+            return None
+        entrada['titulo'], entrada['conteudo'] = extracao
+        return entrada
+
+    def guardar_validado(self, url, cabecalhos, titulo, conteudo, tamanho, segundos_extracao):
+        """guarda a extração da página pelo tempo da validação, se a resposta tiver validadores"""
+        chave = f"validada_{url}"
+        if self.validacao is not None and self.validacao.guardar(url, cabecalhos, chave, tamanho, segundos_extracao):
+            self.guardar(chave, [titulo, conteudo], ttl=self.validacao.ttl, persistir=True)
+
+    def nao_modificado(self, url, entrada):
+        """registra o 304 e renova a extração guardada junto com os validadores"""
+        self.validacao.nao_modificado(url, entrada)
+        self.guardar(entrada['chave'], [entrada['titulo'], entrada['conteudo']], ttl=self.validacao.ttl,
+                     persistir=True)
+
+    def remover(self, chave):
+        self.memoria.remover(chave)
+        if self.disco is not None:
+            self.disco.remover(chave)
+
+    def limpar(self):
+        self.memoria.limpar()
+        if self.disco is not None:
+            self.disco.limpar()
+        if self.validacao is not None:
+            self.validacao.limpar()
+
+    def estatisticas(self):
+        consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+        return {
+            **(self.validacao.estatisticas() if self.validacao is not None else {}),
+            'entradas_memoria': len(self.memoria),
+            'bytes_memoria': self.memoria.bytes,
+            'acertos_memoria': self.acertos_memoria,
+            'acertos_disco': self.acertos_disco,
+            'falhas': self.falhas,
+            'remocoes': self.memoria.remocoes,
+            'taxa_acerto': (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+        }
+
+    def fechar(self):
+        if self.disco is not None:
+            self.disco.fechar()
+        if self.validacao is not None:
+            self.validacao.fechar()
@@ -1,9 +1,45 @@
+import argparse
+
 from pitia import AssistenteAvancado
+from pitia.metricas import ExportadorJsonLinhas, Rastreador
+from pitia.recursos import ErroRecursos
+from pitia.resumo import RESUMIDORES
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pitia", description="Pítia, assistente virtual")
+    parser.add_argument('--offline', action='store_true',
+                        help="não baixa recursos do nltk; falha logo se algum estiver faltando")
+    parser.add_argument('--rastreio', metavar='ARQUIVO',
+                        help="grava o tempo de cada etapa das respostas neste arquivo, em linhas json")
+    parser.add_argument('--espera-provedores', type=float, metavar='SEGUNDOS',
+                        help="provedores de pesquisa: sem o valor, cada um só começa se o anterior falhar; "
+                        "0 consulta todos juntos; n começa o próximo após n segundos sem resposta")
+    parser.add_argument('--resumo', choices=sorted(RESUMIDORES), default='lsa',
+                        help="algoritmo de resumo das respostas da web; lsa_rapido é bem mais rápido que o lsa "
+                        "e quase sempre escolhe as mesmas frases")
+    parser.add_argument('--processos', type=int, default=0, metavar='N',
+                        help="extrai e resume as páginas em N processos (0: nas threads)")
+    parser.add_argument('--cache', metavar='ARQUIVO',
+                        help="cache de páginas em disco, compartilhado com o pitia-ingestao")
+    parser.add_argument('--memoria-compacta', action='store_true',
+                        help="memória e base de conhecimento numa arena mapeada em memória, fora do heap")
+    parser.add_argument('--compartilhado', action='store_true',
+                        help="usa a mesma memória que outros processos (servidor, ingestão) sem sobrescrevê-la")
+    args = parser.parse_args(argv)
 
-def main():
     print("Iniciando Pítia...")
-    assistente = AssistenteAvancado()
+    rastreador = Rastreador(ao_finalizar=ExportadorJsonLinhas(args.rastreio)) if args.rastreio else None
+    assistente = AssistenteAvancado(offline=args.offline, rastreador=rastreador,
+                                    espera_provedores=args.espera_provedores, backend_resumo=args.resumo,
+                                    processos=args.processos, arquivo_cache=args.cache,
+                                    memoria_compacta=args.memoria_compacta, compartilhado=args.compartilhado)
+    if args.offline:
+        try:
+            assistente.verificar_recursos()
+        except ErroRecursos as e:
+            print(f"Erro ao iniciar: {e}")
+            return 1
     assistente.executar()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,522 @@
+"""
+   Extração de conteúdo de páginas html da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import codecs
+import re
+from html.parser import HTMLParser
+
+# elementos removidos antes da extração
+TAGS_IGNORADAS = ["script", "style", "nav", "footer", "iframe",
+                  "aside", "header", "form", "button", "img",
+                  "comment", "noscript", "svg", "figure", "video",
+                  "audio", "meta", "link", "select", "textarea"]
+
+# elementos cujo texto compõe o conteúdo
+TAGS_TEXTO = ['p', 'h1', 'h2', 'h3', 'h4', 'li']
+
+# regiões de conteúdo principal, em ordem de prioridade (casadas por atributo, como no find do bs4)
+SELETORES_CONTEUDO = [
+    {'name': 'article'},
+    {'name': 'main'},
+    {'class': 'content'},
+    {'class': 'post-content'},
+    {'class': 'article-body'},
+    {'itemprop': 'articleBody'},
+    {'id': 'content'}
+]
+
+LIMITE_CARACTERES = 5000
+
+TAGS_VAZIAS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+               'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+# fechamentos implícitos do html5, que o lxml e o selectolax aplicam ao montar a árvore: o
+# início destes elementos fecha o p aberto, se nenhum limite de escopo estiver no caminho...
+FECHAM_P = {'address', 'article', 'aside', 'blockquote', 'center', 'details', 'dialog', 'dir', 'div', 'dl', 'dd',
+            'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+            'header', 'hgroup', 'hr', 'li', 'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section', 'summary',
+            'table', 'ul'}
+LIMITES_ESCOPO = {'applet', 'button', 'caption', 'html', 'marquee', 'object', 'table', 'td', 'th', 'template'}
+# ...um li fecha o li anterior da mesma lista, uma célula fecha a anterior da mesma tabela
+# e um título fecha o título aberto logo acima
+LIMITES_LI = LIMITES_ESCOPO | {'ol', 'ul', 'menu'}
+TITULOS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+PADRAO_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def _limpeza_padrao(texto):
+    return ' '.join(texto.split())
+
+
+def detectar_codificacao(corpo):
+    """usa o charset declarado no html; sem ele, utf-8 se o início for válido, senão windows-1252"""
+    encontrado = PADRAO_CHARSET.search(corpo[:4096])
+    if encontrado:
+        codificacao = encontrado.group(1).decode('ascii')
+        try:
+            codecs.lookup(codificacao)
+            return codificacao
+        except LookupError:
+            pass
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(corpo[:64 * 1024])
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'windows-1252'
+
+
+def decodificar(corpo, codificacao=None):
+    if isinstance(corpo, str):
+        return corpo
+    try:
+        return corpo.decode(codificacao or detectar_codificacao(corpo), errors='replace')
+    except LookupError:
+        return corpo.decode(detectar_codificacao(corpo), errors='replace')
+
+
+def _juntar_blocos(textos, limpar, limite_caracteres):
+    # um NormalizadorTexto limpa o documento inteiro numa passada só
+    if hasattr(limpar, 'normalizar_blocos'):
+        textos = limpar.normalizar_blocos(list(textos))
+        limpar = str
+    elementos_texto = []
+    for texto in textos:
+        texto = limpar(texto)
+        if len(texto.split()) > 3:
+            elementos_texto.append(texto)
+    return ' '.join(elementos_texto)[:limite_caracteres] # limitação de caracteres
+
+
+def _tem_classe(atributos, classe):
+    valor = atributos.get('class') or ''
+    return classe in valor.split()
+
+
+def _texto_proprio_lxml(elemento):
+    """texto do elemento sem o dos elementos de TAGS_TEXTO dentro dele, que viram blocos à parte"""
+    if not len(elemento) or not any(filho.tag in TAGS_TEXTO for filho in elemento.iterdescendants()):
+        return elemento.text_content()
+    partes = [elemento.text or '']
+    # sem recursão; o tail de cada filho entra depois do texto dos descendentes dele
+    pilha = [(iter(elemento), '')]
+    while pilha:
+        filhos, cauda = pilha[-1]
+        filho = next(filhos, None)
+        if filho is None:
+            pilha.pop()
+            partes.append(cauda)
+        elif isinstance(filho.tag, str) and filho.tag not in TAGS_TEXTO:
+            partes.append(filho.text or '')
+            pilha.append((iter(filho), filho.tail or ''))
+        else:
+            partes.append(filho.tail or '')
+    return ''.join(partes)
+
+
+def _texto_proprio_selectolax(elemento):
+    """o mesmo que _texto_proprio_lxml, para um nó do selectolax"""
+    descendentes = elemento.traverse()
+    next(descendentes)
+    if not any(no.tag in TAGS_TEXTO for no in descendentes):
+        return elemento.text(deep=True)
+    partes = []
+    pilha = [elemento.iter(include_text=True)]
+    while pilha:
+        no = next(pilha[-1], None)
+        if no is None:
+            pilha.pop()
+        elif no.tag == '-text':
+            partes.append(no.text(deep=False))
+        elif no.tag not in TAGS_TEXTO:
+            pilha.append(no.iter(include_text=True))
+    return ''.join(partes)
+
+
+class BackendHtml:
+    """interface dos interpretadores de html; todos devem produzir a mesma saída
+
+    cada trecho de texto conta só para o elemento de TAGS_TEXTO mais próximo acima dele, e
+    p, li, células e títulos sem fechamento seguem os fechamentos implícitos do html5. assim
+    a marcação mal formada comum dá o mesmo texto em qualquer backend. casos raros ainda
+    divergem: a libxml2 do lxml segue regras do html4 (um p dentro de um span aberto), e o
+    lexbor do selectolax, sem doctype, põe fora da tabela o texto solto dentro dela.
+    """
+
+    nome = None
+
+    def extrair(self, corpo, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES):
+        """retorna (título, conteúdo) do html"""
+        raise NotImplementedError
+
+    def interpretar_duckduckgo(self, corpo, codificacao=None):
+        """retorna a lista de resultados {'title', 'url', 'snippet'} da página do duckduckgo"""
+        raise NotImplementedError
+
+
+class BackendHtmlParser(BackendHtml):
+    """html.parser da biblioteca padrão, sempre disponível
+
+    a árvore do BeautifulSoup com o html.parser não tem os fechamentos implícitos do html5
+    (um h2 ou div fecha o p aberto), então a extração usa o ExtratorIncremental, que os
+    aplica, lendo a página toda; o BeautifulSoup fica para os resultados do duckduckgo.
+    """
+
+    nome = 'html.parser'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._sopa = BeautifulSoup
+
+    def extrair(self, corpo, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES):
+        extrator = ExtratorIncremental(limpar=limpar, limite_caracteres=limite_caracteres, encerrar_cedo=False)
+        extrator.feed(decodificar(corpo, codificacao))
+        return extrator.finalizar()
+
+    def interpretar_duckduckgo(self, corpo, codificacao=None):
+        sopa = self._sopa(corpo, 'html.parser', from_encoding=codificacao if isinstance(corpo, bytes) else None)
+
+        resultados = []
+        for resultado in sopa.select('.result__body'):
+            link = resultado.select_one('.result__url')['href']
+            titulo = resultado.select_one('.result__title').text
+            snippet = resultado.select_one('.result__snippet').text
+            resultados.append({'title': titulo, 'url': link, 'snippet': snippet})
+        return resultados
+
+
+class BackendLxml(BackendHtml):
+    """parser em C da libxml2, via lxml"""
+
+    nome = 'lxml'
+
+    def __init__(self):
+        import lxml.etree
+        import lxml.html
+        self._etree = lxml.etree
+        self._html = lxml.html
+
+    def _arvore(self, corpo, codificacao):
+        return self._html.document_fromstring(decodificar(corpo, codificacao))
+
+    def extrair(self, corpo, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES):
+        arvore = self._arvore(corpo, codificacao)
+        self._etree.strip_elements(arvore, *TAGS_IGNORADAS, with_tail=False)
+
+        elemento_titulo = arvore.find('.//title')
+        titulo = elemento_titulo.text_content().strip() if elemento_titulo is not None else "Sem título"
+
+        primeiros = {}
+        for elemento in arvore.iter():
+            if not isinstance(elemento.tag, str):
+                continue
+            for indice, seletor in enumerate(SELETORES_CONTEUDO):
+                if indice not in primeiros and _casa_seletor(seletor, elemento.attrib):
+                    primeiros[indice] = elemento
+        conteudo_principal = primeiros[min(primeiros)] if primeiros else arvore.body
+
+        textos = (_texto_proprio_lxml(elemento) for elemento in conteudo_principal.iterdescendants(*TAGS_TEXTO))
+        return titulo, _juntar_blocos(textos, limpar or _limpeza_padrao, limite_caracteres)
+
+    def _primeiro_com_classe(self, elemento, classe):
+        for descendente in elemento.iterdescendants():
+            if isinstance(descendente.tag, str) and _tem_classe(descendente.attrib, classe):
+                return descendente
+        return None
+
+    def interpretar_duckduckgo(self, corpo, codificacao=None):
+        arvore = self._arvore(corpo, codificacao)
+
+        resultados = []
+        for resultado in arvore.iter():
+            if not isinstance(resultado.tag, str) or not _tem_classe(resultado.attrib, 'result__body'):
+                continue
+            link = self._primeiro_com_classe(resultado, 'result__url').attrib['href']
+            titulo = self._primeiro_com_classe(resultado, 'result__title').text_content()
+            snippet = self._primeiro_com_classe(resultado, 'result__snippet').text_content()
+            resultados.append({'title': titulo, 'url': link, 'snippet': snippet})
+        return resultados
+
+
+class BackendSelectolax(BackendHtml):
+    """parser lexbor (ou modest, em versões antigas) via selectolax"""
+
+    nome = 'selectolax'
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as Parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as Parser
+        self._parser = Parser
+
+    def extrair(self, corpo, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES):
+        arvore = self._parser(decodificar(corpo, codificacao))
+        arvore.strip_tags(TAGS_IGNORADAS)
+
+        elemento_titulo = arvore.css_first('title')
+        titulo = elemento_titulo.text(deep=True).strip() if elemento_titulo is not None else "Sem título"
+
+        primeiros = {}
+        for elemento in arvore.root.traverse():
+            for indice, seletor in enumerate(SELETORES_CONTEUDO):
+                if indice not in primeiros and _casa_seletor(seletor, elemento.attributes):
+                    primeiros[indice] = elemento
+        conteudo_principal = primeiros[min(primeiros)] if primeiros else arvore.body
+
+        descendentes = conteudo_principal.traverse()
+        next(descendentes)  # o próprio elemento não entra, como no find_all
+        textos = (_texto_proprio_selectolax(elemento) for elemento in descendentes if elemento.tag in TAGS_TEXTO)
+        return titulo, _juntar_blocos(textos, limpar or _limpeza_padrao, limite_caracteres)
+
+    def interpretar_duckduckgo(self, corpo, codificacao=None):
+        arvore = self._parser(decodificar(corpo, codificacao))
+
+        resultados = []
+        for resultado in arvore.css('.result__body'):
+            link = resultado.css_first('.result__url').attributes['href']
+            titulo = resultado.css_first('.result__title').text(deep=True)
+            snippet = resultado.css_first('.result__snippet').text(deep=True)
+            resultados.append({'title': titulo, 'url': link, 'snippet': snippet})
+        return resultados
+
+
+BACKENDS_HTML = {
+    'selectolax': BackendSelectolax,
+    'lxml': BackendLxml,
+    'html.parser': BackendHtmlParser,
+}
+
+# ordem tentada no modo automático, do mais rápido ao sempre disponível
+PREFERENCIA_BACKENDS = ['selectolax', 'lxml', 'html.parser']
+
+
+def obter_backend(nome='auto'):
+    """instancia o backend pedido; se a biblioteca faltar, cai para o próximo disponível"""
+    candidatos = PREFERENCIA_BACKENDS if nome == 'auto' else [nome] + PREFERENCIA_BACKENDS
+    for candidato in candidatos:
+        try:
+            return BACKENDS_HTML[candidato]()
+        except ImportError:
+            if candidato == nome:
+                print(f"Aviso: backend html '{nome}' indisponível, usando alternativa")
+        except KeyError:
+            print(f"Aviso: backend html desconhecido '{candidato}'")
+    return BackendHtmlParser()
+
+
+def extrair_conteudo(corpo, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES, backend=None):
+    """extração com a árvore completa do backend escolhido; retorna (título, conteúdo)"""
+    backend = backend or BackendHtmlParser()
+    return backend.extrair(corpo, codificacao, limpar, limite_caracteres)
+
+
+def _casa_seletor(seletor, atributos):
+    """mesma regra de atributos do bs4: igualdade, ou pertencer à lista no caso de class"""
+    for nome, esperado in seletor.items():
+        valor = atributos.get(nome)
+        if valor is None:
+            return False
+        if nome == 'class':
+            if esperado not in valor.split() and valor != esperado:
+                return False
+        elif valor != esperado:
+            return False
+    return True
+
+
+class ExtratorIncremental(HTMLParser):
+    """extração orientada a eventos, alimentada em partes enquanto a página é baixada
+
+    não monta árvore: guarda só os blocos de texto de cada região candidata e avisa
+    (alimentar retorna False) quando a melhor região encontrada já tem texto suficiente.
+    uma região de prioridade maior que só apareça depois desse ponto é ignorada; com
+    encerrar_cedo=False a página é lida até o fim e o resultado é o dos backends de árvore.
+    """
+
+    def __init__(self, codificacao=None, limpar=None, limite_caracteres=LIMITE_CARACTERES, encerrar_cedo=True):
+        super().__init__(convert_charrefs=True)
+        self.codificacao = codificacao
+        self.encerrar_cedo = encerrar_cedo
+        self.limpar = limpar or _limpeza_padrao
+        self.limite_caracteres = limite_caracteres
+        self._decodificador = None
+        self._pilha = []                 # tags abertas: (tag, índices de regiões, bloco ou None)
+        self._ignorando = 0              # profundidade dentro de tags ignoradas
+        self._titulo = None
+        self._no_titulo = False
+        self._partes_titulo = []
+        self._regioes = {}               # indice do seletor -> aberta (bool)
+        self._blocos = []                # [partes do texto, regiões que contêm o bloco, texto limpo]
+        self._abertos = []               # blocos de texto abertos
+        self._caracteres_regiao = {}     # indice do seletor -> caracteres aceitos
+        self.bytes_lidos = 0
+        self.encerrado = False
+
+    # alimentação
+
+    def alimentar(self, parte):
+        """recebe bytes da página; retorna False quando já há conteúdo suficiente"""
+        if self.encerrado:
+            return False
+        if self._decodificador is None:
+            codificacao = self.codificacao
+            if not codificacao:
+                codificacao = detectar_codificacao(parte)
+            try:
+                self._decodificador = codecs.getincrementaldecoder(codificacao)(errors='replace')
+            except LookupError:
+                self._decodificador = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.bytes_lidos += len(parte)
+        self.feed(self._decodificador.decode(parte))
+        if self.encerrar_cedo and self._suficiente():
+            self.encerrado = True
+        return not self.encerrado
+
+    def finalizar(self):
+        """fecha o parser e retorna (título, conteúdo)"""
+        if not self.encerrado and self._decodificador is not None:
+            self.feed(self._decodificador.decode(b'', final=True))
+        self.close()
+        while self._abertos:
+            self._fechar_bloco(self._abertos[-1])
+        return self.titulo, self.conteudo
+
+    @property
+    def titulo(self):
+        if self._titulo is not None:
+            return self._titulo
+        if self._partes_titulo:
+            return ''.join(self._partes_titulo).strip()
+        return "Sem título"
+
+    @property
+    def conteudo(self):
+        regiao = self._melhor_regiao()
+        textos = []
+        for _, regioes, texto in self._blocos:
+            if regiao is not None and regiao not in regioes:
+                continue
+            if texto:
+                textos.append(texto)
+        return ' '.join(textos)[:self.limite_caracteres]
+
+    def _melhor_regiao(self):
+        return min(self._regioes) if self._regioes else None
+
+    def _suficiente(self):
+        regiao = self._melhor_regiao()
+        if regiao is None:
+            return False
+        return self._caracteres_regiao.get(regiao, 0) >= self.limite_caracteres
+
+    # eventos do HTMLParser
+
+    def handle_starttag(self, tag, attrs):
+        if not self._ignorando:
+            self._fechar_implicitos(tag)
+        if tag in TAGS_IGNORADAS:
+            if tag not in TAGS_VAZIAS:
+                self._ignorando += 1
+                self._pilha.append((tag, (), None))
+            return
+        if self._ignorando or tag in TAGS_VAZIAS:
+            return
+
+        if tag == 'title' and self._titulo is None:
+            self._no_titulo = True
+
+        # o bloco pertence às regiões já abertas; a região aberta pelo próprio
+        # elemento só vale para os descendentes, como no find_all
+        bloco = None
+        if tag in TAGS_TEXTO:
+            regioes = {i for i, aberta in self._regioes.items() if aberta}
+            bloco = [[], regioes, None]
+            self._blocos.append(bloco)
+            self._abertos.append(bloco)
+
+        atributos = {nome: valor or '' for nome, valor in attrs}
+        # só o primeiro elemento de cada seletor conta, como no find
+        regioes_abertas = tuple(
+            indice for indice, seletor in enumerate(SELETORES_CONTEUDO)
+            if indice not in self._regioes and _casa_seletor(seletor, atributos)
+        )
+        for indice in regioes_abertas:
+            self._regioes[indice] = True
+
+        self._pilha.append((tag, regioes_abertas, bloco))
+
+    def handle_endtag(self, tag):
+        if self._ignorando and tag not in TAGS_IGNORADAS:
+            return
+        if tag == 'title':
+            if self._no_titulo:
+                self._titulo = ''.join(self._partes_titulo).strip()
+                self._no_titulo = False
+        if any(aberta == tag for aberta, _, _ in self._pilha):
+            self._desempilhar(tag)
+
+    def _fechar_implicitos(self, tag):
+        if tag in FECHAM_P:
+            self._fechar_em_escopo('p', LIMITES_ESCOPO)
+        if tag == 'li':
+            self._fechar_em_escopo('li', LIMITES_LI)
+        if tag in ('td', 'th', 'tr'):
+            for celula in ('td', 'th'):
+                self._fechar_em_escopo(celula, {'table'})
+        if tag == 'tr':
+            self._fechar_em_escopo('tr', {'table'})
+        if tag in TITULOS and self._pilha and self._pilha[-1][0] in TITULOS:
+            self._desempilhar(self._pilha[-1][0])
+
+    def _fechar_em_escopo(self, tag, limites):
+        for aberta, _, _ in reversed(self._pilha):
+            if aberta == tag:
+                self._desempilhar(tag)
+                return
+            if aberta in limites:
+                return
+
+    def _desempilhar(self, tag):
+        while self._pilha:
+            aberta, regioes, bloco = self._pilha.pop()
+            if aberta in TAGS_IGNORADAS:
+                self._ignorando -= 1
+            for regiao in regioes:
+                self._regioes[regiao] = False
+            if bloco is not None:
+                self._fechar_bloco(bloco)
+            if aberta == tag:
+                break
+
+    def _fechar_bloco(self, bloco):
+        self._abertos.remove(bloco)
+        texto = self.limpar(''.join(bloco[0]))
+        bloco[0] = None
+        if len(texto.split()) <= 3:
+            bloco[2] = ''
+            return
+        bloco[2] = texto
+        for regiao in bloco[1]:
+            self._caracteres_regiao[regiao] = self._caracteres_regiao.get(regiao, 0) + len(texto) + 1
+
+    def handle_data(self, dados):
+        if self._ignorando:
+            return
+        if self._no_titulo:
+            self._partes_titulo.append(dados)
+        # só o bloco mais interno recebe o texto, como nos backends de árvore
+        if self._abertos:
+            self._abertos[-1][0].append(dados)
+
+
+def extrair_conteudo_incremental(corpo, codificacao=None, limpar=None,
+                                 limite_caracteres=LIMITE_CARACTERES, tamanho_parte=64 * 1024):
+    """alimenta o extrator incremental com um corpo já em memória, em partes"""
+    extrator = ExtratorIncremental(codificacao, limpar, limite_caracteres)
+    for inicio in range(0, len(corpo), tamanho_parte):
+        if not extrator.alimentar(corpo[inicio:inicio + tamanho_parte]):
+            break
+    return extrator.finalizar()
@@ -0,0 +1,257 @@
+"""
+   Índice de similaridade incremental da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import heapq
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+
+from pitia.armazenamento import gravacao_atomica
+
+# mesmo padrão de tokens do TfidfVectorizer usado antes, para manter os limiares
+PADRAO_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def tokenizar(texto):
+    """quebra o texto em termos minúsculos"""
+    return PADRAO_TOKEN.findall(texto.lower())
+
+
+def _contar_palavra(texto, termo):
+    """ocorrências de termo como palavra inteira em texto (os dois em minúsculas)"""
+    contagem = 0
+    tamanho = len(termo)
+    inicio = texto.find(termo)
+    while inicio >= 0:
+        fim = inicio + tamanho
+        if ((inicio == 0 or not (texto[inicio - 1].isalnum() or texto[inicio - 1] == '_'))
+                and (fim == len(texto) or not (texto[fim].isalnum() or texto[fim] == '_'))):
+            contagem += 1
+        inicio = texto.find(termo, fim)
+    return contagem
+
+
+class RanqueadorBm25:
+    """nota BM25 de páginas candidatas para uma consulta
+
+    ao chegar (adicionar), cada página só tem contados os termos da consulta, por busca
+    de substring com conferência das bordas, e o comprimento estimado pelos espaços; a
+    página não é tokenizada inteira. notas() pontua todas juntas numa operação matricial
+    sobre páginas × termos da consulta, com o idf e o comprimento médio do próprio
+    conjunto de candidatas.
+    """
+
+    def __init__(self, consulta, k1=1.5, b=0.75):
+        self.termos = list(dict.fromkeys(tokenizar(consulta)))
+        self.k1 = k1
+        self.b = b
+        self.frequencias = []   # página -> contagem de cada termo da consulta
+        self.comprimentos = []  # página -> número de tokens
+
+    def __len__(self):
+        return len(self.frequencias)
+
+    def adicionar(self, texto):
+        """registra uma página e retorna a fração dos termos da consulta que aparecem nela"""
+        texto = texto.lower()
+        frequencias = [_contar_palavra(texto, termo) for termo in self.termos]
+        self.frequencias.append(frequencias)
+        self.comprimentos.append(texto.count(' ') + 1)
+        if not self.termos:
+            return 0.0
+        return sum(1 for frequencia in frequencias if frequencia) / len(self.termos)
+
+    def notas(self):
+        """array com a nota de cada página, na ordem em que foram adicionadas"""
+        import numpy as np
+
+        if not self.frequencias or not self.termos:
+            return np.zeros(len(self.frequencias))
+        tf = np.array(self.frequencias, dtype=float)
+        comprimentos = np.array(self.comprimentos, dtype=float)
+        total = len(self.frequencias)
+        df = (tf > 0).sum(axis=0)
+        idf = np.log(1.0 + (total - df + 0.5) / (df + 0.5))
+        media = comprimentos.mean() or 1.0
+        saturacao = self.k1 * (1.0 - self.b + self.b * comprimentos / media)
+        return ((tf * (self.k1 + 1.0)) / (tf + saturacao[:, None])) @ idf
+
+
+class IndiceSimilaridade:
+    """índice invertido esparso com tf-idf e normas em cache, atualizado a cada inserção
+
+    limite_postings é um teto de postings visitados por busca: passado dele, os termos mais
+    comuns que faltam não trazem candidatos novos e o resultado passa a ser aproximado
+    (um documento que só tenha termos comuns pode ficar de fora). None desliga o teto.
+    """
+
+    VERSAO = 1
+
+    def __init__(self, limite_postings=2000, fator_recalculo=1.25):
+        self.documentos = []                    # id -> texto indexado
+        self.ids = {}                           # texto -> id
+        self.frequencias = []                   # id -> {termo: contagem}
+        self.normas = []                        # id -> norma l2 em cache
+        self.postings = defaultdict(dict)       # termo -> {id: contagem}
+        self.limite_postings = limite_postings  # teto de postings visitados por busca (None: sem teto)
+        self.fator_recalculo = fator_recalculo  # recalcula normas quando o corpus cresce esse fator
+        self._docs_no_recalculo = 0
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def __contains__(self, texto):
+        return texto in self.ids
+
+    def _idf(self, termo):
+        """idf suavizado, igual ao padrão do scikit-learn"""
+        total = len(self.documentos)
+        df = len(self.postings.get(termo, ()))
+        return math.log((1 + total) / (1 + df)) + 1
+
+    def _norma(self, frequencias):
+        return math.sqrt(sum((contagem * self._idf(termo)) ** 2 for termo, contagem in frequencias.items()))
+
+    def _recalcular_normas(self):
+        """as normas envelhecem com a mudança do idf; recalcula de forma amortizada"""
+        self.normas = [self._norma(freq) for freq in self.frequencias]
+        self._docs_no_recalculo = len(self.documentos)
+
+    def adicionar(self, texto):
+        """indexa um texto novo em O(termos do texto), sem reajustar o corpus"""
+        if texto in self.ids:
+            return self.ids[texto]
+
+        id_doc = len(self.documentos)
+        frequencias = dict(Counter(tokenizar(texto)))
+        self.documentos.append(texto)
+        self.ids[texto] = id_doc
+        self.frequencias.append(frequencias)
+        for termo, contagem in frequencias.items():
+            self.postings[termo][id_doc] = contagem
+        self.normas.append(self._norma(frequencias))
+
+        if len(self.documentos) >= self._docs_no_recalculo * self.fator_recalculo:
+            self._recalcular_normas()
+        return id_doc
+
+    def adicionar_varios(self, textos):
+        """indexa vários textos de uma vez, com no máximo um recálculo das normas no final
+
+        o recálculo segue o mesmo limiar de adicionar (corpus fator_recalculo vezes maior que
+        no último): um lote pequeno sobre um índice grande custa o mesmo que adicionar um a um.
+        """
+        fator = self.fator_recalculo
+        self.fator_recalculo = float('inf')
+        try:
+            for texto in textos:
+                self.adicionar(texto)
+        finally:
+            self.fator_recalculo = fator
+        if len(self.documentos) >= self._docs_no_recalculo * self.fator_recalculo:
+            self._recalcular_normas()
+
+    def buscar(self, consulta, k=1):
+        """retorna até k pares (texto, similaridade) em ordem decrescente de similaridade"""
+        return self.buscar_varios([consulta], k)[0]
+
+    def buscar_varios(self, consultas, k=1):
+        """busca várias consultas de uma vez, com o mesmo resultado de buscar para cada uma
+
+        é o produto esparso consultas x documentos restrito aos candidatos de cada
+        consulta: consultas repetidas são resolvidas uma vez e o idf de cada termo é
+        calculado uma vez para o lote todo.
+        """
+        if not self.documentos:
+            return [[] for _ in consultas]
+
+        idf = {}
+        resultados = {}
+        for consulta in dict.fromkeys(consultas):
+            frequencias_consulta = Counter(termo for termo in tokenizar(consulta) if termo in self.postings)
+            if not frequencias_consulta:
+                continue
+            for termo in frequencias_consulta:
+                if termo not in idf:
+                    idf[termo] = self._idf(termo)
+            pesos = {termo: contagem * idf[termo] for termo, contagem in frequencias_consulta.items()}
+            norma_consulta = math.sqrt(sum(peso * peso for peso in pesos.values()))
+
+            # gera candidatos pelos termos mais raros primeiro; termos muito comuns só
+            # pontuam candidatos já encontrados, o que mantém a busca com custo limitado
+            termos = sorted(pesos, key=lambda t: len(self.postings[t]))
+            # um documento sem nenhum dos termos anteriores a termos[i] tem similaridade de no
+            # máximo restos[i] / norma_consulta (cauchy-schwarz); quando os k melhores já passam
+            # disso, as listas seguintes não trazem ninguém melhor e não são percorridas
+            restos = []
+            acumulado = 0.0
+            for termo in reversed(termos):
+                acumulado += pesos[termo] * pesos[termo]
+                restos.append(math.sqrt(acumulado))
+            restos.reverse()
+
+            # peso da consulta já multiplicado pelo idf do documento: uma multiplicação por termo
+            pesos_idf = [(termo, peso * idf[termo]) for termo, peso in pesos.items()]
+            candidatos = set()
+            pontuacoes = []
+            melhores = []  # heap com as k maiores similaridades até aqui
+            visitados = 0
+            for termo, resto in zip(termos, restos):
+                lista = self.postings[termo]
+                estourou = self.limite_postings is not None and visitados + len(lista) > self.limite_postings
+                if candidatos and (estourou or len(melhores) == k and melhores[0] > resto / norma_consulta):
+                    break
+                visitados += len(lista)
+                for id_doc in lista:
+                    if id_doc in candidatos:
+                        continue
+                    candidatos.add(id_doc)
+                    frequencias = self.frequencias[id_doc]
+                    produto = sum(peso * frequencias[termo] for termo, peso in pesos_idf if termo in frequencias)
+                    norma = self.normas[id_doc] or 1.0
+                    similaridade = min(1.0, produto / (norma * norma_consulta))
+                    pontuacoes.append((similaridade, id_doc))
+                    if len(melhores) < k:
+                        heapq.heappush(melhores, similaridade)
+                    elif similaridade > melhores[0]:
+                        heapq.heapreplace(melhores, similaridade)
+            resultados[consulta] = [(self.documentos[id_doc], similaridade)
+                                    for similaridade, id_doc in heapq.nlargest(k, pontuacoes)]
+        return [resultados.get(consulta, []) for consulta in consultas]
+
+    def salvar(self, caminho):
+        """persiste o índice em disco"""
+        estado = {
+            'versao': self.VERSAO,
+            'documentos': self.documentos,
+            'frequencias': self.frequencias,
+            'normas': self.normas,
+            'docs_no_recalculo': self._docs_no_recalculo,
+        }
+        with gravacao_atomica(caminho, sincronizar=False) as f:
+            pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def carregar(cls, caminho, **opcoes):
+        """carrega um índice salvo; retorna None se não existir ou for de outra versão"""
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, 'rb') as f:
+            estado = pickle.load(f)
+        if estado.get('versao') != cls.VERSAO:
+            return None
+
+        indice = cls(**opcoes)
+        indice.documentos = estado['documentos']
+        indice.frequencias = estado['frequencias']
+        indice.normas = estado['normas']
+        indice._docs_no_recalculo = estado['docs_no_recalculo']
+        indice.ids = {texto: i for i, texto in enumerate(indice.documentos)}
+        for id_doc, frequencias in enumerate(indice.frequencias):
+            for termo, contagem in frequencias.items():
+                indice.postings[termo][id_doc] = contagem
+        return indice
@@ -0,0 +1,213 @@
+"""
+   Ingestão offline da Pítia: pré-aquece memória, base de conhecimento e cache antes do tráfego.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import argparse
+import asyncio
+import gzip
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from pitia.armazenamento import ArmazenamentoLog
+from pitia.provedores import ProvedorGoogle
+from pitia.texto import normalizar_chave
+
+# separadores do nome do site no fim dos títulos ("Zeus – Wikipédia, a enciclopédia livre")
+_SUFIXO_TITULO = re.compile(r"\s+[-–—|·]\s+[^-–—|·]*$")
+
+
+def pergunta_do_titulo(titulo):
+    """título da página sem o nome do site, usado como pergunta aprendida"""
+    return _SUFIXO_TITULO.sub('', titulo or '').strip()
+
+
+def ler_sitemap(corpo):
+    """(urls de páginas, urls de outros sitemaps) de um sitemap xml, comprimido ou não"""
+    if corpo[:2] == b'\x1f\x8b':
+        corpo = gzip.decompress(corpo)
+    raiz = ET.fromstring(corpo)
+    locais = [elemento.text.strip() for elemento in raiz.iter()
+              if elemento.tag.rsplit('}', 1)[-1] == 'loc' and elemento.text and elemento.text.strip()]
+    if raiz.tag.rsplit('}', 1)[-1] == 'sitemapindex':
+        return [], locais
+    return locais, []
+
+
+class Ingestao:
+    """percorre tópicos ou sitemaps e guarda o resultado no assistente, retomando de onde parou
+
+    cada tópico passa pela base de conhecimento (trechos do duckduckgo) e pelas páginas dos
+    domínios confiáveis achadas no google; cada página de sitemap é baixada, extraída,
+    resumida e aprendida pelo título. até concorrencia itens rodam juntos, e o agendador
+    do cliente http continua valendo por domínio. o checkpoint é um log com a situação de
+    cada item ('ok' ou 'falha'); os já feitos são pulados ao retomar e as falhas, refeitas.
+    a memória do assistente é gravada antes do checkpoint, então um item marcado como
+    feito nunca se perde numa queda.
+    """
+
+    def __init__(self, assistente, checkpoint='ingestao.jsonl', concorrencia=8, intervalo_checkpoint=20,
+                 so_confiaveis=True):
+        self.assistente = assistente
+        self.checkpoint = checkpoint if isinstance(checkpoint, ArmazenamentoLog) else ArmazenamentoLog(checkpoint)
+        self.concorrencia = concorrencia
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.so_confiaveis = so_confiaveis
+        self.situacoes = self.checkpoint.carregar()
+        self.contagem = {'ok': 0, 'falha': 0, 'pulados': 0, 'ignorados': 0}
+        self._desde_checkpoint = 0
+
+    def feito(self, item):
+        return self.situacoes.get(item) == 'ok'
+
+    def _marcar(self, item, situacao):
+        self.situacoes[item] = situacao
+        self.checkpoint.definir(item, situacao)
+        self.contagem[situacao] += 1
+        self._desde_checkpoint += 1
+        if self._desde_checkpoint >= self.intervalo_checkpoint:
+            self.salvar()
+
+    def salvar(self):
+        """grava o que o assistente aprendeu e, depois, o checkpoint"""
+        self.assistente.descarregar_aprendizado()
+        self.assistente.salvar_conhecimento()
+        self.checkpoint.descarregar()
+        if self.checkpoint.precisa_compactar(len(self.situacoes)):
+            self.checkpoint.compactar(self.situacoes)
+        self._desde_checkpoint = 0
+
+    async def _processar(self, itens, funcao):
+        semaforo = asyncio.Semaphore(self.concorrencia)
+
+        async def processar(item):
+            async with semaforo:
+                try:
+                    situacao = 'ok' if await funcao(item) else 'falha'
+                except Exception as e:
+                    print(f"Erro ao ingerir {item}: {e}")
+                    situacao = 'falha'
+                self._marcar(item, situacao)
+
+        pendentes = []
+        for item in dict.fromkeys(itens):
+            if self.feito(item):
+                self.contagem['pulados'] += 1
+            else:
+                pendentes.append(item)
+        with self.assistente.lote_aprendizado():
+            try:
+                await asyncio.gather(*(processar(item) for item in pendentes))
+            finally:
+                self.salvar()
+
+    async def ingerir_topicos_async(self, topicos):
+        """base de conhecimento e páginas dos domínios confiáveis para cada tópico"""
+        google = ProvedorGoogle(self.assistente, filtrar_sites=self.so_confiaveis)
+
+        async def ingerir(topico):
+            texto = await self.assistente.aprender_e_responder_async(topico)
+            links = await google.buscar(topico)
+            if not links:
+                return bool(texto) and "não consegui" not in texto.lower()
+            dados = await self.assistente._processar_resultados_paralelo_async(topico, links)
+            dados = [d for d in dados if d['content']]
+            if dados:
+                await self.assistente._resposta_das_paginas_async(topico, dados)
+            return bool(dados)
+
+        await self._processar([topico.strip() for topico in topicos if topico.strip()], ingerir)
+
+    async def urls_do_sitemap_async(self, url_sitemap, limite=None):
+        """páginas listadas no sitemap, seguindo índices de sitemaps; só as de domínios confiáveis se so_confiaveis"""
+        urls = []
+        fila = [url_sitemap]
+        vistos = set()
+        while fila and (limite is None or len(urls) < limite):
+            url = fila.pop(0)
+            if url in vistos:
+                continue
+            vistos.add(url)
+            try:
+                resposta = await self.assistente.cliente_http.obter(url, limite_bytes=50 * 1024 * 1024)
+                paginas, sitemaps = ler_sitemap(resposta.corpo)
+            except Exception as e:
+                print(f"Erro ao ler sitemap {url}: {e}")
+                continue
+            fila.extend(sitemaps)
+            for pagina in paginas:
+                if self.so_confiaveis and self.assistente._eh_dominio_confiavel(pagina) <= 0:
+                    self.contagem['ignorados'] += 1
+                    continue
+                urls.append(pagina)
+        return urls[:limite]
+
+    async def ingerir_sitemap_async(self, url_sitemap, limite=None):
+        """baixa as páginas do sitemap para o cache e aprende cada uma pelo título"""
+
+        async def ingerir(url):
+            dados = await self.assistente.obter_conteudo_pagina_async(url)
+            pergunta = pergunta_do_titulo(dados['title'])
+            if not dados['content'] or not pergunta:
+                return False
+            resposta = await self.assistente._resposta_das_paginas_async(pergunta, [dict(dados)])
+            chave = normalizar_chave(pergunta)
+            if self.assistente._guardar_conhecimento(chave, resposta['response']):
+                self.assistente.indice_conhecimento.adicionar(chave)
+            return True
+
+        await self._processar(await self.urls_do_sitemap_async(url_sitemap, limite), ingerir)
+
+    def ingerir_topicos(self, topicos):
+        return self.assistente._laco.executar(self.ingerir_topicos_async(topicos))
+
+    def ingerir_sitemap(self, url_sitemap, limite=None):
+        return self.assistente._laco.executar(self.ingerir_sitemap_async(url_sitemap, limite))
+
+
+def main(argv=None):
+    from pitia import AssistenteAvancado
+
+    parser = argparse.ArgumentParser(prog="pitia-ingestao",
+                                     description="pré-aquece a memória da Pítia a partir de tópicos ou sitemaps")
+    parser.add_argument('--topicos', metavar='ARQUIVO', help="um tópico por linha; '-' lê da entrada padrão")
+    parser.add_argument('--sitemap', action='append', default=[], metavar='URL', help="pode ser repetido")
+    parser.add_argument('--limite', type=int, help="máximo de páginas por sitemap")
+    parser.add_argument('--checkpoint', default='ingestao.jsonl', help="itens já feitos; rodar de novo retoma daqui")
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--todos-dominios', action='store_true', help="não se limita aos domínios confiáveis")
+    parser.add_argument('--cache', metavar='ARQUIVO', help="cache de páginas em disco, para aproveitar depois")
+    parser.add_argument('--memoria-compacta', action='store_true',
+                        help="grava a memória e a base de conhecimento em arenas, como o servidor com a mesma opção")
+    parser.add_argument('--compartilhado', action='store_true',
+                        help="grava na memória de um servidor em execução, que passa a ver o que for ingerido")
+    parser.add_argument('--offline', action='store_true', help="não baixa recursos do nltk")
+    args = parser.parse_args(argv)
+    if not args.topicos and not args.sitemap:
+        parser.error("informe --topicos ou --sitemap")
+
+    assistente = AssistenteAvancado(offline=args.offline, arquivo_cache=args.cache,
+                                    memoria_compacta=args.memoria_compacta, compartilhado=args.compartilhado)
+    ingestao = Ingestao(assistente, args.checkpoint, args.concorrencia, so_confiaveis=not args.todos_dominios)
+    inicio = time.time()
+    try:
+        if args.topicos:
+            if args.topicos == '-':
+                ingestao.ingerir_topicos(sys.stdin.read().splitlines())
+            else:
+                with open(args.topicos, encoding='utf-8') as f:
+                    ingestao.ingerir_topicos(f.read().splitlines())
+        for url in args.sitemap:
+            ingestao.ingerir_sitemap(url, args.limite)
+    finally:
+        assistente.fechar()
+    contagem = ingestao.contagem
+    print(f"Ingestão concluída em {time.time() - inicio:.1f}s: {contagem['ok']} ok, {contagem['falha']} falhas, "
+          f"{contagem['pulados']} já feitos, {contagem['ignorados']} fora dos domínios confiáveis")
+    return 0 if not contagem['falha'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+   Rastreio de etapas e métricas da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import contextvars
+import itertools
+import json
+import threading
+import time
+from bisect import bisect_left
+
+# limites dos baldes dos histogramas, em segundos
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# span aberto no contexto atual; cada tarefa asyncio herda o de quem a criou
+_span_atual = contextvars.ContextVar('pitia_span_atual', default=None)
+
+
+class _SpanNulo:
+    """o que span() devolve com o rastreio desligado: não mede nem guarda nada"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, erro, rastro):
+        return False
+
+    def definir(self, **atributos):
+        pass
+
+
+_NULO = _SpanNulo()
+
+
+class Span:
+    """uma etapa medida; use como gerenciador de contexto, também em código assíncrono"""
+    __slots__ = ('rastreador', 'nome', 'atributos', 'id', 'pai', 'rastro', 'inicio', '_relogio', '_token')
+
+    def __init__(self, rastreador, nome, atributos):
+        self.rastreador = rastreador
+        self.nome = nome
+        self.atributos = atributos
+
+    def __enter__(self):
+        pai = _span_atual.get()
+        self.id = next(self.rastreador._ids)
+        self.pai = pai.id if pai is not None else None
+        self.rastro = pai.rastro if pai is not None else self.id
+        self.inicio = time.time()
+        self._relogio = time.perf_counter()
+        self._token = _span_atual.set(self)
+        return self
+
+    def __exit__(self, tipo, erro, rastro):
+        duracao = time.perf_counter() - self._relogio
+        try:
+            _span_atual.reset(self._token)
+        except ValueError:
+            # fechado num contexto diferente do que abriu (outra tarefa); não há o que restaurar
+            pass
+        if tipo is not None:
+            self.atributos['erro'] = tipo.__name__
+        self.rastreador._finalizar(self, duracao)
+        return False
+
+    def definir(self, **atributos):
+        """acrescenta atributos conhecidos só depois de a etapa começar"""
+        self.atributos.update(atributos)
+
+
+class Rastreador:
+    """spans por etapa, contadores e histogramas, exportados por callback, texto prometheus ou json
+
+    desligado (ativo=False), span() devolve sempre o mesmo objeto nulo e contar/observar
+    retornam na primeira linha, então o custo fica numa chamada de função.
+    """
+
+    def __init__(self, ativo=True, ao_finalizar=None, limites=LIMITES_PADRAO):
+        self.ativo = ativo
+        self.limites = tuple(limites)
+        self._callbacks = [ao_finalizar] if ao_finalizar else []
+        self._coletores = []
+        self._contadores = {}      # (nome, rótulos) -> valor
+        self._histogramas = {}     # (nome, rótulos) -> [contagem por balde..., +Inf], soma
+        self._trava = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def span(self, nome, **atributos):
+        if not self.ativo:
+            return _NULO
+        return Span(self, nome, atributos)
+
+    def contar(self, nome, valor=1, **rotulos):
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        """registra um valor (em segundos, para os limites padrão) no histograma nome{rotulos}"""
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        balde = bisect_left(self.limites, valor)
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = [[0] * (len(self.limites) + 1), 0.0]
+            histograma[0][balde] += 1
+            histograma[1] += valor
+
+    def adicionar_callback(self, funcao):
+        """funcao(registro) recebe cada span finalizado como dict"""
+        self._callbacks.append(funcao)
+
+    def registrar_coletor(self, funcao):
+        """funcao() -> {nome: número}, lida a cada exportação e publicada como medidor"""
+        self._coletores.append(funcao)
+
+    def _finalizar(self, span, duracao):
+        self.observar('etapa_segundos', duracao, etapa=span.nome)
+        if not self._callbacks:
+            return
+        registro = {
+            'nome': span.nome,
+            'rastro': span.rastro,
+            'id': span.id,
+            'pai': span.pai,
+            'inicio': span.inicio,
+            'duracao_ms': duracao * 1000,
+            **span.atributos,
+        }
+        for callback in self._callbacks:
+            try:
+                callback(registro)
+            except Exception as e:
+                print(f"Erro no callback de rastreio: {e}")
+
+    def _medidores(self):
+        medidores = {}
+        for coletor in self._coletores:
+            try:
+                medidores.update(coletor())
+            except Exception as e:
+                print(f"Erro ao coletar métricas: {e}")
+        return medidores
+
+    def instantaneo(self):
+        """todas as métricas como dict serializável em json"""
+        with self._trava:
+            contadores = [{'nome': nome, 'rotulos': dict(rotulos), 'valor': valor}
+                          for (nome, rotulos), valor in self._contadores.items()]
+            histogramas = [{'nome': nome, 'rotulos': dict(rotulos), 'baldes': list(baldes),
+                            'limites': list(self.limites), 'soma': soma, 'total': sum(baldes)}
+                           for (nome, rotulos), (baldes, soma) in self._histogramas.items()]
+        return {'contadores': contadores, 'histogramas': histogramas, 'medidores': self._medidores()}
+
+    def prometheus(self, prefixo='pitia_'):
+        """métricas no formato texto de exposição do prometheus"""
+        linhas = []
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((chave, (list(baldes), soma)) for chave, (baldes, soma) in self._histogramas.items())
+
+        ultimo = None
+        for (nome, rotulos), valor in contadores:
+            if nome != ultimo:
+                linhas.append(f"# TYPE {prefixo}{nome}_total counter")
+                ultimo = nome
+            linhas.append(f"{prefixo}{nome}_total{_rotulos(rotulos)} {valor}")
+
+        ultimo = None
+        for (nome, rotulos), (baldes, soma) in histogramas:
+            if nome != ultimo:
+                linhas.append(f"# TYPE {prefixo}{nome} histogram")
+                ultimo = nome
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), baldes):
+                acumulado += contagem
+                linhas.append(f"{prefixo}{nome}_bucket{_rotulos(rotulos + (('le', str(limite)),))} {acumulado}")
+            linhas.append(f"{prefixo}{nome}_sum{_rotulos(rotulos)} {soma}")
+            linhas.append(f"{prefixo}{nome}_count{_rotulos(rotulos)} {acumulado}")
+
+        for nome, valor in sorted(self._medidores().items()):
+            linhas.append(f"# TYPE {prefixo}{nome} gauge")
+            linhas.append(f"{prefixo}{nome} {valor}")
+        return '\n'.join(linhas) + '\n'
+
+    def limpar(self):
+        with self._trava:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{nome}="{escapar(valor)}"' for nome, valor in rotulos) + '}'
+
+
+class ExportadorJsonLinhas:
+    """callback de rastreio que grava cada span finalizado como uma linha json"""
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'a', encoding='utf-8', buffering=1)
+        self._trava = threading.Lock()
+
+    def __call__(self, registro):
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._trava:
+            self._arquivo.write(linha + '\n')
+
+    def fechar(self):
+        with self._trava:
+            self._arquivo.close()
@@ -0,0 +1,122 @@
+"""
+   Processos de trabalho da Pítia para as etapas pesadas de cpu.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# página mínima interpretada por cada processo ao subir, para importar o backend e o numpy antes da primeira página real
+_AQUECIMENTO = (b"<html><head><title>Aquecimento</title></head><body><p>Zeus era o rei dos deuses do Olimpo "
+                b"e governava o ceu. Hera era a rainha dos deuses e protegia o casamento. Atena era a deusa "
+                b"da sabedoria e da guerra justa.</p></body></html>")
+
+# estado de cada processo de trabalho, montado por _iniciar_trabalhador
+_estado = {}
+
+
+def _iniciar_trabalhador(backend_html, regras, backend_resumo, offline):
+    from pitia.extracao import obter_backend
+    from pitia.texto import NormalizadorTexto
+
+    _estado['backend'] = obter_backend(backend_html)
+    _estado['normalizador'] = NormalizadorTexto(regras)
+    _estado['backend_resumo'] = backend_resumo
+    _estado['offline'] = offline
+    try:
+        # sobe já aquecido: nltk, stopwords, numpy e o interpretador de html carregados
+        _, conteudo = extrair(_AQUECIMENTO, 'utf-8')
+        resumir(conteudo * 3)
+    except Exception as e:
+        print(f"Erro ao aquecer processo de trabalho: {e}")
+
+
+def _resumidor():
+    resumidor = _estado.get('resumidor')
+    if resumidor is None:
+        from pitia.recursos import preparar_nltk
+        from pitia.resumo import obter_resumidor
+
+        nome = _estado['backend_resumo']
+        if nome == 'lsa':
+            preparar_nltk(_estado['offline'])  # o tokenizador do sumy usa o punkt
+        if nome == 'textrank':
+            preparar_nltk(_estado['offline'])
+            from nltk.corpus import stopwords
+            resumidor = obter_resumidor(nome, palavras_parada=stopwords.words('portuguese') + stopwords.words('english'))
+        else:
+            resumidor = obter_resumidor(nome)
+        _estado['resumidor'] = resumidor
+    return resumidor
+
+
+def extrair(corpo, codificacao=None):
+    """(título, conteúdo limpo) do html, como backend_html.extrair com o normalizador do assistente"""
+    return _estado['backend'].extrair(corpo, codificacao, _estado['normalizador'])
+
+
+def interpretar_duckduckgo(corpo, codificacao=None):
+    return _estado['backend'].interpretar_duckduckgo(corpo, codificacao)[:3]
+
+
+def resumir(texto, num_frases=2):
+    """o mesmo que AssistenteAvancado.resumir_texto, com o resumidor do processo"""
+    from pitia.recursos import ErroRecursos
+    from pitia.texto import Documento
+
+    documento = Documento(texto)
+    if len(documento.palavras) < 10:
+        return documento.texto[:500]
+    try:
+        return _resumidor().resumir(documento, num_frases)
+    except ErroRecursos:
+        raise
+    except Exception as e:
+        print(f"Erro ao resumir texto: {e}")
+        return ' '.join(documento.frases[:num_frases])
+
+
+def _pronto():
+    return os.getpid()
+
+
+class PoolProcessos:
+    """pool de processos para html -> texto limpo e resumo, que em threads disputam o GIL
+
+    só bytes do html ou o texto extraído vão e voltam. cada processo sobe com o backend
+    html, as regras do normalizador e o resumidor já carregados e fica vivo entre as
+    consultas; as regras são as do momento em que o pool foi criado. o padrão é um
+    processo por núcleo, iniciados com 'spawn', que não herda as threads do laço de fundo.
+    """
+
+    def __init__(self, processos=None, backend_html='auto', regras=None, backend_resumo='lsa',
+                 offline=False, metodo_inicio='spawn'):
+        self.processos = processos or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=multiprocessing.get_context(metodo_inicio),
+            initializer=_iniciar_trabalhador,
+            initargs=(backend_html, dict(regras) if regras is not None else None, backend_resumo, offline),
+        )
+        self._trava = threading.Lock()
+        self.tarefas = 0
+
+    async def executar(self, funcao, *args):
+        """roda funcao(*args) num processo; funcao deve ser uma das funções deste módulo"""
+        with self._trava:
+            self.tarefas += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    def aquecer(self):
+        """sobe todos os processos agora, em vez de na primeira página"""
+        futuros = [self._executor.submit(_pronto) for _ in range(self.processos)]
+        return len({futuro.result() for futuro in futuros})
+
+    def fechar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def estatisticas(self):
+        return {'trabalhadores': self.processos, 'tarefas': self.tarefas}
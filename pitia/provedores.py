@@ -0,0 +1,140 @@
+"""
+   Provedores de pesquisa da Pítia e a disputa entre eles.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+
+
+class Provedor:
+    """fonte consultada por gerar_resposta quando a memória não tem a resposta
+
+    buscar(consulta) é uma corotina que devolve o resultado, ou algo vazio/None se o
+    provedor não serviu. tipo diz o que ele devolve: 'texto' é uma resposta pronta,
+    'links' é uma lista de urls cujas páginas ainda serão baixadas.
+    """
+    nome = 'provedor'
+    tipo = 'links'
+
+    async def buscar(self, consulta):
+        raise NotImplementedError
+
+
+class ProvedorBaseConhecimento(Provedor):
+    """base de conhecimento e, se ela não souber, os trechos do duckduckgo parafraseados"""
+    nome = 'base_conhecimento'
+    tipo = 'texto'
+
+    def __init__(self, assistente):
+        self.assistente = assistente
+
+    async def buscar(self, consulta):
+        texto = await self.assistente.aprender_e_responder_async(consulta)
+        if texto and "não consegui" not in texto.lower():
+            return texto
+        return None
+
+
+class ProvedorGoogle(Provedor):
+    """links do google; com filtrar_sites, só dos domínios confiáveis do assistente"""
+
+    def __init__(self, assistente, filtrar_sites=False):
+        self.assistente = assistente
+        self.filtrar_sites = filtrar_sites
+        self.nome = 'google_sites' if filtrar_sites else 'google'
+
+    async def buscar(self, consulta):
+        if self.filtrar_sites:
+            filtros_site = " OR ".join(f"site:{dominio}" for dominio in self.assistente.dominios_confiaveis)
+            consulta = f"{consulta} ({filtros_site})"
+        return await self.assistente.pesquisar_google_async(consulta)
+
+
+class ProvedorFixo(Provedor):
+    """provedor local para testes e benchmarks, sem rede
+
+    devolve resultado (ou resultado(consulta), se for uma função) depois de esperar
+    latencia segundos, e conta as chamadas e os cancelamentos.
+    """
+
+    def __init__(self, nome, resultado, latencia=0.0, tipo='links'):
+        self.nome = nome
+        self.tipo = tipo
+        self.resultado = resultado
+        self.latencia = latencia
+        self.chamadas = 0
+        self.cancelados = 0
+
+    async def buscar(self, consulta):
+        self.chamadas += 1
+        try:
+            await asyncio.sleep(self.latencia)
+        except asyncio.CancelledError:
+            self.cancelados += 1
+            raise
+        return self.resultado(consulta) if callable(self.resultado) else self.resultado
+
+
+async def consultar_provedores(provedores, consulta, espera=None, rastreador=None):
+    """consulta os provedores em ordem de preferência e devolve (provedor, resultado) do primeiro que servir
+
+    espera controla quando o próximo provedor começa: None só depois que o anterior falhar
+    (sequencial), 0 todos juntos (corrida), e um número de segundos começa o próximo se
+    nenhum dos que estão rodando tiver respondido até lá. um provedor que falha sempre libera
+    o próximo na hora. ao aceitar um resultado, os que ainda rodam são cancelados; se todos
+    falharem, devolve (None, None). resultados que chegam juntos valem na ordem da lista.
+    """
+    ordem = {id(provedor): posicao for posicao, provedor in enumerate(provedores)}
+    tarefas = {}
+    proximo = 0
+
+    async def executar(provedor):
+        if rastreador is None:
+            return await provedor.buscar(consulta)
+        with rastreador.span('provedor', provedor=provedor.nome):
+            return await provedor.buscar(consulta)
+
+    def iniciar():
+        nonlocal proximo
+        provedor = provedores[proximo]
+        proximo += 1
+        tarefas[asyncio.ensure_future(executar(provedor))] = provedor
+
+    def contar(provedor, resultado):
+        if rastreador is not None:
+            rastreador.contar('provedor', provedor=provedor.nome, resultado=resultado)
+
+    pendentes = set()
+    try:
+        while proximo < len(provedores) and (not pendentes or espera == 0):
+            iniciar()
+            pendentes = {tarefa for tarefa in tarefas if not tarefa.done()}
+        while pendentes:
+            aguardar = espera if espera and proximo < len(provedores) else None
+            prontas, pendentes = await asyncio.wait(pendentes, timeout=aguardar,
+                                                    return_when=asyncio.FIRST_COMPLETED)
+            if not prontas:
+                # ninguém respondeu a tempo: começa o próximo sem desistir dos atuais
+                iniciar()
+                pendentes = {tarefa for tarefa in tarefas if not tarefa.done()}
+                continue
+            for tarefa in sorted(prontas, key=lambda t: ordem[id(tarefas[t])]):
+                provedor = tarefas[tarefa]
+                try:
+                    resultado = tarefa.result()
+                except Exception as e:
+                    print(f"Erro no provedor {provedor.nome}: {e}")
+                    resultado = None
+                if resultado:
+                    contar(provedor, 'aceito')
+                    return provedor, resultado
+                contar(provedor, 'vazio')
+                if proximo < len(provedores):
+                    iniciar()
+            pendentes = {tarefa for tarefa in tarefas if not tarefa.done()}
+        return None, None
+    finally:
+        for tarefa, provedor in tarefas.items():
+            if not tarefa.done():
+                tarefa.cancel()
+                contar(provedor, 'cancelado')
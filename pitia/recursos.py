@@ -0,0 +1,69 @@
+"""
+   Recursos do nltk da Pítia, carregados só quando usados.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import threading
+
+# recursos usados: nome no nltk.download -> caminho procurado pelo nltk.data.find
+RECURSOS_NLTK = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'rslp': 'stemmers/rslp',
+}
+
+_trava = threading.Lock()
+_preparado = False
+
+
+class ErroRecursos(LookupError):
+    """recursos do nltk ausentes no modo offline"""
+    def __init__(self, ausentes):
+        super().__init__(
+            "recursos do nltk ausentes: " + ', '.join(ausentes) +
+            ". instale-os com python -m nltk.downloader " + ' '.join(ausentes) +
+            " ou aponte NLTK_DATA para a pasta empacotada"
+        )
+        self.ausentes = ausentes
+
+    def __reduce__(self):
+        # chega inteiro ao processo principal quando levantado num processo de trabalho
+        return ErroRecursos, (self.ausentes,)
+
+
+def recursos_ausentes(nomes=None):
+    """lista os recursos que o nltk não encontra localmente, sem acessar a rede"""
+    import nltk
+
+    ausentes = []
+    for nome in nomes or RECURSOS_NLTK:
+        try:
+            nltk.data.find(RECURSOS_NLTK[nome])
+        except LookupError:
+            ausentes.append(nome)
+    return ausentes
+
+
+def preparar_nltk(offline=False):
+    """garante os recursos do nltk uma vez por processo
+
+    só baixa o que estiver faltando; com offline=True nunca baixa e levanta
+    ErroRecursos se algo faltar.
+    """
+    global _preparado
+    if _preparado:
+        return
+    with _trava:
+        if _preparado:
+            return
+        ausentes = recursos_ausentes()
+        if ausentes and offline:
+            raise ErroRecursos(ausentes)
+        if ausentes:
+            import nltk
+            nltk.download(ausentes, quiet=True)
+            ausentes = recursos_ausentes(ausentes)
+            if ausentes:
+                print(f"Aviso: recursos do nltk indisponíveis: {', '.join(ausentes)}")
+        _preparado = True
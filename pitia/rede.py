@@ -0,0 +1,392 @@
+"""
+   Camada de rede assíncrona da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# limites de cortesia por domínio (vale também para os subdomínios): requisições
+# simultâneas e requisições iniciadas por segundo; os demais hosts usam o padrão do cliente
+LIMITES_DOMINIOS_PADRAO = {
+    'wikipedia.org': {'concorrencia': 4, 'por_segundo': 10},
+    'gov.br': {'concorrencia': 2, 'por_segundo': 4},
+    'duckduckgo.com': {'concorrencia': 2, 'por_segundo': 2},
+}
+
+
+class ErroHttp(Exception):
+    """resposta com status de erro"""
+    def __init__(self, status, url):
+        super().__init__(f"{status} para {url}")
+        self.status = status
+        self.url = url
+
+
+class ErroCertificado(Exception):
+    """falha na verificação do certificado SSL"""
+
+
+def segundos_retry_after(valor, agora=None):
+    """interpreta o cabeçalho Retry-After (segundos ou data http); None se não der"""
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, data.timestamp() - (time.time() if agora is None else agora))
+
+
+class _EstadoHost:
+    __slots__ = ('semaforo', 'intervalo', 'proximo_inicio', 'pausado_ate')
+
+    def __init__(self, concorrencia, intervalo):
+        self.semaforo = asyncio.Semaphore(concorrencia)
+        self.intervalo = intervalo
+        self.proximo_inicio = 0.0
+        self.pausado_ate = 0.0
+
+
+def host_da_url(url):
+    """host em minúsculas, sem usuário nem porta
+
+    corta a url nos separadores em vez de usar o urlsplit, que custa alguns µs por url
+    nova; urls sem esquema ou com ipv6 entre colchetes ainda passam pelo urlsplit.
+    """
+    _, separador, resto = url.partition('://')
+    fim = len(resto)
+    for caractere in '/?#':
+        posicao = resto.find(caractere, 0, fim)
+        if posicao >= 0:
+            fim = posicao
+    local = resto[:fim].rpartition('@')[2]
+    if not separador or '[' in local:
+        return urlsplit(url).hostname or ''
+    return local.partition(':')[0].lower()
+
+
+def sufixos_host(host):
+    """o host e os domínios acima dele, do mais específico ao mais geral"""
+    partes = host.split('.')
+    return ['.'.join(partes[i:]) for i in range(len(partes))]
+
+
+class TabelaDominios:
+    """valor por domínio, achado pelo sufixo de rótulos do host e memorizado por host
+
+    'wikipedia.org' vale para pt.wikipedia.org, mas não para notwikipedia.org; quando mais
+    de um domínio serve, vale o mais específico. valores é o dict do dono e pode mudar
+    depois: a memória é refeita quando ele difere da cópia feita na última consulta.
+    """
+
+    def __init__(self, valores, padrao=0, max_hosts=10000):
+        self.valores = valores
+        self.padrao = padrao
+        self.max_hosts = max_hosts
+        self._copia = None
+        self._por_host = {}
+
+    def obter(self, host):
+        if self.valores != self._copia:
+            self._copia = dict(self.valores)
+            self._por_host = {}
+        valor = self._por_host.get(host)
+        if valor is None:
+            valor = self.padrao
+            for sufixo in sufixos_host(host):
+                if sufixo in self._copia:
+                    valor = self._copia[sufixo]
+                    break
+            if len(self._por_host) >= self.max_hosts:
+                self._por_host.clear()
+            self._por_host[host] = valor
+        return valor
+
+    def de_url(self, url):
+        return self.obter(host_da_url(url))
+
+
+class AgendadorHosts:
+    """decide quando cada requisição pode começar, por domínio
+
+    limita as requisições simultâneas, espaça o início delas conforme por_segundo e
+    segura o domínio inteiro quando o servidor pede uma pausa (429 ou Retry-After).
+    limites é {dominio: {'concorrencia': n, 'por_segundo': x}}; um domínio vale para os
+    subdomínios e os hosts sem regra usam concorrencia_padrao e por_segundo_padrao
+    (None: sem intervalo), cada um com seu próprio estado.
+    """
+
+    def __init__(self, limites=None, concorrencia_padrao=8, por_segundo_padrao=None):
+        self.limites = dict(LIMITES_DOMINIOS_PADRAO if limites is None else limites)
+        self.concorrencia_padrao = concorrencia_padrao
+        self.por_segundo_padrao = por_segundo_padrao
+        self._estados = weakref.WeakKeyDictionary()   # laço -> {chave: _EstadoHost}
+        self.pausas = 0
+        self.espera_total = 0.0
+
+    def _chave(self, host):
+        for sufixo in sufixos_host(host):
+            if sufixo in self.limites:
+                return sufixo, self.limites[sufixo]
+        return host, None
+
+    def _estado(self, url):
+        host = host_da_url(url)
+        estados = self._estados.setdefault(asyncio.get_running_loop(), {})
+        chave, regra = self._chave(host)
+        estado = estados.get(chave)
+        if estado is None:
+            regra = regra or {}
+            por_segundo = regra.get('por_segundo', self.por_segundo_padrao)
+            estado = estados[chave] = _EstadoHost(regra.get('concorrencia', self.concorrencia_padrao),
+                                                  1.0 / por_segundo if por_segundo else 0.0)
+        return estado
+
+    @asynccontextmanager
+    async def vaga(self, url):
+        """espera a vez de uma requisição para url e a mantém enquanto o bloco roda"""
+        estado = self._estado(url)
+        laco = asyncio.get_running_loop()
+        inicio = laco.time()
+        async with estado.semaforo:
+            while True:
+                espera = max(estado.proximo_inicio, estado.pausado_ate) - laco.time()
+                if espera <= 0:
+                    break
+                await asyncio.sleep(espera)
+            estado.proximo_inicio = laco.time() + estado.intervalo
+            self.espera_total += laco.time() - inicio
+            yield
+
+    def pausar(self, url, segundos):
+        """nenhuma requisição nova ao domínio de url começa nos próximos segundos"""
+        estado = self._estado(url)
+        estado.pausado_ate = max(estado.pausado_ate, asyncio.get_running_loop().time() + segundos)
+        self.pausas += 1
+
+
+class RespostaHttp:
+    """resposta já lida, independente da biblioteca de http usada"""
+    def __init__(self, url, status, cabecalhos, corpo, codificacao=None):
+        self.url = url
+        self.status = status
+        self.cabecalhos = cabecalhos
+        self.corpo = corpo
+        self.codificacao = codificacao
+
+    @property
+    def texto(self):
+        return self.corpo.decode(self.codificacao or 'utf-8', errors='replace')
+
+
+class ClienteHttp:
+    """cliente http assíncrono com pool de conexões compartilhado e limite por host
+
+    cada laço de eventos ganha sua própria sessão aiohttp, criada no primeiro uso;
+    o aiohttp também só é importado nesse momento. as requisições passam pelo agendador,
+    que aplica os limites de cada domínio; um 429 ou Retry-After pausa o domínio todo
+    (até espera_maxima segundos; mais que isso vira erro). estatisticas() conta as conexões
+    novas e as reaproveitadas do keep-alive, por host.
+    """
+
+    def __init__(self, cabecalhos=None, contexto_ssl=None, limite_total=100, limite_por_host=8,
+                 tentativas=3, fator_espera=0.5, status_repetir=(500, 502, 503, 504), timeout=10,
+                 tamanho_parte=64 * 1024, agendador=None, espera_maxima=30):
+        self.cabecalhos = dict(cabecalhos or {})
+        self.contexto_ssl = contexto_ssl
+        self.limite_total = limite_total
+        self.limite_por_host = limite_por_host
+        self.tentativas = tentativas
+        self.fator_espera = fator_espera
+        self.status_repetir = set(status_repetir)
+        self.timeout = timeout
+        self.tamanho_parte = tamanho_parte
+        self.agendador = agendador or AgendadorHosts(concorrencia_padrao=limite_por_host)
+        self.espera_maxima = espera_maxima
+        self._sessoes = weakref.WeakKeyDictionary()
+        self._conexoes = {}   # host -> [novas, reaproveitadas]
+
+    def _sessao(self):
+        import aiohttp
+
+        laco = asyncio.get_running_loop()
+        sessao = self._sessoes.get(laco)
+        if sessao is None or sessao.closed:
+            conector = aiohttp.TCPConnector(
+                limit=self.limite_total,
+                limit_per_host=self.limite_por_host,
+                ssl=self.contexto_ssl if self.contexto_ssl is not None else True
+            )
+            rastreio = aiohttp.TraceConfig()
+            rastreio.on_request_start.append(self._ao_iniciar)
+            rastreio.on_connection_create_end.append(self._ao_criar_conexao)
+            rastreio.on_connection_reuseconn.append(self._ao_reusar_conexao)
+            sessao = aiohttp.ClientSession(
+                connector=conector,
+                headers=self.cabecalhos,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[rastreio]
+            )
+            self._sessoes[laco] = sessao
+        return sessao
+
+    async def _ao_iniciar(self, sessao, contexto, parametros):
+        contexto.host = parametros.url.host
+
+    async def _ao_criar_conexao(self, sessao, contexto, parametros):
+        self._conexoes.setdefault(contexto.host, [0, 0])[0] += 1
+
+    async def _ao_reusar_conexao(self, sessao, contexto, parametros):
+        self._conexoes.setdefault(contexto.host, [0, 0])[1] += 1
+
+    def estatisticas(self):
+        """conexões abertas e reaproveitadas (total e por host), pausas pedidas pelos servidores e espera no agendador"""
+        novas = sum(n for n, _ in self._conexoes.values())
+        reusadas = sum(r for _, r in self._conexoes.values())
+        return {
+            'conexoes_novas': novas,
+            'conexoes_reusadas': reusadas,
+            'taxa_reuso': reusadas / (novas + reusadas) if novas + reusadas else 0.0,
+            'pausas': self.agendador.pausas,
+            'espera_agendador_s': self.agendador.espera_total,
+            'por_host': {host: {'novas': n, 'reusadas': r} for host, (n, r) in self._conexoes.items()},
+        }
+
+    async def obter(self, url, cabecalhos=None, verificar_ssl=True, limite_bytes=None):
+        """faz um GET com novas tentativas e espera exponencial, como o Retry do requests
+
+        com limite_bytes o corpo é lido em partes e cortado nesse tamanho.
+        """
+        async def ler(resposta):
+            if limite_bytes is None:
+                return await resposta.read()
+            partes = []
+            lidos = 0
+            async for parte in resposta.content.iter_chunked(self.tamanho_parte):
+                partes.append(parte)
+                lidos += len(parte)
+                if lidos >= limite_bytes:
+                    break
+            return b''.join(partes)[:limite_bytes]
+
+        return await self._requisitar(url, cabecalhos, verificar_ssl, ler)
+
+    async def obter_em_partes(self, url, ao_receber, aceitar=None, cabecalhos=None,
+                              verificar_ssl=True, limite_bytes=None):
+        """faz um GET entregando o corpo em partes a ao_receber(parte) conforme chega
+
+        ao_receber retorna False para interromper o download. aceitar(cabecalhos), se
+        informado, decide antes de ler o corpo se ele interessa. o corpo da resposta
+        devolvida fica vazio.
+        """
+        async def ler(resposta):
+            if aceitar is not None and not aceitar(resposta.headers):
+                return b''
+            lidos = 0
+            async for parte in resposta.content.iter_chunked(self.tamanho_parte):
+                if limite_bytes is not None and lidos + len(parte) > limite_bytes:
+                    parte = parte[:limite_bytes - lidos]
+                lidos += len(parte)
+                if not ao_receber(parte) or (limite_bytes is not None and lidos >= limite_bytes):
+                    break
+            return b''
+
+        return await self._requisitar(url, cabecalhos, verificar_ssl, ler)
+
+    async def _requisitar(self, url, cabecalhos, verificar_ssl, ler):
+        import aiohttp
+
+        sessao = self._sessao()
+        for tentativa in range(self.tentativas + 1):
+            ultima = tentativa == self.tentativas
+            espera = self.fator_espera * (2 ** tentativa)
+            try:
+                async with self.agendador.vaga(url):
+                    async with sessao.get(url, headers=cabecalhos, ssl=True if verificar_ssl else False) as resposta:
+                        pausa = segundos_retry_after(resposta.headers.get('Retry-After'))
+                        if resposta.status == 429 or (pausa is not None and resposta.status in self.status_repetir):
+                            # o servidor pediu para esperar: vale para o domínio todo, não só para esta url
+                            pausa = espera if pausa is None else pausa
+                            if ultima or pausa > self.espera_maxima:
+                                raise ErroHttp(resposta.status, url)
+                            self.agendador.pausar(url, pausa)
+                            continue
+                        if resposta.status >= 400:
+                            if resposta.status not in self.status_repetir or ultima:
+                                raise ErroHttp(resposta.status, url)
+                        else:
+                            corpo = await ler(resposta)
+                            return RespostaHttp(str(resposta.url), resposta.status, resposta.headers,
+                                                corpo, self._codificacao(resposta, corpo))
+            except aiohttp.ClientSSLError as e:
+                raise ErroCertificado(str(e)) from e
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if ultima:
+                    raise
+            # a espera entre tentativas fica fora da vaga, para não segurar o domínio
+            await asyncio.sleep(espera)
+
+    @staticmethod
+    def _codificacao(resposta, corpo):
+        if not corpo:
+            return resposta.charset
+        try:
+            return resposta.get_encoding()
+        except Exception:
+            return resposta.charset
+
+    async def fechar(self):
+        """fecha a sessão do laço atual"""
+        sessao = self._sessoes.pop(asyncio.get_running_loop(), None)
+        if sessao is not None:
+            await sessao.close()
+
+
+class LacoEmSegundoPlano:
+    """laço asyncio numa thread própria, usado pelas versões síncronas da api"""
+
+    def __init__(self):
+        self._laco = None
+        self._thread = None
+        self._trava = threading.Lock()
+
+    def _iniciar(self):
+        with self._trava:
+            if self._laco is None:
+                self._laco = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._laco.run_forever, name="pitia-laco", daemon=True)
+                self._thread.start()
+        return self._laco
+
+    def executar(self, corotina, timeout=None):
+        """executa a corotina no laço de fundo e espera o resultado"""
+        return self.submeter(corotina).result(timeout)
+
+    def submeter(self, corotina):
+        """agenda a corotina no laço de fundo sem esperar; retorna um concurrent.futures.Future"""
+        laco = self._iniciar()
+        if threading.current_thread() is self._thread:
+            corotina.close()
+            raise RuntimeError("chamada síncrona feita de dentro do laço de fundo; use a versão assíncrona")
+        return asyncio.run_coroutine_threadsafe(corotina, laco)
+
+    def fechar(self, cliente=None):
+        """encerra o laço, fechando antes a sessão do cliente nele"""
+        with self._trava:
+            laco, self._laco = self._laco, None
+        if laco is None:
+            return
+        if cliente is not None:
+            asyncio.run_coroutine_threadsafe(cliente.fechar(), laco).result()
+        laco.call_soon_threadsafe(laco.stop)
+        self._thread.join()
+        laco.close()
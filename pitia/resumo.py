@@ -0,0 +1,223 @@
+"""
+   Resumo extrativo da Pítia: o LSA do sumy e alternativas vetorizadas com numpy.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import threading
+from collections import OrderedDict
+
+from pitia.texto import TOKENIZADOR_PADRAO, Documento
+
+
+def _melhores(frases, notas, num_frases):
+    """as num_frases de maior nota, na ordem do texto; empates ficam com a que vem antes"""
+    ordem = sorted(range(len(frases)), key=lambda i: -notas[i])[:num_frases]
+    return ' '.join(frases[i] for i in sorted(ordem))
+
+
+class Resumidor:
+    """base dos resumidores: escolhe frases do texto e memoriza os resumos já feitos
+
+    a memória é um LRU de até memoria resumos, pela impressão digital do conteúdo e pelo
+    número de frases; memoria=0 a desliga. resumir aceita texto ou um Documento de
+    pitia.texto, cujas frases e palavras são reaproveitadas se o tokenizador for o mesmo.
+    """
+    nome = 'base'
+
+    def __init__(self, tokenizador=None, memoria=256):
+        self.tokenizador = tokenizador or TOKENIZADOR_PADRAO
+        self.memoria = memoria
+        self._resumos = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def resumir(self, texto, num_frases=2):
+        documento = texto
+        if not isinstance(documento, Documento) or documento.tokenizador is not self.tokenizador:
+            documento = Documento(str(texto), self.tokenizador)
+        chave = (documento.impressao, num_frases)
+        with self._trava:
+            resumo = self._resumos.get(chave)
+            if resumo is not None:
+                self._resumos.move_to_end(chave)
+                self.acertos += 1
+                return resumo
+            self.falhas += 1
+        resumo = self._resumir(documento, num_frases)
+        if self.memoria:
+            with self._trava:
+                self._resumos[chave] = resumo
+                while len(self._resumos) > self.memoria:
+                    self._resumos.popitem(last=False)
+        return resumo
+
+    def _resumir(self, documento, num_frases):
+        raise NotImplementedError
+
+    def estatisticas(self):
+        return {'acertos': self.acertos, 'falhas': self.falhas, 'memorizados': len(self._resumos)}
+
+
+class ResumidorLsa(Resumidor):
+    """o LsaSummarizer do sumy, como antes: uma svd completa por chamada"""
+    nome = 'lsa'
+
+    def __init__(self, tokenizador=None, memoria=256):
+        from sumy.nlp.tokenizers import Tokenizer
+        from sumy.summarizers.lsa import LsaSummarizer
+        super().__init__(tokenizador or Tokenizer("portuguese"), memoria)
+        self._lsa = LsaSummarizer()
+
+    def _resumir(self, documento, num_frases):
+        from sumy.parsers.plaintext import PlaintextParser
+        parser = PlaintextParser.from_string(documento.texto, self.tokenizador)
+        return ' '.join(str(frase) for frase in self._lsa(parser.document, num_frases))
+
+
+class ResumidorLsaRapido(Resumidor):
+    """a mesma nota do LSA do sumy, calculada sem a svd completa
+
+    o sumy usa todas as dimensões da svd, e aí a nota de cada frase, raiz de
+    soma(sigma² · v²), é só a norma da coluna dela na matriz de termos. com dimensoes=k
+    só as k primeiras contam, estimadas por uma svd aleatorizada.
+    """
+    nome = 'lsa_rapido'
+
+    def __init__(self, tokenizador=None, memoria=256, dimensoes=None, suavizacao=0.4, semente=0):
+        super().__init__(tokenizador, memoria)
+        self.dimensoes = dimensoes
+        self.suavizacao = suavizacao
+        self.semente = semente
+
+    def _matriz(self, documento):
+        """termos × frases com a frequência suavizada do sumy (as células vazias também recebem a suavização)"""
+        import numpy as np
+
+        vocabulario = {}
+        linhas = []
+        colunas = []
+        for coluna, palavras in enumerate(documento.palavras_por_frase):
+            for palavra in palavras:
+                linhas.append(vocabulario.setdefault(palavra.lower(), len(vocabulario)))
+                colunas.append(coluna)
+        contagens = np.zeros((len(vocabulario), len(documento.frases)))
+        np.add.at(contagens, (np.array(linhas, dtype=np.intp), np.array(colunas, dtype=np.intp)), 1.0)
+        maximos = contagens.max(axis=0) if len(vocabulario) else np.zeros(len(documento.frases))
+        com_palavras = maximos > 0
+        contagens[:, com_palavras] = (self.suavizacao + (1.0 - self.suavizacao)
+                                      * contagens[:, com_palavras] / maximos[com_palavras])
+        return contagens
+
+    def _notas(self, matriz):
+        import numpy as np
+
+        if self.dimensoes is None or self.dimensoes >= min(matriz.shape):
+            return np.sqrt((matriz * matriz).sum(axis=0))
+        sigma, v = _svd_aleatoria(matriz, self.dimensoes, self.semente)
+        return np.sqrt(((sigma[:, None] ** 2) * (v ** 2)).sum(axis=0))
+
+    def _resumir(self, documento, num_frases):
+        frases = documento.frases
+        if len(frases) <= num_frases:
+            return ' '.join(frases)
+        matriz = self._matriz(documento)
+        if not matriz.shape[0]:
+            return ''
+        return _melhores(frases, self._notas(matriz), num_frases)
+
+
+class ResumidorSvdAleatoria(ResumidorLsaRapido):
+    """LSA truncado: só as primeiras dimensões, por svd aleatorizada (Halko et al.)"""
+    nome = 'svd'
+
+    def __init__(self, tokenizador=None, memoria=256, dimensoes=3, suavizacao=0.4, semente=0):
+        super().__init__(tokenizador, memoria, dimensoes, suavizacao, semente)
+
+
+def _svd_aleatoria(matriz, k, semente=0, excesso=5, iteracoes=2):
+    """k maiores valores singulares e linhas de v, por projeção aleatória e iterações de potência"""
+    import numpy as np
+
+    aleatorio = np.random.default_rng(semente)
+    largura = min(k + excesso, min(matriz.shape))
+    y = matriz @ aleatorio.standard_normal((matriz.shape[1], largura))
+    q, _ = np.linalg.qr(y)
+    for _ in range(iteracoes):
+        q, _ = np.linalg.qr(matriz.T @ q)
+        q, _ = np.linalg.qr(matriz @ q)
+    _, sigma, v = np.linalg.svd(q.T @ matriz, full_matrices=False)
+    return sigma[:k], v[:k]
+
+
+class ResumidorTextRank(Resumidor):
+    """TextRank sobre vetores tf-idf das frases: pagerank no grafo de similaridade de cosseno"""
+    nome = 'textrank'
+
+    def __init__(self, tokenizador=None, memoria=256, palavras_parada=(), amortecimento=0.85,
+                 tolerancia=1e-6, max_iteracoes=100):
+        super().__init__(tokenizador, memoria)
+        self.palavras_parada = frozenset(palavras_parada)
+        self.amortecimento = amortecimento
+        self.tolerancia = tolerancia
+        self.max_iteracoes = max_iteracoes
+
+    def _resumir(self, documento, num_frases):
+        import numpy as np
+
+        frases = documento.frases
+        if len(frases) <= num_frases:
+            return ' '.join(frases)
+
+        vocabulario = {}
+        linhas = []
+        colunas = []
+        for linha, palavras in enumerate(documento.palavras_por_frase):
+            for palavra in palavras:
+                palavra = palavra.lower()
+                if palavra not in self.palavras_parada:
+                    linhas.append(linha)
+                    colunas.append(vocabulario.setdefault(palavra, len(vocabulario)))
+        if not vocabulario:
+            return ' '.join(frases[:num_frases])
+        tf = np.zeros((len(frases), len(vocabulario)))
+        np.add.at(tf, (np.array(linhas, dtype=np.intp), np.array(colunas, dtype=np.intp)), 1.0)
+
+        idf = np.log((1 + len(frases)) / (1 + (tf > 0).sum(axis=0))) + 1.0
+        vetores = tf * idf
+        normas = np.linalg.norm(vetores, axis=1)
+        vetores /= np.where(normas > 0, normas, 1.0)[:, None]
+
+        similaridade = vetores @ vetores.T
+        np.fill_diagonal(similaridade, 0.0)
+        saidas = similaridade.sum(axis=1)
+        # frases sem nenhuma ligação distribuem o peso igualmente, como no pagerank
+        transicao = np.where(saidas[:, None] > 0, similaridade / np.where(saidas > 0, saidas, 1.0)[:, None],
+                             1.0 / len(frases))
+
+        n = len(frases)
+        notas = np.full(n, 1.0 / n)
+        for _ in range(self.max_iteracoes):
+            novas = (1.0 - self.amortecimento) / n + self.amortecimento * (transicao.T @ notas)
+            if np.abs(novas - notas).sum() < self.tolerancia:
+                notas = novas
+                break
+            notas = novas
+        return _melhores(frases, notas, num_frases)
+
+
+RESUMIDORES = {
+    'lsa': ResumidorLsa,
+    'lsa_rapido': ResumidorLsaRapido,
+    'svd': ResumidorSvdAleatoria,
+    'textrank': ResumidorTextRank,
+}
+
+
+def obter_resumidor(nome='lsa', **opcoes):
+    """instancia o resumidor pelo nome (veja RESUMIDORES)"""
+    try:
+        classe = RESUMIDORES[nome]
+    except KeyError:
+        raise ValueError(f"resumidor desconhecido '{nome}'; opções: {', '.join(RESUMIDORES)}") from None
+    return classe(**opcoes)
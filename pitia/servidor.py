@@ -0,0 +1,252 @@
+"""
+   Modo servidor da Pítia: api http/json sobre o AssistenteAvancado.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+
+   uso: python -m pitia.servidor --porta 8080
+        python -m pitia.servidor --porta 8080 --trabalhadores 4 --cache paginas.sqlite
+
+   POST /responder  {"consulta": "...", "sessao": "..."}  -> {"response", "source", "sessao"}
+   POST /aprender   {"pergunta": "...", "resposta": "..."} -> {"ok"}
+   POST /corrigir   {"correcao": "...", "sessao": "..."}  -> {"ok"}
+   GET  /saude                                             -> {"ok", "sessoes", "memoria", "processo"}
+   GET  /metricas                                          -> texto no formato do prometheus
+
+   a sessão também pode vir no cabeçalho X-Sessao; sem ela, uma nova é criada e devolvida.
+
+   com --trabalhadores N, N processos escutam na mesma porta (SO_REUSEPORT) e dividem a
+   memória, a base de conhecimento e o cache de páginas em disco; o que um aprende os outros
+   veem em até um segundo. sessões e métricas continuam sendo de cada processo.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from pitia import AssistenteAvancado, Sessao
+from pitia.metricas import ExportadorJsonLinhas, Rastreador
+from pitia.resumo import RESUMIDORES
+
+
+def negar_variacoes(pergunta, similar):
+    return False
+
+
+def aceitar_variacoes(pergunta, similar):
+    return True
+
+
+# políticas do aprendizado ativo sem terminal: ninguém responde ao "(S/N)"
+POLITICAS_VARIACAO = {
+    'negar': negar_variacoes,
+    'aceitar': aceitar_variacoes,
+}
+
+
+class Sessoes:
+    """sessões por cliente, limitadas em quantidade e expiradas por inatividade"""
+
+    def __init__(self, max_sessoes=10000, ttl=3600):
+        self.max_sessoes = max_sessoes
+        self.ttl = ttl
+        self._sessoes = OrderedDict()   # identificador -> Sessao, da menos para a mais recente
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessoes)
+
+    def obter(self, identificador=None):
+        """retorna (identificador, sessão), criando uma nova se não existir ou tiver expirado"""
+        agora = time.time()
+        with self._trava:
+            sessao = self._sessoes.get(identificador) if identificador else None
+            if sessao is not None and agora - sessao.ultimo_acesso > self.ttl:
+                del self._sessoes[identificador]
+                sessao = None
+            if sessao is None:
+                identificador = identificador or uuid.uuid4().hex
+                sessao = self._sessoes[identificador] = Sessao()
+                while len(self._sessoes) > self.max_sessoes:
+                    self._sessoes.popitem(last=False)
+            else:
+                self._sessoes.move_to_end(identificador)
+            sessao.ultimo_acesso = agora
+            return identificador, sessao
+
+
+class ServidorPitia:
+    """expõe gerar_resposta, aprendizado e correção por http, atendendo requisições em paralelo"""
+
+    def __init__(self, assistente, sessoes=None, max_simultaneas=64):
+        self.assistente = assistente
+        self.sessoes = sessoes if sessoes is not None else Sessoes()  # Sessoes vazia é falsa (__len__)
+        self.max_simultaneas = max_simultaneas
+        self._semaforo = None
+
+    def aplicacao(self):
+        from aiohttp import web
+
+        aplicacao = web.Application(client_max_size=64 * 1024)
+        aplicacao.add_routes([
+            web.post('/responder', self._responder),
+            web.post('/aprender', self._aprender),
+            web.post('/corrigir', self._corrigir),
+            web.get('/saude', self._saude),
+            web.get('/metricas', self._metricas),
+        ])
+        aplicacao.on_cleanup.append(self._encerrar)
+        return aplicacao
+
+    @staticmethod
+    def _json(dados, status=200):
+        from aiohttp import web
+        return web.json_response(dados, status=status, dumps=lambda d: json.dumps(d, ensure_ascii=False))
+
+    async def _ler(self, requisicao, *campos):
+        """lê o corpo json e os campos de texto pedidos; None se faltar algum"""
+        try:
+            dados = await requisicao.json()
+        except (ValueError, UnicodeDecodeError):
+            return None, None
+        if not isinstance(dados, dict):
+            return None, None
+        valores = [str(dados.get(campo) or '').strip() for campo in campos]
+        if not all(valores):
+            return None, None
+        return valores, dados.get('sessao') or requisicao.headers.get('X-Sessao')
+
+    async def _responder(self, requisicao):
+        valores, identificador = await self._ler(requisicao, 'consulta')
+        if valores is None:
+            return self._json({'erro': "envie {\"consulta\": \"...\"}"}, status=400)
+        consulta, = valores
+        identificador, sessao = self.sessoes.obter(identificador)
+        sessao.ultima_pergunta = consulta
+
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_simultaneas)
+        try:
+            async with self._semaforo:
+                resposta = await self.assistente.gerar_resposta_async(consulta, sessao)
+        except Exception as e:
+            print(f"Erro ao responder '{consulta}': {e}")
+            return self._json({'erro': "falha ao gerar a resposta", 'sessao': identificador}, status=500)
+        return self._json({**resposta, 'sessao': identificador})
+
+    async def _aprender(self, requisicao):
+        valores, _ = await self._ler(requisicao, 'pergunta', 'resposta')
+        if valores is None:
+            return self._json({'erro': "envie {\"pergunta\": \"...\", \"resposta\": \"...\"}"}, status=400)
+        return self._json({'ok': self.assistente.aprender_resposta(*valores)})
+
+    async def _corrigir(self, requisicao):
+        valores, identificador = await self._ler(requisicao, 'correcao')
+        if valores is None or not identificador:
+            return self._json({'erro': "envie {\"correcao\": \"...\", \"sessao\": \"...\"}"}, status=400)
+        identificador, sessao = self.sessoes.obter(identificador)
+        return self._json({'ok': self.assistente.lidar_com_correcao(valores[0], sessao), 'sessao': identificador})
+
+    async def _saude(self, requisicao):
+        await self.assistente.sincronizar_async()
+        return self._json({
+            'ok': True,
+            'sessoes': len(self.sessoes),
+            'memoria': len(self.assistente.respostas_aprendidas),
+            'processo': os.getpid(),
+        })
+
+    async def _metricas(self, requisicao):
+        from aiohttp import web
+        return web.Response(text=self.assistente.rastreador.prometheus(), content_type='text/plain', charset='utf-8')
+
+    async def _encerrar(self, aplicacao):
+        await self.assistente.fechar_async()
+        self.assistente.fechar()
+
+
+def _servir(args):
+    from aiohttp import web
+
+    varios = args.trabalhadores > 1
+    # as métricas ficam sempre ligadas no servidor, expostas em /metricas
+    rastreador = Rastreador(ao_finalizar=ExportadorJsonLinhas(args.rastreio) if args.rastreio else None)
+    assistente = AssistenteAvancado(offline=args.offline, confirmar_variacao=POLITICAS_VARIACAO[args.variacoes],
+                                    rastreador=rastreador, espera_provedores=args.espera_provedores,
+                                    backend_resumo=args.resumo, processos=args.processos,
+                                    arquivo_cache=args.cache, memoria_compacta=args.memoria_compacta,
+                                    compartilhado=varios)
+    if assistente.pool_processos is not None:
+        assistente.pool_processos.aquecer()
+    servidor = ServidorPitia(assistente, max_simultaneas=args.max_simultaneas)
+    web.run_app(servidor.aplicacao(), host=args.host, port=args.porta, reuse_port=varios or None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pitia-servidor", description="api http/json da Pítia")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--offline', action='store_true', help="não baixa recursos do nltk")
+    parser.add_argument('--variacoes', choices=sorted(POLITICAS_VARIACAO), default='negar',
+                        help="o que fazer quando uma pergunta parece variação de outra já aprendida")
+    parser.add_argument('--max-simultaneas', type=int, default=64,
+                        help="consultas processadas ao mesmo tempo; as demais esperam")
+    parser.add_argument('--rastreio', metavar='ARQUIVO', help="grava cada etapa das respostas em linhas json")
+    parser.add_argument('--espera-provedores', type=float, metavar='SEGUNDOS',
+                        help="provedores de pesquisa: sem o valor, cada um só começa se o anterior falhar; "
+                        "0 consulta todos juntos; n começa o próximo após n segundos sem resposta")
+    parser.add_argument('--resumo', choices=sorted(RESUMIDORES), default='lsa',
+                        help="algoritmo de resumo das respostas da web; lsa_rapido é bem mais rápido que o lsa "
+                        "e quase sempre escolhe as mesmas frases")
+    parser.add_argument('--processos', type=int, default=0, metavar='N',
+                        help="extrai e resume as páginas em N processos (0: nas threads)")
+    parser.add_argument('--cache', metavar='ARQUIVO',
+                        help="cache de páginas em disco, compartilhado com o pitia-ingestao")
+    parser.add_argument('--memoria-compacta', action='store_true',
+                        help="memória e base de conhecimento numa arena mapeada em memória, fora do heap")
+    parser.add_argument('--trabalhadores', type=int, default=1, metavar='N',
+                        help="N processos na mesma porta, com memória e cache de páginas compartilhados")
+    args = parser.parse_args(argv)
+
+    if args.trabalhadores <= 1:
+        _servir(args)
+        return 0
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        parser.error("--trabalhadores precisa de SO_REUSEPORT, que este sistema não tem")
+    if not args.cache:
+        args.cache = "pitia_cache.sqlite"  # sem cache em disco, cada processo baixaria as mesmas páginas
+        print(f"Cache de páginas compartilhado em {args.cache}")
+    contexto = multiprocessing.get_context('spawn')
+    trabalhadores = [contexto.Process(target=_servir, args=(args,), name=f"pitia-servidor-{n}")
+                     for n in range(args.trabalhadores)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+
+    def encerrar(*_):
+        for trabalhador in trabalhadores:
+            if trabalhador.is_alive():
+                trabalhador.terminate()  # SIGTERM: o aiohttp fecha o assistente e grava o que falta
+
+    signal.signal(signal.SIGTERM, encerrar)
+    try:
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+    except KeyboardInterrupt:
+        # o ctrl+c do terminal chega a todos; um SIGINT só para este processo, não
+        prazo = time.monotonic() + 5
+        for trabalhador in trabalhadores:
+            trabalhador.join(max(0, prazo - time.monotonic()))
+        encerrar()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+    return max((trabalhador.exitcode or 0 for trabalhador in trabalhadores), default=0)
+
+
+if __name__ == "__main__":
+    main()
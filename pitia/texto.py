@@ -0,0 +1,250 @@
+"""
+   Normalização e análise de texto da Pítia.
+   Copyright (C) 2025 Stayely
+   Licenciado sob GPLv3 (https://www.gnu.org/licenses/gpl-3.0.txt)
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+
+# regras de simplificação padrão: padrão regex -> substituição
+MAPA_SIMPLIFICACAO = {
+    r"\bposteriormente\b": "depois",
+    r"\bdevido ao fato de\b": "porque",
+    r"\bconstitui\b": "é",
+    r"\bdenominado\b": "chamado"
+}
+
+# separa blocos quando um documento inteiro é normalizado de uma vez; nenhuma regra o atravessa
+SEPARADOR = '\x00'
+
+# citações [n] e parênteses, com os espaços em volta, viram um espaço (ou nada, se não
+# havia espaço); espaços repetidos ou diferentes de ' ' viram um espaço. um ' ' sozinho
+# não casa, para que o texto comum passe sem chamar a função de substituição
+_REMOVIVEL = r"\[\d+\]|\([^)\x00]*\)"
+_REMOCAO = rf"\s*(?:{_REMOVIVEL})(?:\s|{_REMOVIVEL})*|\s{{2,}}|[^\S ]"
+_SO_REMOVIVEL = re.compile(_REMOVIVEL)
+
+
+# pedaços candidatos a palavra e a regra do Tokenizer do sumy para aceitá-los: começa por
+# letra, depois letras, apóstrofo ou hífen (números e tokens com dígitos ficam de fora)
+_TOKEN = re.compile(r"\w+(?:['-]\w+)*")
+_PALAVRA = re.compile(r"[^\W\d_](?:[^\W\d_]|['-])*")
+# fim de frase: pontuação final seguida de espaço e de algo que não começa em minúscula
+_FIM_FRASE = re.compile(r'(?<=[.!?…])["”»)\]]*\s+(?=[^\sa-zà-ÿ])')
+_PARAGRAFO = re.compile(r'\n\s*\n')
+
+
+def _primeiros_caracteres(padrao):
+    """letras com que uma regra pode começar, ou None se não der para saber só olhando"""
+    while padrao.startswith(r'\b'):
+        padrao = padrao[2:]
+    if len(padrao) > 1 and padrao[0].isalnum() and padrao[1] not in '?*{':
+        return {padrao[0].lower(), padrao[0].upper()}
+    return None
+
+
+class NormalizadorTexto:
+    """limpeza de texto em uma única passada de regex
+
+    citações, parênteses, espaços e todas as regras de simplificação viram um único
+    padrão com uma tabela de substituição por grupo. as regras ficam em self.regras
+    (um dict comum); alterações nele são percebidas e o padrão é recompilado.
+    diferente de aplicar as regras uma a uma, a saída de uma regra não é reprocessada
+    pelas seguintes, e espaços dentro de uma regra casam com qualquer sequência de espaços.
+    """
+
+    def __init__(self, regras=None):
+        self.regras = dict(MAPA_SIMPLIFICACAO if regras is None else regras)
+        self._assinatura = None
+        self._padrao = None
+        self._substituicoes = []
+
+    def adicionar_regra(self, padrao, substituicao):
+        self.regras[padrao] = substituicao
+
+    def _compilar(self):
+        assinatura = tuple(self.regras.items())
+        if assinatura == self._assinatura:
+            return
+        alternativas = [f"(?P<remocao>{_REMOCAO})"]
+        self._substituicoes = []
+        # o re não pula sozinho posições que não podem iniciar nenhuma alternativa; um
+        # lookahead com os primeiros caracteres possíveis faz esse filtro barato
+        iniciais = set()
+        for indice, (padrao, substituicao) in enumerate(assinatura):
+            primeiros = _primeiros_caracteres(padrao)
+            iniciais = None if iniciais is None or primeiros is None else iniciais | primeiros
+            # espaço literal na regra casa com qualquer sequência de espaços, como depois do colapso
+            padrao = padrao.replace(' ', r'\s+')
+            alternativas.append(f"(?P<r{indice}>(?i:{padrao}))")
+            self._substituicoes.append(substituicao)
+        filtro = ''
+        if iniciais is not None:
+            filtro = r"(?=[\s\[(" + ''.join(re.escape(c) for c in sorted(iniciais)) + "])"
+        self._padrao = re.compile(filtro + '(?:' + '|'.join(alternativas) + ')')
+        self._assinatura = assinatura
+
+    def _substituir(self, encontrado):
+        grupo = encontrado.lastgroup
+        if grupo == 'remocao':
+            # só contam os espaços em volta: os de dentro de um parêntese saem com ele
+            return ' ' if _SO_REMOVIVEL.sub('', encontrado.group()) else ''
+        return self._substituicoes[int(grupo[1:])]
+
+    def normalizar(self, texto):
+        """limpa um trecho de texto"""
+        if not texto:
+            return ""
+        self._compilar()
+        return self._padrao.sub(self._substituir, texto).strip()
+
+    __call__ = normalizar
+
+    def normalizar_blocos(self, textos):
+        """limpa vários blocos de um documento numa única passada sobre o texto todo"""
+        if not textos:
+            return []
+        self._compilar()
+        documento = SEPARADOR.join(texto.replace(SEPARADOR, ' ') for texto in textos)
+        return [bloco.strip() for bloco in self._padrao.sub(self._substituir, documento).split(SEPARADOR)]
+
+
+_NAO_PALAVRA = re.compile(r"\W+")
+
+
+def normalizar_chave(texto):
+    """forma canônica de uma pergunta para busca exata: minúsculas, sem acentos, pontuação nem espaços extras"""
+    decomposto = unicodedata.normalize('NFKD', (texto or '').casefold())
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(_NAO_PALAVRA.sub(' ', sem_acentos).split())
+
+
+class TokenizadorRegex:
+    """divide frases e palavras por expressões regulares, sem o punkt do nltk
+
+    tem a mesma interface do Tokenizer do sumy, então também serve ao PlaintextParser.
+    """
+    language = 'portuguese'
+
+    def to_sentences(self, paragrafo):
+        return tuple(frase.strip() for frase in _FIM_FRASE.split(paragrafo) if frase.strip())
+
+    def to_words(self, frase):
+        return tuple(token for token in _TOKEN.findall(frase) if _PALAVRA.fullmatch(token))
+
+
+# sem estado; compartilhado para que documentos e resumidores reconheçam o mesmo tokenizador
+TOKENIZADOR_PADRAO = TokenizadorRegex()
+
+
+def dividir_frases(texto, tokenizador=None):
+    """frases do texto em ordem, parágrafo por parágrafo (as linhas de um parágrafo são juntadas)"""
+    tokenizador = tokenizador or TOKENIZADOR_PADRAO
+    frases = []
+    for paragrafo in _PARAGRAFO.split(texto):
+        paragrafo = ' '.join(paragrafo.split())
+        if paragrafo:
+            frases.extend(tokenizador.to_sentences(paragrafo))
+    return frases
+
+
+class Documento:
+    """um texto analisado uma vez: frases, palavras e radicais saem no primeiro uso e ficam guardados
+
+    as etapas que recebem o mesmo Documento (resumo, contagem de palavras, palavras-chave)
+    não tokenizam o texto de novo.
+    """
+
+    def __init__(self, texto, tokenizador=None, radical=None):
+        self.texto = texto or ''
+        self.tokenizador = tokenizador or TOKENIZADOR_PADRAO
+        self._radical = radical
+
+    def __str__(self):
+        return self.texto
+
+    @cached_property
+    def impressao(self):
+        """digest do conteúdo, usado como chave de memorização"""
+        return hashlib.blake2b(self.texto.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    @cached_property
+    def palavras(self):
+        """palavras minúsculas separadas por espaço, como no str.split"""
+        return self.texto.lower().split()
+
+    @cached_property
+    def frases(self):
+        return dividir_frases(self.texto, self.tokenizador)
+
+    @cached_property
+    def palavras_por_frase(self):
+        """palavras de cada frase pela regra do tokenizador, alinhadas com frases"""
+        return [self.tokenizador.to_words(frase) for frase in self.frases]
+
+    @cached_property
+    def radicais(self):
+        """radicais das palavras com mais de 3 letras"""
+        if self._radical is None:
+            raise ValueError("documento criado sem stemmer")
+        return frozenset(self._radical(palavra) for palavra in self.palavras if len(palavra) > 3)
+
+
+class AnalisadorTexto:
+    """camada de análise compartilhada: stemmer com LRU e criação de Documentos
+
+    carregar_stemmer() devolve o stemmer (qualquer objeto com .stem) e só é chamado no
+    primeiro radical pedido; sem ele, o radical é a própria palavra. os últimos
+    max_documentos textos analisados são guardados, então etapas que recebem o mesmo
+    texto em sequência compartilham o Documento.
+    """
+
+    def __init__(self, carregar_stemmer=None, tokenizador=None, max_radicais=100000, max_documentos=8):
+        self._carregar_stemmer = carregar_stemmer
+        self.tokenizador = tokenizador or TOKENIZADOR_PADRAO
+        self.radical = lru_cache(maxsize=max_radicais)(self._radical)
+        self.max_documentos = max_documentos
+        self._documentos = OrderedDict()
+        self._trava = threading.Lock()
+        self.documentos_reaproveitados = 0
+
+    @cached_property
+    def stemmer(self):
+        return self._carregar_stemmer() if self._carregar_stemmer else None
+
+    def _radical(self, palavra):
+        stemmer = self.stemmer
+        return stemmer.stem(palavra) if stemmer is not None else palavra
+
+    def radicais(self, texto):
+        """radicais das palavras com mais de 3 letras do texto, como num Documento"""
+        radical = self.radical
+        return frozenset(radical(palavra) for palavra in texto.lower().split() if len(palavra) > 3)
+
+    def analisar(self, texto):
+        """o Documento do texto; um Documento passado volta como está"""
+        if isinstance(texto, Documento):
+            return texto
+        texto = texto or ''
+        with self._trava:
+            documento = self._documentos.get(texto)
+            if documento is not None:
+                self._documentos.move_to_end(texto)
+                self.documentos_reaproveitados += 1
+                return documento
+        documento = Documento(texto, self.tokenizador, self.radical)
+        if self.max_documentos:
+            with self._trava:
+                self._documentos[texto] = documento
+                while len(self._documentos) > self.max_documentos:
+                    self._documentos.popitem(last=False)
+        return documento
+
+    def estatisticas(self):
+        info = self.radical.cache_info()
+        return {'radicais_acertos': info.hits, 'radicais_falhas': info.misses, 'radicais_memorizados': info.currsize,
+                'documentos_reaproveitados': self.documentos_reaproveitados}
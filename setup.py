@@ -13,17 +13,23 @@ setup(
     long_description_content_type="text/markdown",
     packages=['pitia'],
     install_requires=[
-        "requests>=4.13.4",
         "beautifulsoup4>=2.0.3",
         "google>=2.0.3",
         "nltk>=3.9.1",
         "sumy>=0.11.0",
         "scikit-learn>=1.7.1",
-        "numpy>=1.20"
+        "numpy>=1.20",
+        "aiohttp>=3.9"
     ],
+    extras_require={
+        # interpretadores de html mais rápidos, escolhidos automaticamente se instalados
+        'rapido': ["lxml>=4.9", "selectolax>=0.3"],
+    },
     entry_points={
         'console_scripts': [
             'pitia=pitia.cli:main',
+            'pitia-servidor=pitia.servidor:main',
+            'pitia-ingestao=pitia.ingestao:main',
         ],
     },
     python_requires=">=3.8",
@@ -0,0 +1,116 @@
+import json
+import weakref
+
+from pitia import armazenamento
+from pitia.arena import ArenaTextos, MapaCompacto, escrever_arena
+from pitia.armazenamento import ArmazenamentoArena
+
+
+def test_arena_guarda_cada_texto_uma_vez(tmp_path):
+    caminho = tmp_path / "k.arena"
+    escrever_arena(str(caminho), [('zeus', ['rei', 'deus']), ('hera', ['rainha']), ('atena', ['deus']),
+                                  ('poseidon', [])], geracao=3)
+    arena = ArenaTextos(str(caminho))
+
+    assert (len(arena), arena.geracao, arena.textos) == (4, 3, 7)
+    assert arena.obter('zeus') == ['rei', 'deus']
+    assert arena.primeiro('hera') == 'rainha'
+    assert arena.primeiro('poseidon', 'nada') == 'nada'
+    assert 'apolo' not in arena and arena.obter('apolo') is None
+    assert list(arena.chaves()) == ['zeus', 'hera', 'atena', 'poseidon']
+    arena.fechar()
+
+
+def test_mapa_compacto_altera_so_a_camada_de_cima(tmp_path):
+    caminho = tmp_path / "k.arena"
+    escrever_arena(str(caminho), [('zeus', ['rei']), ('hera', ['rainha'])])
+    arena = ArenaTextos(str(caminho))
+    mapa = MapaCompacto(arena, listas=True, fabrica=list)
+
+    mapa['zeus'].append('raio')
+    mapa['apolo'].append('sol')
+
+    assert arena.obter('zeus') == ['rei']
+    assert dict(mapa.itens_listas()) == {'zeus': ['rei', 'raio'], 'hera': ['rainha'], 'apolo': ['sol']}
+    assert len(mapa) == 3
+    assert set(mapa.sobreposicao) == {'zeus', 'apolo'}
+
+
+def test_compactar_leva_tudo_para_a_arena(tmp_path):
+    caminho = tmp_path / "m.jsonl"
+    disco = ArmazenamentoArena(str(caminho))
+    estado = disco.carregar()
+    for chave, valor in (('a', '1'), ('b', '2'), ('a', '3')):
+        estado[chave] = valor
+        disco.definir(chave, valor)
+    disco.descarregar()
+    disco.compactar(estado)
+
+    assert estado.sobreposicao == {}
+    assert dict(estado) == {'a': '3', 'b': '2'}
+    registros = [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+    assert registros == [{'op': 'geracao', 'v': 1}]
+    assert dict(ArmazenamentoArena(str(caminho)).carregar()) == {'a': '3', 'b': '2'}
+
+
+def test_log_anterior_a_arena_e_descartado(tmp_path):
+    caminho = tmp_path / "m.jsonl"
+    disco = ArmazenamentoArena(str(caminho))
+    estado = disco.carregar()
+    estado['a'] = '1'
+    disco.definir('a', '1')
+    disco.compactar(estado)
+    disco.definir('b', '2')
+    disco.descarregar()
+    # queda entre gravar a arena nova e recomeçar o log: o log ainda é da geração 1
+    escrever_arena(str(tmp_path / "m.arena"), [('a', ['1']), ('b', ['2'])], geracao=2)
+
+    recarregado = ArmazenamentoArena(str(caminho))
+    assert dict(recarregado.carregar()) == {'a': '1', 'b': '2'}
+    assert json.loads(caminho.read_text(encoding='utf-8').splitlines()[0]) == {'op': 'geracao', 'v': 2}
+
+
+def test_alteracao_durante_a_compactacao_continua_pendente(tmp_path, monkeypatch):
+    caminho = tmp_path / "m.jsonl"
+    disco = ArmazenamentoArena(str(caminho))
+    estado = disco.carregar()
+    estado['a'] = '1'
+    disco.definir('a', '1')
+    escrever = armazenamento.escrever_arena
+
+    def escrever_e_alterar(*args, **opcoes):
+        escrever(*args, **opcoes)
+        # outra thread aprende algo enquanto a arena é gravada
+        with disco.alterando():
+            estado['b'] = '2'
+            disco.definir('b', '2')
+
+    monkeypatch.setattr(armazenamento, 'escrever_arena', escrever_e_alterar)
+    disco.compactar(estado)
+
+    assert 'b' not in disco.arena
+    assert dict(estado) == {'a': '1', 'b': '2'}
+    disco.descarregar()
+    assert dict(ArmazenamentoArena(str(caminho)).carregar()) == {'a': '1', 'b': '2'}
+
+
+def test_arena_trocada_e_liberada_quando_ninguem_mais_a_usa(tmp_path):
+    caminho = tmp_path / "m.jsonl"
+    disco = ArmazenamentoArena(str(caminho))
+    estado = disco.carregar()
+    estado['a'] = '1'
+    disco.definir('a', '1')
+    disco.compactar(estado)
+    primeira = weakref.ref(disco.arena._mapa)
+    instantaneo = estado.instantaneo()  # um leitor que ainda está na arena antiga
+
+    estado['b'] = '2'
+    disco.definir('b', '2')
+    disco.compactar(estado)
+    assert primeira() is not None and instantaneo.get('a') == '1'
+    del instantaneo
+    assert primeira() is None  # sem gc.collect: a arena não entra em ciclos
+
+    segunda = weakref.ref(disco.arena._mapa)
+    disco.carregar(estado)
+    assert segunda() is None and dict(estado) == {'a': '1', 'b': '2'}
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from pitia.armazenamento import ArmazenamentoLog
+
+
+def _gravar(caminho, chaves):
+    log = ArmazenamentoLog(str(caminho))
+    for i, chave in enumerate(chaves):
+        log.definir(chave, f"v{i}")
+    log.descarregar()
+    return log
+
+
+def test_log_reproduz_os_registros(tmp_path):
+    caminho = tmp_path / "memoria.jsonl"
+    log = _gravar(caminho, ['k0', 'k1'])
+    log.anexar('lista', 'a')
+    log.anexar('lista', 'b')
+    log.definir('k0', 'novo')
+    log.descarregar()
+    assert ArmazenamentoLog(str(caminho)).carregar() == {'k0': 'novo', 'k1': 'v1', 'lista': ['a', 'b']}
+
+
+def test_registro_corrompido_no_meio_nao_apaga_os_seguintes(tmp_path):
+    caminho = tmp_path / "memoria.jsonl"
+    _gravar(caminho, [f"k{i}" for i in range(5)])
+    linhas = caminho.read_bytes().splitlines(keepends=True)
+    linhas[2] = b'{"op": "set", "k": "k2", "v"\n'
+    caminho.write_bytes(b''.join(linhas))
+    tamanho = caminho.stat().st_size
+
+    estado = ArmazenamentoLog(str(caminho)).carregar()
+
+    assert estado == {'k0': 'v0', 'k1': 'v1', 'k3': 'v3', 'k4': 'v4'}
+    assert caminho.stat().st_size == tamanho  # nada foi cortado do arquivo
+
+
+def test_linha_final_incompleta_e_cortada(tmp_path):
+    caminho = tmp_path / "memoria.jsonl"
+    _gravar(caminho, ['k0', 'k1'])
+    completo = caminho.stat().st_size
+    with open(caminho, 'ab') as f:
+        f.write(b'{"op": "set", "k": "k2", "v": "me')
+
+    log = ArmazenamentoLog(str(caminho))
+    assert log.carregar() == {'k0': 'v0', 'k1': 'v1'}
+    assert caminho.stat().st_size == completo
+
+    # o próximo registro fica legível depois do corte
+    log.definir('k2', 'v2')
+    log.descarregar()
+    assert ArmazenamentoLog(str(caminho)).carregar()['k2'] == 'v2'
+
+
+def test_compactar_mantem_so_o_estado_atual(tmp_path):
+    caminho = tmp_path / "memoria.jsonl"
+    log = _gravar(caminho, ['k0', 'k0', 'k0'])
+    estado = log.carregar()
+    log.compactar(estado)
+    registros = [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+    assert [r for r in registros if r.get('op') == 'set'] == [{'op': 'set', 'k': 'k0', 'v': 'v2'}]
+    assert ArmazenamentoLog(str(caminho)).carregar() == {'k0': 'v2'}
+
+
+def test_descarga_que_falha_mantem_os_pendentes(tmp_path):
+    pasta = tmp_path / "ainda_nao_existe"
+    log = ArmazenamentoLog(str(pasta / "memoria.jsonl"))
+    log.definir('k0', 'v0')
+    with pytest.raises(OSError):
+        log.descarregar()
+
+    log.definir('k1', 'v1')
+    pasta.mkdir()
+    log.descarregar()
+    assert ArmazenamentoLog(str(pasta / "memoria.jsonl")).carregar() == {'k0': 'v0', 'k1': 'v1'}
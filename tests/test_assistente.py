@@ -0,0 +1,13 @@
+from pitia import AssistenteAvancado
+
+
+def test_pergunta_guardada_vence_perguntas_quase_iguais(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistente = AssistenteAvancado(offline=True)
+    try:
+        assistente.aprender_lote([(f"pergunta numero {n} sobre algo", f"resposta {n}") for n in range(1500)])
+        assert assistente._encontrar_pergunta_similar("pergunta numero 7 sobre algo") == "pergunta numero 7 sobre algo"
+        assert assistente._encontrar_pergunta_similar(" Pergunta numero 7 sobre algo") == "pergunta numero 7 sobre algo"
+        assert assistente.gerar_resposta("pergunta numero 7 sobre algo") == {"response": "resposta 7", "source": "memória"}
+    finally:
+        assistente.fechar()
@@ -0,0 +1,120 @@
+from pitia import cache as cache_modulo
+from pitia.cache import CacheDisco, CacheDuasCamadas, CacheMemoria, CacheValidacao
+
+
+def test_validadores_limitados_a_max_entradas():
+    validacao = CacheValidacao(max_entradas=3)
+    for i in range(5):
+        validacao.guardar(f"https://exemplo.com/{i}", {'ETag': f'"v{i}"'}, f"validada_{i}", 100, 0.1)
+    assert len(validacao) == 3
+    # as mais antigas saem primeiro
+    assert validacao.obter("https://exemplo.com/0") is None
+    assert validacao.obter("https://exemplo.com/4")['etag'] == '"v4"'
+    assert validacao.estatisticas()['validadores_removidos'] == 2
+
+
+def test_sem_validadores_nada_e_guardado():
+    cache = CacheDuasCamadas(validacao=CacheValidacao())
+    cache.guardar_validado("https://exemplo.com/", {}, "Título", "conteúdo", 10, 0.1)
+    assert len(cache.validacao) == 0
+    assert len(cache.memoria) == 0
+
+
+def test_extracao_validada_fica_no_cache_de_duas_camadas():
+    cache = CacheDuasCamadas(memoria=CacheMemoria(max_entradas=10), validacao=CacheValidacao())
+    cache.guardar_validado("https://exemplo.com/", {'ETag': '"v1"'}, "Título", "conteúdo", 10, 0.1)
+    entrada = cache.obter_validado("https://exemplo.com/")
+    assert (entrada['etag'], entrada['titulo'], entrada['conteudo']) == ('"v1"', "Título", "conteúdo")
+
+    # sem a extração, o validador não serve mais para nada
+    cache.memoria.limpar()
+    assert cache.obter_validado("https://exemplo.com/") is None
+    assert len(cache.validacao) == 0
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def time(self):
+        return self.agora
+
+
+def test_memoria_expira_pelo_ttl_e_remove_a_menos_usada(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(cache_modulo, 'time', relogio)
+    memoria = CacheMemoria(max_entradas=2, ttl=60)
+    memoria.guardar('a', 'A')
+    memoria.guardar('b', 'B', ttl=10)
+    assert memoria.obter('a') == (True, 'A')  # 'a' passa a ser a mais recente
+
+    memoria.guardar('c', 'C')
+    assert memoria.obter('b') == (False, None)
+    assert memoria.remocoes == 1
+
+    relogio.agora += 61
+    assert memoria.obter('a') == (False, None)
+    assert len(memoria) == 1
+
+
+def test_memoria_limitada_em_bytes():
+    memoria = CacheMemoria(max_entradas=100, max_bytes=25, ttl=None)
+    for chave in 'abc':
+        memoria.guardar(chave, chave * 10)
+    assert [chave for chave in 'abc' if memoria.obter(chave)[0]] == ['b', 'c']
+    assert memoria.bytes == 20
+
+
+def test_disco_sobrevive_ao_reinicio_e_devolve_a_validade_para_a_memoria(tmp_path, monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(cache_modulo, 'time', relogio)
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheDuasCamadas(memoria=CacheMemoria(ttl=60), disco=CacheDisco(caminho, ttl=3600))
+    cache.guardar('pagina_x', {'content': 'texto'}, persistir=True)
+    cache.guardar('search_y', ['https://exemplo.com/'])
+    cache.fechar()
+
+    reiniciado = CacheDuasCamadas(memoria=CacheMemoria(ttl=60), disco=CacheDisco(caminho, ttl=3600))
+    assert reiniciado.obter('search_y') is None  # só o que foi persistido volta
+    relogio.agora += 100
+    assert reiniciado.obter('pagina_x') == {'content': 'texto'}
+    assert reiniciado.obter('pagina_x') == {'content': 'texto'}
+    # a cópia na memória vence junto com a do disco, não 60 s depois da leitura
+    relogio.agora += 3500
+    assert reiniciado.obter('pagina_x') is None
+    assert {nome: reiniciado.estatisticas()[nome] for nome in ('acertos_memoria', 'acertos_disco', 'falhas')} == \
+        {'acertos_memoria': 1, 'acertos_disco': 1, 'falhas': 2}
+    reiniciado.fechar()
+
+
+def test_pesquisa_no_duckduckgo_usa_o_cache_ate_vencer(tmp_path, monkeypatch):
+    from benchmarks.comum import gerar_pagina_duckduckgo
+    from benchmarks.fixtures import AssistenteFixtures, Fixtures
+
+    monkeypatch.chdir(tmp_path)
+    fixtures = Fixtures()
+    fixtures.guardar_http("https://html.duckduckgo.com/html/?q=quem+era+zeus", 200,
+                          [('Content-Type', 'text/html; charset=utf-8')], gerar_pagina_duckduckgo(5), 'utf-8')
+    memoria = CacheMemoria(ttl=60)
+    assistente = AssistenteFixtures(fixtures, offline=True, cache=CacheDuasCamadas(memoria=memoria))
+    downloads = []
+    requisitar = assistente.cliente_http._requisitar
+
+    async def contado(url, *args):
+        downloads.append(url)
+        return await requisitar(url, *args)
+
+    assistente.cliente_http._requisitar = contado
+    try:
+        primeira = assistente.pesquisar_duckduckgo("quem era zeus")
+        assert [resultado['url'] for resultado in primeira] == [f"https://exemplo{i}.com.br/artigo" for i in range(3)]
+        assert assistente.pesquisar_duckduckgo("quem era zeus") == primeira
+        assert len(downloads) == 1
+
+        relogio = _Relogio()
+        relogio.agora = cache_modulo.time.time() + 61
+        monkeypatch.setattr(cache_modulo, 'time', relogio)
+        assert assistente.pesquisar_duckduckgo("quem era zeus") == primeira
+        assert len(downloads) == 2
+    finally:
+        assistente.fechar()
@@ -0,0 +1,82 @@
+import multiprocessing
+
+import pytest
+
+from pitia.armazenamento import ArmazenamentoArena, ArmazenamentoLog
+
+_PROCESSOS = 3
+_RESPOSTAS = 150
+_COMUNS = 10
+
+
+def _aprender(classe, caminho, numero, barreira):
+    # log pequeno para as compactações acontecerem no meio das gravações dos outros
+    disco = classe(caminho, fator_compactacao=1.5, minimo_compactacao=40, compartilhado=True)
+    estado = disco.carregar()
+    barreira.wait()
+    for i in range(_RESPOSTAS):
+        for chave, valor in ((f"p{numero}_{i}", f"r{i}"), (f"comum{i % _COMUNS}", f"de {numero}")):
+            with disco.alterando():
+                estado[chave] = valor
+                disco.definir(chave, valor)
+        if i % 10 == 9:
+            # como AssistenteAvancado._salvar_memoria
+            with disco.trava():
+                disco.acompanhar(estado)
+                disco.descarregar()
+                if disco.precisa_compactar(len(estado)):
+                    disco.compactar(estado)
+    disco.descarregar()
+
+
+@pytest.mark.parametrize('classe', [ArmazenamentoLog, ArmazenamentoArena])
+def test_processos_gravando_juntos_nao_perdem_registros(tmp_path, classe):
+    caminho = str(tmp_path / "memoria.jsonl")
+    contexto = multiprocessing.get_context('spawn')
+    barreira = contexto.Barrier(_PROCESSOS)
+    processos = [contexto.Process(target=_aprender, args=(classe, caminho, numero, barreira))
+                 for numero in range(_PROCESSOS)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(120)
+        assert processo.exitcode == 0
+
+    estado = classe(caminho).carregar()
+    assert len(estado) == _PROCESSOS * _RESPOSTAS + _COMUNS
+    assert all(estado[f"p{numero}_{i}"] == f"r{i}" for numero in range(_PROCESSOS) for i in range(_RESPOSTAS))
+
+
+def test_acompanhar_traz_so_o_que_os_outros_gravaram(tmp_path):
+    caminho = str(tmp_path / "memoria.jsonl")
+    um, outro = (ArmazenamentoLog(caminho, compartilhado=True) for _ in range(2))
+    estado_um, estado_outro = um.carregar(), outro.carregar()
+
+    estado_um['a'] = '1'
+    um.definir('a', '1')
+    um.descarregar()
+    assert outro.acompanhar(estado_outro) == ['a']
+
+    estado_outro['b'] = '2'
+    outro.definir('b', '2')
+    outro.descarregar()
+    assert outro.acompanhar(estado_outro) == []
+    assert um.acompanhar(estado_um) == ['b']
+    assert estado_um == estado_outro == {'a': '1', 'b': '2'}
+
+
+def test_acompanhar_recarrega_depois_de_compactacao_alheia(tmp_path):
+    caminho = str(tmp_path / "memoria.jsonl")
+    um, outro = (ArmazenamentoLog(caminho, compartilhado=True) for _ in range(2))
+    estado_um, estado_outro = um.carregar(), outro.carregar()
+    estado_um['a'] = '1'
+    um.definir('a', '1')
+    um.compactar(estado_um)
+    # ainda não gravado pelo outro: continua no estado dele depois da recarga
+    estado_outro['b'] = '2'
+    outro.definir('b', '2')
+
+    assert sorted(outro.acompanhar(estado_outro)) == ['a', 'b']
+    assert estado_outro == {'a': '1', 'b': '2'}
+    outro.descarregar()
+    assert ArmazenamentoLog(caminho).carregar() == {'a': '1', 'b': '2'}
@@ -0,0 +1,54 @@
+import pytest
+
+from pitia.extracao import BACKENDS_HTML, extrair_conteudo_incremental
+
+# p, li, células e títulos sem fechamento, li com p dentro, marcação inline e texto solto
+MAL_FORMADA = """<!DOCTYPE html><html><head><title>Mitologia grega</title></head><body>
+<nav><p>menu que não deve entrar no conteúdo</p></nav>
+<div id="content">
+<p>Zeus era o rei dos deuses do Olimpo
+<p>Ele governava o <b>céu e o <i>trovão</i></b> com seus raios
+<ul><li>Hera era a esposa de Zeus
+<li>Poseidon governava todos os mares <p>e também provocava os terremotos</ul>
+<li>um item sem lista com palavras suficientes
+<p>Hades reinava sobre o mundo <!-- nota --> dos mortos
+<h2>Os três irmãos dividiram o mundo</h2>
+texto solto fora de qualquer bloco de texto
+<p>Atena nasceu da cabeça de Zeus já adulta
+<table><tr><td><p>Apolo era o deus da música<td>uma célula sem parágrafo nenhum aqui
+<tr><th><p>Ártemis era a deusa da caça</table>
+<h3>Titãs e deuses primordiais sem fechar<h4>Cronos devorava os próprios filhos</h4>
+</div></body></html>""".encode('utf-8')
+
+ESPERADO = ("Zeus era o rei dos deuses do Olimpo Ele governava o céu e o trovão com seus raios "
+            "Hera era a esposa de Zeus Poseidon governava todos os mares e também provocava os terremotos "
+            # o li sem lista fica aberto até o fim: o texto solto e a célula sem p são dele
+            "um item sem lista com palavras suficientes texto solto fora de qualquer bloco de texto "
+            "uma célula sem parágrafo nenhum aqui "
+            "Hades reinava sobre o mundo dos mortos Os três irmãos dividiram o mundo "
+            "Atena nasceu da cabeça de Zeus já adulta Apolo era o deus da música Ártemis era a deusa da caça "
+            "Titãs e deuses primordiais sem fechar Cronos devorava os próprios filhos")
+
+
+def _backend(nome):
+    try:
+        return BACKENDS_HTML[nome]()
+    except ImportError:
+        pytest.skip(f"backend {nome} não instalado")
+
+
+@pytest.mark.parametrize('nome', list(BACKENDS_HTML))
+def test_backends_dao_o_mesmo_texto_em_marcacao_mal_formada(nome):
+    assert _backend(nome).extrair(MAL_FORMADA) == ("Mitologia grega", ESPERADO)
+
+
+def test_extrator_incremental_da_o_mesmo_texto_em_marcacao_mal_formada():
+    for tamanho_parte in (7, 64 * 1024):
+        assert extrair_conteudo_incremental(MAL_FORMADA, tamanho_parte=tamanho_parte) == ("Mitologia grega", ESPERADO)
+
+
+@pytest.mark.parametrize('nome', list(BACKENDS_HTML))
+def test_texto_de_bloco_aninhado_nao_se_repete(nome):
+    html = b"<body><ul><li><p>um paragrafo dentro de um item</p></li></ul></body>"
+    assert _backend(nome).extrair(html)[1] == "um paragrafo dentro de um item"
+    assert extrair_conteudo_incremental(html)[1] == "um paragrafo dentro de um item"
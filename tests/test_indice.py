@@ -0,0 +1,71 @@
+import heapq
+import math
+import random
+from collections import Counter
+
+from pitia.indice import IndiceSimilaridade, tokenizar
+
+
+def _textos(quantidade, semente=5):
+    aleatorio = random.Random(semente)
+    comuns = ['deus', 'grego', 'mitologia', 'quem', 'era', 'rei', 'olimpo', 'filho']
+    raros = [f"termo{i}" for i in range(400)]
+    return [' '.join(aleatorio.sample(comuns, 4) + aleatorio.sample(raros, 2)) for _ in range(quantidade)]
+
+
+def _forca_bruta(indice, consulta, k):
+    pesos = {termo: contagem * indice._idf(termo)
+             for termo, contagem in Counter(tokenizar(consulta)).items() if termo in indice.postings}
+    norma_consulta = math.sqrt(sum(peso * peso for peso in pesos.values()))
+    notas = []
+    for id_doc, frequencias in enumerate(indice.frequencias):
+        produto = sum(peso * indice._idf(termo) * frequencias[termo] for termo, peso in pesos.items() if termo in frequencias)
+        notas.append((min(1.0, produto / ((indice.normas[id_doc] or 1.0) * norma_consulta)), id_doc))
+    return [round(nota, 9) for nota, _ in heapq.nlargest(k, notas)]
+
+
+def test_busca_poda_listas_comuns_sem_mudar_o_ranking():
+    textos = _textos(3000)
+    indice = IndiceSimilaridade(limite_postings=None)
+    indice.adicionar_varios(textos)
+    aleatorio = random.Random(1)
+    consultas = aleatorio.sample(textos, 30) + ['quem era o deus grego rei do olimpo', 'termo7 filho']
+    for consulta in consultas:
+        obtido = [round(nota, 9) for _, nota in indice.buscar(consulta, k=3)]
+        assert obtido == _forca_bruta(indice, consulta, 3)
+
+
+def test_pergunta_indexada_e_a_mais_similar_a_si_mesma():
+    indice = IndiceSimilaridade()
+    indice.adicionar_varios(_textos(500))
+    texto = indice.documentos[123]
+    melhor, nota = indice.buscar(texto)[0]
+    assert melhor == texto and nota > 0.999
+
+
+def test_lote_pequeno_nao_recalcula_as_normas_do_corpus(monkeypatch):
+    indice = IndiceSimilaridade()
+    indice.adicionar_varios(_textos(2000))
+    recalculos = []
+    original = indice._recalcular_normas
+    monkeypatch.setattr(indice, '_recalcular_normas', lambda: recalculos.append(len(indice)) or original())
+
+    for lote in range(20):
+        indice.adicionar_varios(f"pergunta nova {lote} numero {i}" for i in range(5))
+    assert recalculos == []
+
+    # passar do fator de crescimento recalcula uma vez, no fim do lote
+    indice.adicionar_varios(_textos(600, semente=9))
+    assert recalculos == [len(indice)]
+    assert indice.normas == [indice._norma(freq) for freq in indice.frequencias]
+
+
+def test_perguntas_que_so_diferem_em_termos_de_um_caractere_empatam():
+    # "7" não vira termo, então a busca não separa a pergunta guardada das vizinhas, com ou
+    # sem teto; quem separa é o atalho de pergunta exata do assistente (test_assistente.py)
+    textos = [f"pergunta numero {n} sobre algo" for n in range(1500)]
+    for limite in (None, 2000):
+        indice = IndiceSimilaridade(limite_postings=limite)
+        indice.adicionar_varios(textos)
+        assert "pergunta numero 7 sobre algo" in indice
+        assert [nota for _, nota in indice.buscar("pergunta numero 7 sobre algo", k=3)] == [1.0, 1.0, 1.0]
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import contextmanager
+
+from pitia.armazenamento import ArmazenamentoLog
+from pitia.ingestao import Ingestao
+
+
+class AssistenteFalso:
+    """só o que Ingestao usa para gravar; confere que o checkpoint nunca passa do que foi gravado"""
+
+    def __init__(self, caminho_checkpoint):
+        self.caminho_checkpoint = caminho_checkpoint
+        self.aprendidos = []
+        self.gravados = []
+
+    @contextmanager
+    def lote_aprendizado(self):
+        yield self
+
+    def descarregar_aprendizado(self):
+        no_disco = ArmazenamentoLog(self.caminho_checkpoint).carregar()
+        assert {item for item, situacao in no_disco.items() if situacao == 'ok'} <= set(self.gravados)
+        self.gravados = list(self.aprendidos)
+
+    def salvar_conhecimento(self):
+        pass
+
+
+def _rodar(ingestao, itens, funcao):
+    asyncio.run(ingestao._processar(itens, funcao))
+
+
+def test_retomada_pula_os_feitos_e_refaz_as_falhas(tmp_path):
+    caminho = str(tmp_path / "ingestao.jsonl")
+    assistente = AssistenteFalso(caminho)
+
+    async def primeira(item):
+        if item == 'd':
+            raise RuntimeError("página fora do ar")
+        assistente.aprendidos.append(item)
+        return item != 'c'
+
+    ingestao = Ingestao(assistente, caminho, intervalo_checkpoint=1)
+    _rodar(ingestao, ['a', 'b', 'c', 'd', 'a'], primeira)
+    assert ingestao.contagem == {'ok': 2, 'falha': 2, 'pulados': 0, 'ignorados': 0}
+
+    refeitos = []
+
+    async def segunda(item):
+        refeitos.append(item)
+        assistente.aprendidos.append(item)
+        return True
+
+    retomada = Ingestao(assistente, caminho, intervalo_checkpoint=1)
+    _rodar(retomada, ['a', 'b', 'c', 'd'], segunda)
+    assert sorted(refeitos) == ['c', 'd']
+    assert retomada.contagem == {'ok': 2, 'falha': 0, 'pulados': 2, 'ignorados': 0}
+    assert ArmazenamentoLog(caminho).carregar() == {'a': 'ok', 'b': 'ok', 'c': 'ok', 'd': 'ok'}
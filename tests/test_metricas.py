@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from benchmarks.fixtures import AssistenteFixtures, Fixtures
+from pitia.metricas import ExportadorJsonLinhas, Rastreador
+from pitia.provedores import ProvedorFixo
+
+
+def test_spans_aninhados_inclusive_em_tarefas_filhas():
+    registros = []
+    rastreador = Rastreador(ao_finalizar=registros.append)
+
+    async def etapa(nome):
+        with rastreador.span(nome) as span:
+            await asyncio.sleep(0)
+            span.definir(situacao='ok')
+
+    async def consulta():
+        with rastreador.span('consulta', lote=False):
+            await asyncio.gather(etapa('pagina'), etapa('pagina'))
+
+    asyncio.run(consulta())
+    asyncio.run(consulta())
+
+    por_id = {registro['id']: registro for registro in registros}
+    paginas = [registro for registro in registros if registro['nome'] == 'pagina']
+    assert len(paginas) == 4
+    for pagina in paginas:
+        pai = por_id[pagina['pai']]
+        assert pai['nome'] == 'consulta' and pai['pai'] is None and pai['lote'] is False
+        assert pagina['rastro'] == pai['id'] and pagina['situacao'] == 'ok'
+    assert len({registro['rastro'] for registro in registros}) == 2
+
+
+def test_erro_vira_atributo_do_span():
+    registros = []
+    rastreador = Rastreador(ao_finalizar=registros.append)
+    try:
+        with rastreador.span('resumo'):
+            raise ValueError("falhou")
+    except ValueError:
+        pass
+    assert registros[0]['erro'] == 'ValueError'
+
+
+def test_rastreador_desligado_nao_guarda_nada():
+    registros = []
+    rastreador = Rastreador(ativo=False, ao_finalizar=registros.append)
+    with rastreador.span('consulta') as span:
+        span.definir(origem='web')
+    rastreador.contar('cache', tipo='pagina')
+    rastreador.observar('pagina_segundos', 0.2)
+    assert registros == []
+    assert rastreador.instantaneo() == {'contadores': [], 'histogramas': [], 'medidores': {}}
+
+
+def test_histograma_contadores_e_medidores_no_formato_prometheus():
+    rastreador = Rastreador(limites=(0.01, 0.1, 1.0))
+    for valor in (0.005, 0.05, 0.05, 5.0):
+        rastreador.observar('pagina_segundos', valor, dominio='pt.wikipedia.org')
+    rastreador.contar('cache', tipo='pagina', resultado='acerto')
+    rastreador.contar('cache', 2, tipo='pagina', resultado='acerto')
+    rastreador.contar('erro', mensagem='aspas " e \\ barra')
+    rastreador.registrar_coletor(lambda: {'entradas_memoria': 7})
+    rastreador.registrar_coletor(lambda: 1 / 0)  # um coletor com defeito não derruba os outros
+
+    linhas = rastreador.prometheus().splitlines()
+    assert linhas == [
+        '# TYPE pitia_cache_total counter',
+        'pitia_cache_total{resultado="acerto",tipo="pagina"} 3',
+        '# TYPE pitia_erro_total counter',
+        'pitia_erro_total{mensagem="aspas \\" e \\\\ barra"} 1',
+        '# TYPE pitia_pagina_segundos histogram',
+        'pitia_pagina_segundos_bucket{dominio="pt.wikipedia.org",le="0.01"} 1',
+        'pitia_pagina_segundos_bucket{dominio="pt.wikipedia.org",le="0.1"} 3',
+        'pitia_pagina_segundos_bucket{dominio="pt.wikipedia.org",le="1.0"} 3',
+        'pitia_pagina_segundos_bucket{dominio="pt.wikipedia.org",le="+Inf"} 4',
+        'pitia_pagina_segundos_sum{dominio="pt.wikipedia.org"} 5.105',
+        'pitia_pagina_segundos_count{dominio="pt.wikipedia.org"} 4',
+        '# TYPE pitia_entradas_memoria gauge',
+        'pitia_entradas_memoria 7',
+    ]
+    instantaneo = json.loads(json.dumps(rastreador.instantaneo()))
+    assert instantaneo['histogramas'][0]['baldes'] == [1, 2, 0, 1]
+    assert instantaneo['medidores'] == {'entradas_memoria': 7}
+
+
+def test_exportador_grava_um_span_por_linha(tmp_path):
+    caminho = tmp_path / "rastreio.jsonl"
+    exportador = ExportadorJsonLinhas(str(caminho))
+    rastreador = Rastreador(ao_finalizar=exportador)
+    rastreador.adicionar_callback(lambda registro: 1 / 0)  # um callback com defeito não derruba os outros
+    with rastreador.span('consulta'):
+        with rastreador.span('cache', tipo='pagina'):
+            pass
+    exportador.fechar()
+    registros = [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+    assert [(registro['nome'], registro['pai']) for registro in registros] == [('cache', 1), ('consulta', None)]
+
+
+def test_etapas_da_consulta_medidas_por_dominio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = "https://pt.wikipedia.org/wiki/Zeus"
+    fixtures = Fixtures()
+    texto = "Zeus era o rei dos deuses do Olimpo. " * 20
+    fixtures.guardar_http(url, 200, [('Content-Type', 'text/html; charset=utf-8')],
+                          f"<html><head><title>Zeus</title></head><body><p>{texto}</p></body></html>".encode('utf-8'),
+                          'utf-8')
+    registros = []
+    assistente = AssistenteFixtures(fixtures, offline=True, backend_resumo='lsa_rapido',
+                                    rastreador=Rastreador(ao_finalizar=registros.append),
+                                    confirmar_variacao=lambda pergunta, similar: False,
+                                    provedores=[ProvedorFixo('fixo', [url])])
+    try:
+        assistente.gerar_resposta("quem era o rei dos deuses")
+    finally:
+        assistente.fechar()
+
+    por_nome = {registro['nome']: registro for registro in registros}
+    raiz = por_nome['gerar_resposta']
+    assert raiz['origem'] == 'web' and raiz['pai'] is None
+    for nome in ('memoria', 'provedores', 'paginas', 'pagina', 'extracao', 'resumo'):
+        assert por_nome[nome]['rastro'] == raiz['id']
+    assert por_nome['provedores']['vencedor'] == 'fixo'
+    assert (por_nome['pagina']['dominio'], por_nome['pagina']['situacao']) == ('pt.wikipedia.org', 'ok')
+
+    metricas = assistente.rastreador.prometheus()
+    assert 'pitia_paginas_total{dominio="pt.wikipedia.org",situacao="ok"} 1' in metricas
+    assert 'pitia_pagina_segundos_count{dominio="pt.wikipedia.org"} 1' in metricas
+    assert 'pitia_cache_falhas ' in metricas  # medidores do cache publicados junto
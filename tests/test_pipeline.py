@@ -0,0 +1,114 @@
+import asyncio
+
+from benchmarks.fixtures import AssistenteFixtures, Fixtures
+from pitia.provedores import ProvedorGoogle
+
+CABECALHOS = [('Content-Type', 'text/html; charset=utf-8')]
+
+PAGINAS = {
+    "https://pt.wikipedia.org/wiki/Zeus": (
+        "Zeus",
+        "Zeus era o rei dos deuses do Olimpo na mitologia grega. Ele governava o céu e o trovão e era filho de "
+        "Cronos e Reia. Zeus venceu os titãs com a ajuda dos irmãos Poseidon e Hades. Depois da vitória os três "
+        "dividiram o mundo entre si. Zeus ficou com o céu, Poseidon com os mares e Hades com o mundo dos mortos."),
+    "https://www.bbc.com/hera": (
+        "Hera",
+        "Hera era a esposa de Zeus e a rainha dos deuses. Ela protegia o casamento e as mulheres casadas. Hera era "
+        "conhecida pelo ciúme das amantes de Zeus e pelas vinganças contra elas e seus filhos."),
+    "https://exemplo.com.br/receita": (
+        "Bolo de fubá",
+        "Misture o fubá, o açúcar e os ovos numa tigela grande. Acrescente o leite aos poucos e mexa até a massa "
+        "ficar lisa. Asse em forno médio por quarenta minutos e sirva ainda morno com café."),
+}
+
+CONSULTAS = ["quem era zeus na mitologia grega", "quem era hera esposa de zeus", "como os deuses dividiram o mundo"]
+
+
+def _fixtures(latencia=0.05):
+    fixtures = Fixtures()
+    for url, (titulo, texto) in PAGINAS.items():
+        html = f"<html><head><title>{titulo}</title></head><body><h1>{titulo}</h1><p>{texto}</p></body></html>"
+        fixtures.guardar_http(url, 200, CABECALHOS, html.encode('utf-8'), 'utf-8', latencia)
+    for consulta in CONSULTAS:
+        fixtures.google[consulta] = list(PAGINAS)
+    return fixtures
+
+
+def _assistente(fixtures, **opcoes):
+    assistente = AssistenteFixtures(fixtures, escala_latencia=1.0, offline=True, backend_resumo='lsa_rapido',
+                                    confirmar_variacao=lambda pergunta, similar: False, **opcoes)
+    # só o google das fixtures: a base de conhecimento cairia no duckduckgo
+    assistente.provedores = [ProvedorGoogle(assistente)]
+    return assistente
+
+
+def _contar_requisicoes(assistente):
+    """conta os downloads e quantos estiveram em curso ao mesmo tempo"""
+    cliente = assistente.cliente_http
+    requisitar = cliente._requisitar
+    contagem = {'total': 0, 'em_curso': 0, 'maximo': 0}
+
+    async def contado(*args):
+        contagem['total'] += 1
+        contagem['em_curso'] += 1
+        contagem['maximo'] = max(contagem['maximo'], contagem['em_curso'])
+        try:
+            return await requisitar(*args)
+        finally:
+            contagem['em_curso'] -= 1
+
+    cliente._requisitar = contado
+    return contagem
+
+
+def test_resposta_vem_da_pagina_mais_relevante_e_fica_na_memoria(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistente = _assistente(_fixtures())
+    contagem = _contar_requisicoes(assistente)
+    try:
+        resposta = assistente.gerar_resposta(CONSULTAS[0])
+        assert resposta['source'] == {'title': "Zeus", 'url': "https://pt.wikipedia.org/wiki/Zeus"}
+        assert resposta['response'].startswith("Sobre Zeus:\nZeus era o rei dos deuses do Olimpo")
+        # as três páginas foram baixadas juntas, não uma depois da outra
+        assert contagem == {'total': 3, 'em_curso': 0, 'maximo': 3}
+
+        # a página tinha texto suficiente: a mesma pergunta agora sai da memória, sem rede
+        assert assistente.gerar_resposta(CONSULTAS[0])['source'] == "memória"
+        assert contagem['total'] == 3
+    finally:
+        assistente.fechar()
+
+
+def test_lote_baixa_uma_vez_as_paginas_em_comum(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistente = _assistente(_fixtures())
+    contagem = _contar_requisicoes(assistente)
+    try:
+        respostas = dict(assistente.responder_lote(CONSULTAS + CONSULTAS[:1], concorrencia=3))
+        assert sorted(respostas) == [0, 1, 2, 3]
+        assert respostas[0] is respostas[3]
+        assert respostas[1]['source']['title'] == "Hera"
+        # três consultas com as mesmas três páginas: cada uma é baixada uma vez só
+        assert contagem['total'] == 3
+        assert assistente.fixtures.faltas == {}
+    finally:
+        assistente.fechar()
+
+
+def test_consultas_no_mesmo_laco_dividem_os_downloads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistente = _assistente(_fixtures(latencia=0.2))
+    contagem = _contar_requisicoes(assistente)
+
+    async def principal():
+        try:
+            return await asyncio.gather(*(assistente._resposta_da_web_async(consulta) for consulta in CONSULTAS))
+        finally:
+            await assistente.fechar_async()
+
+    try:
+        respostas = asyncio.run(principal())
+        assert [resposta['source']['title'] for resposta in respostas] == ["Zeus", "Hera", "Zeus"]
+        assert contagem['total'] == 3
+    finally:
+        assistente.fechar()
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from benchmarks.fixtures import AssistenteFixtures, Fixtures
+from pitia.metricas import Rastreador
+from pitia.provedores import ProvedorFixo
+
+CABECALHOS = [('Content-Type', 'text/html; charset=utf-8')]
+CONSULTA = "quem era o rei dos deuses do olimpo"
+
+
+def _pagina(titulo, texto):
+    return f"<html><head><title>{titulo}</title></head><body><p>{texto}</p></body></html>".encode('utf-8')
+
+
+def _assistente(paginas, **opcoes):
+    """paginas: url -> (título, texto, segundos de download)"""
+    fixtures = Fixtures()
+    for url, (titulo, texto, segundos) in paginas.items():
+        fixtures.guardar_http(url, 200, CABECALHOS, _pagina(titulo, texto), 'utf-8', segundos)
+    assistente = AssistenteFixtures(fixtures, escala_latencia=1.0, offline=True, backend_resumo='lsa_rapido',
+                                    rastreador=Rastreador(), confirmar_variacao=lambda pergunta, similar: False,
+                                    **opcoes)
+    cancelados = []
+    carregar = assistente._carregar_pagina
+
+    async def contado(url, chave_cache):
+        try:
+            return await carregar(url, chave_cache)
+        except asyncio.CancelledError:
+            cancelados.append(url)
+            raise
+
+    assistente._carregar_pagina = contado
+    return assistente, cancelados
+
+
+def _processar(assistente, urls, segundos_prazo=None):
+    async def principal():
+        prazo = None if segundos_prazo is None else asyncio.get_running_loop().time() + segundos_prazo
+        inicio = time.perf_counter()
+        try:
+            processados = await assistente._processar_resultados_paralelo_async(CONSULTA, urls, prazo)
+        finally:
+            await assistente.fechar_async()
+        return processados, time.perf_counter() - inicio
+
+    return asyncio.run(principal())
+
+
+def test_prazo_devolve_o_que_chegou_e_cancela_o_resto(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paginas = {
+        "https://pt.wikipedia.org/wiki/Zeus": ("Zeus", "Zeus era o rei dos deuses do Olimpo.", 0.05),
+        "https://www.bbc.com/zeus": ("Zeus na BBC", "Zeus governava o céu.", 0.05),
+        "https://lenta.com.br/zeus": ("Lenta", "Zeus era o rei dos deuses.", 5.0),
+    }
+    assistente, cancelados = _assistente(paginas)
+    try:
+        processados, segundos = _processar(assistente, list(paginas), segundos_prazo=0.5)
+        assert segundos < 2.0
+        assert [dados['title'] for dados in processados] == ["Zeus", "Zeus na BBC"]
+        assert cancelados == ["https://lenta.com.br/zeus"]
+        assert 'pitia_prazo_esgotado_total{etapa="paginas"} 1' in assistente.rastreador.prometheus()
+        # nada da página cancelada ficou no cache nem em andamento
+        assert assistente.cache.obter("pagina_https://lenta.com.br/zeus") is None
+        assert assistente._em_andamento == {}
+    finally:
+        assistente.fechar()
+
+
+def test_pagina_boa_de_dominio_de_confianca_maxima_encerra_cedo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paginas = {
+        "https://www.gov.br/olimpo": ("Olimpo", "Zeus era o rei dos deuses do Olimpo.", 0.05),
+        "https://pt.wikipedia.org/wiki/Zeus": ("Zeus", "Zeus era o rei dos deuses.", 5.0),
+        "https://www.bbc.com/zeus": ("Zeus na BBC", "Zeus governava o céu.", 5.0),
+    }
+    assistente, cancelados = _assistente(paginas)
+    try:
+        processados, segundos = _processar(assistente, list(paginas))
+        assert segundos < 2.0
+        assert [dados['url'] for dados in processados] == ["https://www.gov.br/olimpo"]
+        assert sorted(cancelados) == ["https://pt.wikipedia.org/wiki/Zeus", "https://www.bbc.com/zeus"]
+    finally:
+        assistente.fechar()
+
+
+def test_sem_cobertura_suficiente_espera_todas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paginas = {
+        # confiança máxima, mas sem metade dos termos da consulta: não basta para parar
+        "https://www.gov.br/receita": ("Receita", "Misture o fubá com os ovos.", 0.05),
+        "https://pt.wikipedia.org/wiki/Zeus": ("Zeus", "Zeus era o rei dos deuses do Olimpo.", 0.3),
+    }
+    assistente, cancelados = _assistente(paginas)
+    try:
+        processados, _ = _processar(assistente, list(paginas))
+        assert [dados['title'] for dados in processados] == ["Zeus", "Receita"]
+        assert cancelados == []
+    finally:
+        assistente.fechar()
+
+
+def test_provedor_lento_nao_passa_do_prazo_da_consulta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lento = ProvedorFixo('lento', ["https://pt.wikipedia.org/wiki/Zeus"], latencia=5.0)
+    assistente, _ = _assistente({}, prazo_consulta=0.3, provedores=[lento])
+    try:
+        inicio = time.perf_counter()
+        resposta = assistente.gerar_resposta(CONSULTA)
+        assert time.perf_counter() - inicio < 2.0
+        assert resposta['source'] is None
+        assert lento.cancelados == 1
+        assert 'pitia_prazo_esgotado_total{etapa="provedores"} 1' in assistente.rastreador.prometheus()
+    finally:
+        assistente.fechar()
@@ -0,0 +1,86 @@
+import asyncio
+
+from pitia.metricas import Rastreador
+from pitia.provedores import Provedor, ProvedorFixo, consultar_provedores
+
+
+class ProvedorQuebrado(Provedor):
+    nome = 'quebrado'
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+
+    async def buscar(self, consulta):
+        await asyncio.sleep(self.latencia)
+        raise ConnectionError("sem rede")
+
+
+def _consultar(provedores, espera, rastreador=None):
+    async def principal():
+        laco = asyncio.get_running_loop()
+        inicio = laco.time()
+        provedor, resultado = await consultar_provedores(provedores, "quem era zeus", espera, rastreador)
+        return (provedor.nome if provedor else None), resultado, laco.time() - inicio
+
+    return asyncio.run(principal())
+
+
+def test_sequencial_so_chama_o_proximo_quando_o_anterior_falha():
+    vazio = ProvedorFixo('vazio', [], 0.05)
+    google = ProvedorFixo('google', ["https://exemplo.com/"], 0.05)
+    reserva = ProvedorFixo('reserva', ["https://reserva.com/"], 0.05)
+    nome, resultado, segundos = _consultar([vazio, google, reserva], espera=None)
+    assert (nome, resultado) == ('google', ["https://exemplo.com/"])
+    assert (vazio.chamadas, google.chamadas, reserva.chamadas) == (1, 1, 0)
+    assert segundos >= 0.1
+
+
+def test_corrida_aceita_o_primeiro_que_responde_e_cancela_os_outros():
+    lento = ProvedorFixo('lento', "resposta pronta", 1.0, tipo='texto')
+    rapido = ProvedorFixo('rapido', ["https://exemplo.com/"], 0.05)
+    nome, _, segundos = _consultar([lento, rapido], espera=0)
+    assert nome == 'rapido'
+    assert segundos < 0.5
+    assert (lento.chamadas, lento.cancelados) == (1, 1)
+
+
+def test_resultados_juntos_valem_na_ordem_de_preferencia():
+    primeiro = ProvedorFixo('primeiro', ["https://primeiro.com/"])
+    segundo = ProvedorFixo('segundo', ["https://segundo.com/"])
+    assert _consultar([segundo, primeiro], espera=0)[0] == 'segundo'
+    assert _consultar([primeiro, segundo], espera=0)[0] == 'primeiro'
+
+
+def test_espera_so_dispara_o_proximo_se_o_atual_demorar():
+    rapido = ProvedorFixo('rapido', ["https://rapido.com/"], 0.05)
+    reserva = ProvedorFixo('reserva', ["https://reserva.com/"], 0.05)
+    assert _consultar([rapido, reserva], espera=0.3)[0] == 'rapido'
+    assert reserva.chamadas == 0
+
+    # o primeiro demora mais que a espera: o segundo começa sem que o primeiro seja abandonado
+    demorado = ProvedorFixo('demorado', ["https://demorado.com/"], 0.4)
+    mais_demorado = ProvedorFixo('mais_demorado', ["https://mais.com/"], 1.0)
+    nome, _, segundos = _consultar([demorado, mais_demorado], espera=0.1)
+    assert nome == 'demorado'
+    assert 0.35 < segundos < 0.8
+    assert (mais_demorado.chamadas, mais_demorado.cancelados) == (1, 1)
+
+    # e quem responder primeiro vence, mesmo tendo começado depois
+    lento = ProvedorFixo('lento', ["https://lento.com/"], 1.0)
+    nome, _, segundos = _consultar([lento, ProvedorFixo('veloz', ["https://veloz.com/"], 0.05)], espera=0.1)
+    assert nome == 'veloz' and segundos < 0.5
+    assert lento.cancelados == 1
+
+
+def test_falha_libera_o_proximo_na_hora_e_todas_as_falhas_dao_none():
+    reserva = ProvedorFixo('reserva', ["https://reserva.com/"], 0.05)
+    nome, _, segundos = _consultar([ProvedorQuebrado(0.05), reserva], espera=1.0)
+    assert nome == 'reserva' and segundos < 0.5
+
+    rastreador = Rastreador()
+    assert _consultar([ProvedorQuebrado(), ProvedorFixo('vazio', None)], espera=None, rastreador=rastreador)[:2] == \
+        (None, None)
+    contadores = {tuple(sorted(contador['rotulos'].items())): contador['valor']
+                  for contador in rastreador.instantaneo()['contadores']}
+    assert contadores == {(('provedor', 'quebrado'), ('resultado', 'vazio')): 1,
+                          (('provedor', 'vazio'), ('resultado', 'vazio')): 1}
@@ -0,0 +1,157 @@
+import asyncio
+from email.utils import formatdate
+
+import pytest
+
+from pitia.rede import AgendadorHosts, ClienteHttp, ErroHttp, TabelaDominios, host_da_url, segundos_retry_after
+
+
+def test_host_da_url():
+    assert host_da_url("https://usuario@PT.Wikipedia.org:443/wiki/Zeus?x=1#y") == "pt.wikipedia.org"
+    assert host_da_url("http://exemplo.com.br") == "exemplo.com.br"
+    assert host_da_url("http://[::1]:8080/") == "::1"
+    assert host_da_url("exemplo.com/caminho") == ""
+
+
+def test_dominio_vale_para_subdominios_e_o_mais_especifico_vence():
+    valores = {'wikipedia.org': 2, 'gov.br': 3, 'saude.gov.br': 1}
+    tabela = TabelaDominios(valores)
+    assert tabela.de_url("https://pt.wikipedia.org/wiki/Zeus") == 2
+    assert tabela.de_url("https://notwikipedia.org/") == 0
+    assert tabela.de_url("https://www.saude.gov.br/") == 1
+    assert tabela.de_url("https://www.gov.br/") == 3
+    valores['bbc.com'] = 2  # o dict do dono pode mudar depois
+    assert tabela.de_url("https://www.bbc.com/") == 2
+
+
+def test_retry_after_em_segundos_ou_data():
+    assert segundos_retry_after("120") == 120.0
+    assert segundos_retry_after(formatdate(1000 + 30, usegmt=True), agora=1000) == 30.0
+    assert segundos_retry_after(formatdate(1000 - 30, usegmt=True), agora=1000) == 0.0
+    assert segundos_retry_after("amanhã") is None and segundos_retry_after(None) is None
+
+
+def _medir(agendador, urls, duracao=0.05):
+    """abre uma vaga por url ao mesmo tempo; devolve o máximo simultâneo por chave e os inícios"""
+    em_curso = {}
+    maximo = {}
+    inicios = []
+
+    async def requisicao(url, chave):
+        async with agendador.vaga(url):
+            inicios.append((chave, asyncio.get_running_loop().time()))
+            em_curso[chave] = em_curso.get(chave, 0) + 1
+            maximo[chave] = max(maximo.get(chave, 0), em_curso[chave])
+            await asyncio.sleep(duracao)
+            em_curso[chave] -= 1
+
+    async def principal():
+        await asyncio.gather(*(requisicao(url, chave) for url, chave in urls))
+
+    asyncio.run(principal())
+    return maximo, inicios
+
+
+def test_concorrencia_por_dominio_com_subdominios_juntos():
+    agendador = AgendadorHosts({'wikipedia.org': {'concorrencia': 2}}, concorrencia_padrao=3)
+    urls = [(f"https://{idioma}.wikipedia.org/wiki/{n}", 'wikipedia') for n in range(4) for idioma in ('pt', 'en')]
+    urls += [(f"https://exemplo.com.br/{n}", 'exemplo') for n in range(6)]
+    urls += [(f"https://outro.com.br/{n}", 'outro') for n in range(6)]
+    maximo, _ = _medir(agendador, urls)
+    # pt. e en.wikipedia.org dividem as 2 vagas do domínio; cada host sem regra tem as suas 3
+    assert maximo == {'wikipedia': 2, 'exemplo': 3, 'outro': 3}
+
+
+def test_por_segundo_espaca_os_inicios():
+    agendador = AgendadorHosts({'gov.br': {'concorrencia': 10, 'por_segundo': 20}})
+    _, inicios = _medir(agendador, [(f"https://www.gov.br/{n}", 'gov') for n in range(5)], duracao=0)
+    momentos = sorted(momento for _, momento in inicios)
+    intervalos = [depois - antes for antes, depois in zip(momentos, momentos[1:])]
+    assert min(intervalos) >= 0.045
+    assert agendador.espera_total >= 0.18
+
+
+def test_pausa_segura_o_dominio_todo():
+    agendador = AgendadorHosts({'wikipedia.org': {'concorrencia': 4}})
+
+    async def principal():
+        laco = asyncio.get_running_loop()
+        agendador.pausar("https://pt.wikipedia.org/wiki/Zeus", 0.3)
+        inicio = laco.time()
+        async with agendador.vaga("https://en.wikipedia.org/wiki/Zeus"):
+            pausado = laco.time() - inicio
+        inicio = laco.time()
+        async with agendador.vaga("https://exemplo.com.br/"):
+            livre = laco.time() - inicio
+        return pausado, livre
+
+    pausado, livre = asyncio.run(principal())
+    assert pausado >= 0.28 and livre < 0.05
+    assert agendador.pausas == 1
+
+
+async def _com_servidor(rota, usar):
+    """sobe rota num servidor local e roda usar(base_url)"""
+    from aiohttp import web
+
+    aplicacao = web.Application()
+    aplicacao.add_routes([web.get('/{caminho}', rota)])
+    executor = web.AppRunner(aplicacao, access_log=None)
+    await executor.setup()
+    site = web.TCPSite(executor, '127.0.0.1', 0)
+    await site.start()
+    try:
+        return await usar(f"http://127.0.0.1:{executor.addresses[0][1]}")
+    finally:
+        await executor.cleanup()
+
+
+def test_429_pausa_o_host_e_tenta_de_novo_pela_mesma_conexao():
+    from aiohttp import web
+
+    pedidos = []
+
+    async def rota(requisicao):
+        pedidos.append(requisicao.path)
+        if len(pedidos) == 1:
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        return web.Response(text="ok")
+
+    cliente = ClienteHttp(tentativas=2, fator_espera=0.01)
+
+    async def usar(base):
+        laco = asyncio.get_running_loop()
+        inicio = laco.time()
+        primeira = await cliente.obter(f"{base}/a")
+        segunda = await cliente.obter(f"{base}/b")
+        segundos = laco.time() - inicio
+        await cliente.fechar()
+        return primeira.texto, segunda.texto, segundos
+
+    primeira, segunda, segundos = asyncio.run(_com_servidor(rota, usar))
+    assert (primeira, segunda) == ("ok", "ok")
+    assert pedidos == ['/a', '/a', '/b']
+    assert segundos >= 0.95  # esperou o Retry-After antes de repetir
+    estatisticas = cliente.estatisticas()
+    assert estatisticas['pausas'] == 1
+    assert estatisticas['por_host'] == {'127.0.0.1': {'novas': 1, 'reusadas': 2}}
+
+
+def test_retry_after_longo_demais_vira_erro():
+    from aiohttp import web
+
+    async def rota(requisicao):
+        return web.Response(status=503, headers={'Retry-After': '3600'})
+
+    cliente = ClienteHttp(tentativas=3, espera_maxima=30)
+
+    async def usar(base):
+        try:
+            with pytest.raises(ErroHttp) as erro:
+                await cliente.obter(f"{base}/a")
+            return erro.value.status
+        finally:
+            await cliente.fechar()
+
+    assert asyncio.run(_com_servidor(rota, usar)) == 503
+    assert cliente.agendador.pausas == 0
@@ -0,0 +1,82 @@
+import random
+import warnings
+
+import pytest
+
+from pitia.recursos import recursos_ausentes
+from pitia.resumo import ResumidorLsa, ResumidorLsaRapido
+from pitia.texto import TOKENIZADOR_PADRAO, Documento, dividir_frases
+
+TEXTOS = [
+    ("Zeus era o rei dos deuses do Olimpo. Ele governava o céu e o trovão. Hera era a esposa de Zeus e rainha dos "
+     "deuses. Poseidon governava os mares e os terremotos. Hades reinava sobre o mundo dos mortos. Os três irmãos "
+     "dividiram o mundo depois de vencer os titãs. Atena nasceu da cabeça de Zeus já adulta e armada.",
+     ["Hera era a esposa de Zeus e rainha dos deuses.", "Atena nasceu da cabeça de Zeus já adulta e armada."]),
+    ("O café chegou ao Brasil no século dezoito. As primeiras mudas vieram da Guiana Francesa. O plantio se espalhou "
+     "pelo vale do Paraíba e depois por São Paulo. A exportação de café sustentou a economia por um século. Ferrovias "
+     "foram construídas para levar o café aos portos. O porto de Santos se tornou o maior exportador de café do mundo.",
+     ["O plantio se espalhou pelo vale do Paraíba e depois por São Paulo.",
+      "Ferrovias foram construídas para levar o café aos portos."]),
+    ("A fotossíntese transforma luz em energia química. As plantas usam água e gás carbônico na fotossíntese. O "
+     "oxigênio é liberado como subproduto. A clorofila absorve principalmente luz azul e vermelha. Sem a fotossíntese "
+     "não haveria oxigênio suficiente na atmosfera. Algas também fazem fotossíntese nos oceanos.",
+     ["As plantas usam água e gás carbônico na fotossíntese.",
+      "Sem a fotossíntese não haveria oxigênio suficiente na atmosfera."]),
+]
+
+
+def _textos_com_empates(quantidade=60, semente=3):
+    """vocabulário pequeno: muitas frases acabam com a mesma nota"""
+    palavras = ("rio montanha cidade mar sol lua terra fogo vento chuva pedra árvore floresta campo estrada "
+                "casa povo rei guerra paz").split()
+    aleatorio = random.Random(semente)
+
+    def frase():
+        return ' '.join(aleatorio.choice(palavras) for _ in range(aleatorio.randint(5, 12))).capitalize() + '.'
+    return [' '.join(frase() for _ in range(12)) for _ in range(quantidade)]
+
+
+def _frases(resumo):
+    return set(dividir_frases(resumo))
+
+
+@pytest.mark.parametrize('texto, esperadas', TEXTOS)
+def test_lsa_e_lsa_rapido_escolhem_as_mesmas_frases_com_o_mesmo_tokenizador(texto, esperadas):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # o sumy avisa quando há menos palavras que frases
+        lsa = ResumidorLsa(tokenizador=TOKENIZADOR_PADRAO, memoria=0).resumir(texto, 2)
+    assert dividir_frases(lsa) == esperadas
+    assert dividir_frases(ResumidorLsaRapido(memoria=0).resumir(texto, 2)) == esperadas
+
+
+def test_lsa_rapido_so_diverge_do_lsa_em_notas_empatadas():
+    # com o mesmo tokenizador as notas são as mesmas até o arredondamento; frases de nota
+    # igual podem sair trocadas, já que o sumy e o numpy arredondam de formas diferentes
+    lsa = ResumidorLsa(tokenizador=TOKENIZADOR_PADRAO, memoria=0)
+    rapido = ResumidorLsaRapido(memoria=0)
+    coincidentes = 0
+    textos = _textos_com_empates()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for texto in textos:
+            documento = Documento(texto)
+            notas = dict(zip(documento.frases, rapido._notas(rapido._matriz(documento))))
+            de_lsa, de_rapido = _frases(lsa.resumir(texto, 2)), _frases(rapido.resumir(texto, 2))
+            coincidentes += len(de_lsa & de_rapido)
+            for so_rapido in de_rapido - de_lsa:
+                assert any(abs(notas[so_rapido] - notas[outra]) <= 1e-9 * notas[outra] for outra in de_lsa - de_rapido)
+    # tolerância: pelo menos 90% das frases escolhidas são as mesmas (medido: 94%)
+    assert coincidentes / (2 * len(textos)) >= 0.9
+
+
+@pytest.mark.skipif(bool(recursos_ausentes(['punkt_tab'])), reason="punkt do nltk ausente")
+def test_lsa_com_punkt_concorda_com_lsa_rapido_na_maior_parte():
+    # o tokenizador do sumy (punkt) divide frases e palavras de outro jeito que o regex do
+    # lsa_rapido, então as escolhas não são as mesmas; o benchmark resumo mede cerca de 95%
+    lsa = ResumidorLsa(memoria=0)
+    rapido = ResumidorLsaRapido(memoria=0)
+    textos = [texto for texto, _ in TEXTOS] + _textos_com_empates()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        coincidentes = sum(len(_frases(lsa.resumir(texto, 2)) & _frases(rapido.resumir(texto, 2))) for texto in textos)
+    assert coincidentes / (2 * len(textos)) >= 0.8
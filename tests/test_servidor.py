@@ -0,0 +1,107 @@
+import asyncio
+
+from pitia import AssistenteAvancado
+from pitia import servidor as servidor_modulo
+from pitia.metricas import Rastreador
+from pitia.provedores import ProvedorFixo
+from pitia.servidor import ServidorPitia, Sessoes, negar_variacoes
+
+
+def _servidor(sessoes=None):
+    # a fonte responde texto pronto: nada de rede nem de recursos do nltk
+    assistente = AssistenteAvancado(offline=True, confirmar_variacao=negar_variacoes, rastreador=Rastreador(),
+                                    provedores=[ProvedorFixo('fixo', "resposta da fonte", tipo='texto')])
+    return ServidorPitia(assistente, sessoes)
+
+
+def _conversar(servidor, conversa):
+    """roda conversa(cliente) contra a aplicação do servidor numa porta local"""
+    from aiohttp.test_utils import TestClient, TestServer
+
+    async def principal():
+        cliente = TestClient(TestServer(servidor.aplicacao()))
+        await cliente.start_server()
+        try:
+            return await conversa(cliente)
+        finally:
+            await cliente.close()
+
+    return asyncio.run(principal())
+
+
+def test_responder_corrigir_e_aprender(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    servidor = _servidor()
+
+    async def conversa(cliente):
+        resposta = await cliente.post('/responder', json={'consulta': "quem era o rei dos deuses"})
+        assert resposta.status == 200
+        dados = await resposta.json()
+        assert (dados['response'], dados['source']) == ("resposta da fonte", "base de conhecimento")
+        sessao = dados['sessao']
+
+        resposta = await cliente.post('/corrigir', json={'correcao': "correção: Zeus", 'sessao': sessao})
+        assert await resposta.json() == {'ok': True, 'sessao': sessao}
+        resposta = await cliente.post('/responder', json={'consulta': "quem era o rei dos deuses"},
+                                      headers={'X-Sessao': sessao})
+        assert await resposta.json() == {'response': "Zeus", 'source': "memória", 'sessao': sessao}
+
+        resposta = await cliente.post('/aprender', json={'pergunta': "Qual a capital do Brasil", 'resposta': "Brasília"})
+        assert await resposta.json() == {'ok': True}
+        resposta = await cliente.post('/responder', json={'consulta': "qual a capital do brasil"})
+        dados = await resposta.json()
+        assert dados['response'] == "Brasília" and dados['sessao'] != sessao
+
+        saude = await (await cliente.get('/saude')).json()
+        assert (saude['ok'], saude['sessoes'], saude['memoria']) == (True, 2, 2)
+        return await (await cliente.get('/metricas')).text()
+
+    metricas = _conversar(servidor, conversa)
+    assert 'pitia_etapa_segundos_count{etapa="gerar_resposta"} 3' in metricas
+    assert 'pitia_provedor_total{provedor="fixo",resultado="aceito"} 1' in metricas
+    # o encerramento da aplicação gravou a memória
+    assert servidor.assistente.memoria_disco.carregar() == {"quem era o rei dos deuses": "Zeus",
+                                                            "qual a capital do brasil": "Brasília"}
+
+
+def test_pedidos_invalidos_recebem_400(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def conversa(cliente):
+        situacoes = [
+            await cliente.post('/responder', data=b'{nao e json'),
+            await cliente.post('/responder', json=['consulta']),
+            await cliente.post('/responder', json={'consulta': "   "}),
+            await cliente.post('/aprender', json={'pergunta': "só a pergunta"}),
+            await cliente.post('/corrigir', json={'correcao': "sem sessão"}),
+        ]
+        return [resposta.status for resposta in situacoes]
+
+    assert _conversar(_servidor(), conversa) == [400] * 5
+
+
+def test_sessoes_expiram_e_sao_limitadas(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(servidor_modulo.time, 'time', lambda: agora[0])
+    sessoes = Sessoes(max_sessoes=2, ttl=60)
+    primeira, sessao = sessoes.obter()
+    assert sessoes.obter(primeira) == (primeira, sessao)
+
+    agora[0] += 61
+    _, nova = sessoes.obter(primeira)
+    assert nova is not sessao  # expirou: mesmo identificador, sessão nova
+
+    segunda, _ = sessoes.obter()
+    sessoes.obter(primeira)  # a primeira passa a ser a mais recente
+    sessoes.obter()
+    assert len(sessoes) == 2 and segunda not in sessoes._sessoes
+
+
+def test_servidor_usa_as_sessoes_recebidas_mesmo_vazias(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sessoes = Sessoes(max_sessoes=5)
+    servidor = _servidor(sessoes)
+    try:
+        assert servidor.sessoes is sessoes
+    finally:
+        servidor.assistente.fechar()
@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+from benchmarks.comum import gerar_artigo
+from benchmarks.texto import _limpeza_antiga
+from pitia import AssistenteAvancado
+from pitia.texto import NormalizadorTexto
+
+
+def test_remove_citacoes_e_parenteses_e_junta_espacos():
+    normalizador = NormalizadorTexto()
+    texto = "Zeus [1] era o rei (em grego, Ζεύς)[12]\n  dos deuses\tdo Olimpo(c. 1200 a.C.)."
+    assert normalizador.normalizar(texto) == "Zeus era o rei dos deuses do Olimpo."
+    assert normalizador.normalizar("") == ""
+    # sem espaço em volta, o parêntese sai sem deixar espaço, mesmo tendo espaços dentro
+    assert normalizador.normalizar("Olimpo(c. 1200 a.C.). Zeus(rei)[2] e Hera") == "Olimpo. Zeus e Hera"
+    assert normalizador.normalizar("Olimpo(c. 1200 a.C.)") == _limpeza_antiga("Olimpo(c. 1200 a.C.)", {})
+
+
+def test_regras_ignoram_maiusculas_e_saida_de_uma_regra_nao_e_reprocessada():
+    normalizador = NormalizadorTexto({r"\bposteriormente\b": "depois", r"\bdepois\b": "após",
+                                      r"\bdevido ao fato de\b": "porque"})
+    assert normalizador.normalizar("Posteriormente voltou, devido  ao\nfato de chover") == "depois voltou, porque chover"
+    assert normalizador.normalizar("depois") == "após"
+
+
+def test_regras_novas_valem_sem_perder_a_passada_unica():
+    normalizador = NormalizadorTexto()
+    normalizador.normalizar("constitui")
+    padrao = normalizador._padrao
+    normalizador.normalizar("denominado")
+    assert normalizador._padrao is padrao  # sem alteração nas regras, nada é recompilado
+
+    normalizador.adicionar_regra(r"\butilizar\b", "usar")
+    normalizador.regras[r"\bauxiliar\b"] = "ajudar"
+    assert normalizador.normalizar("utilizar e auxiliar, posteriormente") == "usar e ajudar, depois"
+    assert len(re.findall(r"\(\?P<r\d+>", normalizador._padrao.pattern)) == len(normalizador.regras)
+
+
+def test_mapa_do_assistente_e_o_do_normalizador(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistente = AssistenteAvancado(offline=True)
+    try:
+        assistente.mapa_simplificacao[r"\bsoberano\b"] = "rei"
+        assert assistente._limpar_texto("Zeus [3] era o soberano  do Olimpo") == "Zeus era o rei do Olimpo"
+    finally:
+        assistente.fechar()
+
+
+@pytest.mark.parametrize('semente', [1, 2, 3])
+def test_documento_inteiro_da_o_mesmo_que_bloco_a_bloco_e_que_a_limpeza_antiga(semente):
+    normalizador = NormalizadorTexto()
+    blocos = gerar_artigo(40, semente=semente)
+    por_bloco = [normalizador.normalizar(bloco) for bloco in blocos]
+    assert normalizador.normalizar_blocos(blocos) == por_bloco
+    # nos artigos nenhuma regra produz o texto de outra, então a passada única não muda nada
+    assert por_bloco == [_limpeza_antiga(bloco, normalizador.regras) for bloco in blocos]
+
+
+def test_parenteses_nao_atravessam_blocos():
+    normalizador = NormalizadorTexto()
+    assert normalizador.normalizar_blocos(["Zeus (rei", "dos deuses) do Olimpo", ""]) == \
+        ["Zeus (rei", "dos deuses) do Olimpo", ""]